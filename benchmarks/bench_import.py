@@ -0,0 +1,20 @@
+class ImportTime(object):
+    """
+    Import time of nixworks in a fresh interpreter. Headless users only
+    import nixworks.table and must not pay for the plotting stack.
+    """
+
+    def timeraw_import_nixworks(self):
+        return "import nixworks"
+
+    def timeraw_import_table(self):
+        return "from nixworks.table import table"
+
+    def timeraw_import_stats(self):
+        return "from nixworks.stats import stats"
+
+    def timeraw_import_plotter(self):
+        return "from nixworks.plotter import plotter"
+
+    def timeraw_import_interactor(self):
+        return "from nixworks.plotter import interactor"
@@ -0,0 +1,48 @@
+import numpy as np
+import nixio as nix
+import matplotlib.pyplot as plt
+
+from .common import create_file
+from nixworks.plotter.interactor import Interactor
+
+
+class InteractorSetup(object):
+    """
+    Checks run by Interactor.interact_da before anything is drawn.
+    The tag search is quadratic in the number of arrays and tags, which
+    limits the sizes.
+    """
+    params = [10, 30, 100]
+    param_names = ["count"]
+    timeout = 600
+
+    def setup_cache(self):
+        path, nixfile, _ = create_file("bench_interactor.nix")
+        for count in self.params:
+            # one block per size, tags are searched block wide
+            block = nixfile.create_block("b_%i" % count, "bench")
+            for i in range(count):
+                da = block.create_data_array("da_%i_%i" % (count, i),
+                                             "bench", data=np.zeros(10))
+                da.unit = "mV"
+                dim = da.append_sampled_dimension(0.001)
+                dim.unit = "s"
+                tag = block.create_tag("tag_%i_%i" % (count, i), "bench",
+                                       position=[0.001 * i])
+                tag.references.append(da)
+        nixfile.close()
+        return path
+
+    def setup(self, path, count):
+        self.file = nix.File.open(path, nix.FileMode.ReadOnly)
+        self.arrays = list(self.file.blocks["b_%i" % count].data_arrays)
+
+    def teardown(self, path, count):
+        plt.close("all")
+        self.file.close()
+
+    def time_check_da_combination(self, path, count):
+        Interactor._check_da_combination(self.arrays)
+
+    def time_reverse_search_tag(self, path, count):
+        Interactor._reverse_search_tag(self.arrays)
@@ -0,0 +1,92 @@
+import numpy as np
+import nixio as nix
+import matplotlib.pyplot as plt
+
+from .common import create_file, sampled_array, sizes
+from nixworks.plotter import plotter
+
+
+class LinePlotterWindow(object):
+    """
+    Moving the LinePlotter window through long (multichannel) recordings.
+    """
+    params = [sizes(4), [1, 4, 16]]
+    param_names = ["length", "channels"]
+    timeout = 600
+    maxpoints = 10000
+
+    def setup_cache(self):
+        path, nixfile, block = create_file("bench_lineplotter.nix")
+        for length in self.params[0]:
+            for channels in self.params[1]:
+                sampled_array(block, "da_%i_%i" % (length, channels),
+                              length, channels)
+        nixfile.close()
+        return path
+
+    def setup(self, path, length, channels):
+        self.file = nix.File.open(path, nix.FileMode.ReadOnly)
+        self.da = self.file.blocks[0].data_arrays["da_%i_%i" %
+                                                  (length, channels)]
+        self.plotter = plotter.LinePlotter(self.da)
+        self.plotter.plot(maxpoints=self.maxpoints)
+        self.steps = max(int(length / self.maxpoints), 1)
+        self.step = 0
+
+    def teardown(self, path, length, channels):
+        plt.close("all")
+        self.file.close()
+
+    def time_initial_plot(self, path, length, channels):
+        fig, axis = plt.subplots()
+        plotter.LinePlotter(self.da).plot(axis=axis,
+                                          maxpoints=self.maxpoints)
+        plt.close(fig)
+
+    def time_move_window(self, path, length, channels):
+        # slider values start at 1, every step shows the next window
+        self.step = self.step % self.steps + 1
+        self.plotter.slider.set_val(self.step)
+
+    def time_render(self, path, length, channels):
+        self.plotter.fig.canvas.draw()
+
+
+class ImagePlotterMatrix(object):
+    """
+    Drawing large 2D matrices with the ImagePlotter.
+    """
+    params = [256, 1024, 4096]
+    param_names = ["size"]
+    timeout = 600
+
+    def setup_cache(self):
+        path, nixfile, block = create_file("bench_imageplotter.nix")
+        for size in self.params:
+            da = block.create_data_array("img_%i" % size, "bench.image",
+                                         shape=(size, size),
+                                         dtype=nix.DataType.Double)
+            da[:] = np.random.RandomState(42).randn(size, size)
+            da.append_sampled_dimension(1.)
+            da.append_sampled_dimension(1.)
+        nixfile.close()
+        return path
+
+    def setup(self, path, size):
+        self.file = nix.File.open(path, nix.FileMode.ReadOnly)
+        self.da = self.file.blocks[0].data_arrays["img_%i" % size]
+
+    def teardown(self, path, size):
+        plt.close("all")
+        self.file.close()
+
+    def time_plot(self, path, size):
+        image_plotter = plotter.ImagePlotter(self.da)
+        image_plotter.plot()
+        plt.close(image_plotter.fig)
+
+    def time_plot_render(self, path, size):
+        image_plotter = plotter.ImagePlotter(self.da)
+        image_plotter.plot()
+        image_plotter.fig.canvas.draw()
+        plt.close(image_plotter.fig)
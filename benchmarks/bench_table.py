@@ -0,0 +1,44 @@
+import os
+import nixio as nix
+
+from .common import create_file, data_frame, sizes
+from nixworks.table import table
+
+
+class TableConversion(object):
+    """
+    Conversion between NIX DataFrames and pandas DataFrames.
+    """
+    params = sizes(3)
+    param_names = ["rows"]
+    timeout = 600
+
+    def setup_cache(self):
+        path, nixfile, block = create_file("bench_table.nix")
+        for rows in self.params:
+            data_frame(block, "df_%i" % rows, rows)
+        nixfile.close()
+        return path
+
+    def setup(self, path, rows):
+        self.file = nix.File.open(path, nix.FileMode.ReadOnly)
+        self.df = self.file.blocks[0].data_frames["df_%i" % rows]
+        self.pd_df = table.write_to_pandas(self.df)
+        self.scratch_path = os.path.abspath("bench_scratch.nix")
+        self.scratch = nix.File.open(self.scratch_path,
+                                     nix.FileMode.Overwrite)
+        self.scratch_block = self.scratch.create_block("scratch", "bench")
+        self.count = 0
+
+    def teardown(self, path, rows):
+        self.file.close()
+        self.scratch.close()
+        os.remove(self.scratch_path)
+
+    def time_write_to_pandas(self, path, rows):
+        table.write_to_pandas(self.df)
+
+    def time_create_from_pandas(self, path, rows):
+        self.count += 1
+        table.create_from_pandas(self.scratch_block, self.pd_df,
+                                 "df_%i" % self.count)
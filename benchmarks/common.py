@@ -0,0 +1,39 @@
+"""
+Shared fixtures of the benchmark suite. Importing this module switches
+matplotlib to the Agg backend, so all benchmarks run headless.
+"""
+import os
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np  # noqa: E402
+import nixio as nix  # noqa: E402
+
+from nixworks.test import create_testfile  # noqa: E402
+
+# Largest size is 10**MAX_EXP rows/samples, lower it for quick local runs
+MAX_EXP = int(os.environ.get("NIXWORKS_BENCH_MAX_EXP", 7))
+
+
+def sizes(first_exp, last_exp=None):
+    last_exp = MAX_EXP if last_exp is None else min(last_exp, MAX_EXP)
+    return [10 ** e for e in range(first_exp, last_exp + 1)]
+
+
+def create_file(name):
+    path = os.path.abspath(name)
+    nixfile = nix.File.open(path, nix.FileMode.Overwrite)
+    return path, nixfile, nixfile.create_block("bench", "benchmark")
+
+
+def sampled_array(block, name, length, channels=1, seed=42):
+    rng = np.random.RandomState(seed)
+    if channels == 1:
+        return create_testfile.create_1d_sampled(block, length, rng=rng,
+                                                 name=name)
+    return create_testfile.create_2d_sampled_set(block, length, channels,
+                                                 rng=rng, name=name)
+
+
+def data_frame(block, name, rows, seed=42):
+    return create_testfile.create_data_frame(
+        block, rows, np.random.RandomState(seed), name=name)
@@ -0,0 +1,169 @@
+"""
+Minimal runner for the asv-style benchmarks in this directory, for
+machines without asv. Writes the timings as JSON and compares two result
+files:
+
+    python -m benchmarks.run -o new.json
+    python -m benchmarks.run --compare old.json new.json
+
+Set NIXWORKS_BENCH_MAX_EXP to limit the largest benchmark sizes.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+PREFIXES = ("time_", "timeraw_")
+
+
+def discover(pattern=None):
+    package = os.path.dirname(os.path.abspath(__file__))
+    for info in pkgutil.iter_modules([package]):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module("benchmarks." + info.name)
+        for cname, cls in sorted(vars(module).items()):
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for mname in sorted(vars(cls)):
+                name = "%s.%s.%s" % (info.name, cname, mname)
+                if mname.startswith(PREFIXES) and \
+                   (pattern is None or re.search(pattern, name)):
+                    yield name, cls, mname
+
+
+def param_combinations(cls):
+    params = getattr(cls, "params", [])
+    if not params:
+        return [()]
+    if not isinstance(params[0], list):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def time_raw(code, repeat):
+    timer = ("import time\nt = time.perf_counter()\n%s\n"
+             "print(time.perf_counter() - t)" % code)
+    # fresh interpreter, but importing the same nixworks as this process
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return [float(subprocess.check_output([sys.executable, "-c", timer],
+                                          env=env))
+            for _ in range(repeat)]
+
+
+def time_call(func, args, repeat):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return [t / number for t in timer.repeat(repeat, number)]
+
+
+def run_benchmark(cls, mname, cache, combination, repeat):
+    bench = cls()
+    args = ((cache,) if cache is not None else ()) + tuple(combination)
+    method = getattr(bench, mname)
+    if mname.startswith("timeraw_"):
+        return time_raw(method(*args), repeat)
+    if hasattr(bench, "setup"):
+        bench.setup(*args)
+    try:
+        return time_call(method, args, repeat)
+    finally:
+        if hasattr(bench, "teardown"):
+            bench.teardown(*args)
+
+
+def run(pattern=None, repeat=5):
+    results = {}
+    caches = {}
+    workdir = tempfile.mkdtemp(prefix="nixworks-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for name, cls, mname in discover(pattern):
+            if hasattr(cls, "setup_cache") and cls not in caches:
+                caches[cls] = cls().setup_cache()
+            stats = []
+            for combination in param_combinations(cls):
+                times = run_benchmark(cls, mname, caches.get(cls),
+                                      combination, repeat)
+                stats.append({"params": list(combination),
+                              "median": float(np.median(times)),
+                              "min": float(np.min(times))})
+                print("%-60s %-20s %10.6f s" % (name, combination,
+                                                stats[-1]["median"]))
+            results[name] = stats
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+    return results
+
+
+def machine_info():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                         stderr=subprocess.DEVNULL)
+        commit = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(),
+            "machine": platform.machine(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "commit": commit}
+
+
+def compare(old_path, new_path, factor):
+    with open(old_path) as f:
+        old = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        old_stats = dict((str(s["params"]), s) for s in old[name])
+        for stats in new[name]:
+            base = old_stats.get(str(stats["params"]))
+            if base is None:
+                continue
+            ratio = stats["median"] / base["median"]
+            flag = ""
+            if ratio > factor:
+                flag = "REGRESSION"
+                regressions += 1
+            elif ratio < 1. / factor:
+                flag = "improved"
+            print("%-60s %-20s %6.2fx %s" % (name, stats["params"], ratio,
+                                             flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-b", "--bench", help="regex of benchmarks to run")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--factor", type=float, default=1.2,
+                        help="slowdown reported as regression")
+    args = parser.parse_args(argv)
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1],
+                            args.factor) else 0
+    output = os.path.abspath(args.output)
+    results = {"machine": machine_info(),
+               "results": run(args.bench, args.repeat)}
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,31 @@
-from .plotter import plotter, interactor
-from .table import table
+import importlib
 
-__all__ = ["plotter", "interactor", "table"]
+# Submodules are imported on first attribute access, so that headless users
+# of e.g. nixworks.table do not pay for matplotlib, IPython and ipywidgets.
+_submodules = {
+    "catalog": "nixworks.catalog.catalog",
+    "export": "nixworks.export.export",
+    "plotter": "nixworks.plotter.plotter",
+    "interactor": "nixworks.plotter.interactor",
+    "profiling": "nixworks.profiling.profiling",
+    "render": "nixworks.render.render",
+    "repack": "nixworks.repack.repack",
+    "stats": "nixworks.stats.stats",
+    "storage": "nixworks.storage.storage",
+    "table": "nixworks.table.table",
+}
+
+__all__ = ["catalog", "export", "plotter", "interactor", "profiling",
+           "render", "repack", "stats", "storage", "table"]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        module = importlib.import_module(_submodules[name])
+        globals()[name] = module
+        return module
+    raise AttributeError("module 'nixworks' has no attribute '%s'" % name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
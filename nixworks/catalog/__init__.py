@@ -0,0 +1,3 @@
+from .catalog import Catalog, scan_file
+
+__all__ = ["Catalog", "scan_file"]
@@ -0,0 +1,389 @@
+import fnmatch
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+import nixio as nix
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    entity_id TEXT NOT NULL,
+    name TEXT,
+    type TEXT
+);
+CREATE TABLE IF NOT EXISTS arrays (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    block_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    unit TEXT,
+    dtype TEXT,
+    shape TEXT,
+    dimensions TEXT,
+    length INTEGER,
+    sampling_interval REAL,
+    x_unit TEXT,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS data_frames (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    block_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    rows INTEGER,
+    columns TEXT
+);
+CREATE TABLE IF NOT EXISTS tags (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    block_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    kind TEXT
+);
+CREATE TABLE IF NOT EXISTS tag_references (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    tag_id TEXT NOT NULL,
+    array_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS arrays_file ON arrays(file_id);
+CREATE INDEX IF NOT EXISTS arrays_unit ON arrays(unit);
+CREATE INDEX IF NOT EXISTS tags_name ON tags(name);
+CREATE INDEX IF NOT EXISTS tag_references_tag ON tag_references(tag_id);
+'''
+
+# stored as PRAGMA user_version, catalogs of older versions are re-scanned
+# 1: durations of time axes in seconds
+VERSION = 1
+
+
+def _dimension_kinds(array):
+    # DimensionType is an enum in newer nixio versions, a str in older ones
+    return ",".join(getattr(d.dimension_type, "value", d.dimension_type)
+                    for d in array.dimensions)
+
+
+def _describe_array(block, array):
+    shape = list(array.shape)
+    length = shape[0] if shape else 0
+    interval = x_unit = duration = None
+    for i, dim in enumerate(array.dimensions):
+        if dim.dimension_type == nix.DimensionType.Sample:
+            # the first sampled dimension is taken as time axis
+            length = shape[i]
+            interval = dim.sampling_interval
+            x_unit = dim.unit
+            duration = length * interval
+            # time axes in seconds, so that durations of arrays sampled in
+            # e.g. ms and s can be compared
+            if x_unit and nix.util.units.scalable(x_unit, "s"):
+                duration *= nix.util.units.scaling(x_unit, "s")
+            break
+    return {"block_id": block.id, "entity_id": array.id, "name": array.name,
+            "type": array.type, "unit": array.unit,
+            "dtype": str(array.dtype), "shape": json.dumps(shape),
+            "dimensions": _dimension_kinds(array), "length": length,
+            "sampling_interval": interval, "x_unit": x_unit,
+            "duration": duration}
+
+
+def scan_file(path):
+    '''
+    Describe all blocks, DataArrays, DataFrames and Tags of a NIX file.
+    Runs in the worker processes of Catalog.scan.
+
+    :param path: Path of the NIX file
+    :type path: str
+    :return: Lists of row dicts per table, or the error message
+    :rtype: dict
+    '''
+    result = {"blocks": [], "arrays": [], "data_frames": [], "tags": [],
+              "tag_references": [], "error": None}
+    try:
+        nixfile = nix.File.open(path, nix.FileMode.ReadOnly)
+    except Exception as e:
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+        return result
+    try:
+        for block in nixfile.blocks:
+            result["blocks"].append({"entity_id": block.id,
+                                     "name": block.name,
+                                     "type": block.type})
+            for array in block.data_arrays:
+                result["arrays"].append(_describe_array(block, array))
+            for df in block.data_frames:
+                result["data_frames"].append({
+                    "block_id": block.id, "entity_id": df.id,
+                    "name": df.name, "type": df.type, "rows": df.shape[0],
+                    "columns": json.dumps([str(c)
+                                           for c in df.column_names])})
+            for kind, tags in (("tag", block.tags),
+                               ("multi_tag", block.multi_tags)):
+                for tag in tags:
+                    result["tags"].append({"block_id": block.id,
+                                           "entity_id": tag.id,
+                                           "name": tag.name,
+                                           "type": tag.type, "kind": kind})
+                    for ref in tag.references:
+                        result["tag_references"].append(
+                            {"tag_id": tag.id, "array_id": ref.id})
+    except Exception as e:
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+    finally:
+        nixfile.close()
+    return result
+
+
+class Catalog(object):
+    '''
+    SQLite index of the blocks, DataArrays, DataFrames and Tags of many NIX
+    files. Files are described in a process pool and only re-scanned when
+    their modification time or size changed.
+
+        catalog = Catalog("archive.sqlite")
+        catalog.scan("/data/archive")
+        for row in catalog.query_arrays(unit="mV", dimension="sample",
+                                        min_duration=3600, tag="X"):
+            LinePlotter(catalog.load(row)).plot()
+    '''
+
+    def __init__(self, path="nixworks_catalog.sqlite"):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < VERSION:
+            with self.db:
+                self.db.execute("DELETE FROM files")
+            self.db.execute("PRAGMA user_version = %i" % VERSION)
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for nixfile in self._files.values():
+            nixfile.close()
+        self._files = {}
+        self.db.close()
+
+    @staticmethod
+    def find_files(root, pattern="*.nix"):
+        found = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in fnmatch.filter(filenames, pattern):
+                found.append(os.path.abspath(os.path.join(dirpath, name)))
+        return sorted(found)
+
+    def _outdated(self, paths):
+        known = dict((r["path"], (r["mtime"], r["size"]))
+                     for r in self.db.execute(
+                         "SELECT path, mtime, size FROM files"))
+        outdated = []
+        for path in paths:
+            st = os.stat(path)
+            if known.get(path) != (st.st_mtime, st.st_size):
+                outdated.append((path, st.st_mtime, st.st_size))
+        return outdated
+
+    def _store(self, path, mtime, size, result):
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            file_id = self.db.execute(
+                "INSERT INTO files (path, mtime, size, error) "
+                "VALUES (?, ?, ?, ?)",
+                (path, mtime, size, result["error"])).lastrowid
+            for table in ("blocks", "arrays", "data_frames", "tags",
+                          "tag_references"):
+                for row in result[table]:
+                    columns = ["file_id"] + list(row)
+                    self.db.execute(
+                        "INSERT INTO %s (%s) VALUES (%s)" %
+                        (table, ", ".join(columns),
+                         ", ".join("?" * len(columns))),
+                        [file_id] + list(row.values()))
+
+    def scan(self, root, pattern="*.nix", workers=None, prune=True):
+        '''
+        Index all NIX files below root. Unchanged files are skipped.
+
+        :param root: Directory to be searched recursively
+        :type root: str
+        :param pattern: Glob pattern of the file names
+        :type pattern: str
+        :param workers: Number of worker processes, defaults to the number
+                        of CPUs, 0 scans in this process
+        :type workers: int
+        :param prune: Remove files below root that no longer exist
+        :type prune: bool
+        :return: Number of scanned, skipped and removed files
+        :rtype: tuple of int
+        '''
+        paths = self.find_files(root, pattern)
+        outdated = self._outdated(paths)
+        todo = [p for p, _, _ in outdated]
+        if workers == 0 or len(todo) < 2:
+            for item in outdated:
+                self._store(*item, result=scan_file(item[0]))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                for item, result in zip(outdated,
+                                        pool.map(scan_file, todo)):
+                    self._store(*item, result=result)
+        removed = 0
+        if prune:
+            prefix = os.path.join(os.path.abspath(root), "")
+            existing = set(paths)
+            gone = [r["path"] for r in self.db.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)) if r["path"] not in existing]
+            with self.db:
+                for path in gone:
+                    self.db.execute("DELETE FROM files WHERE path = ?",
+                                    (path,))
+            removed = len(gone)
+        return len(todo), len(paths) - len(todo), removed
+
+    def files(self, errors=False):
+        '''
+        :param errors: Only return files that could not be scanned
+        :type errors: bool
+        :rtype: list of sqlite3.Row
+        '''
+        query = "SELECT * FROM files"
+        if errors:
+            query += " WHERE error IS NOT NULL"
+        return self.db.execute(query + " ORDER BY path").fetchall()
+
+    def _query(self, table, conditions, params, tag):
+        # DISTINCT: an array may be referenced by several matching tags
+        query = ("SELECT DISTINCT e.*, f.path FROM %s e JOIN files f "
+                 "ON e.file_id = f.id" % table)
+        if tag is not None:
+            query += (" JOIN tag_references r ON r.file_id = e.file_id "
+                      "AND r.array_id = e.entity_id JOIN tags t ON "
+                      "t.file_id = r.file_id AND t.entity_id = r.tag_id")
+            conditions.append("t.name = ?")
+            params.append(tag)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY f.path, e.name"
+        return self.db.execute(query, params).fetchall()
+
+    def query_arrays(self, name=None, type=None, unit=None, dimension=None,
+                     ndim=None, min_length=None, min_duration=None,
+                     max_duration=None, tag=None, path=None):
+        '''
+        Find DataArrays. Name, type and path accept SQL LIKE patterns
+        ("%" and "_" as wildcards), all given criteria must match.
+
+        :param name: Name of the array
+        :param type: Type of the array
+        :param unit: Unit of the data
+        :param dimension: Dimension kind the array must have, e.g. "sample"
+        :param ndim: Number of dimensions
+        :param min_length: Minimum number of samples along the time axis
+        :param min_duration: Minimum length of the first sampled dimension,
+                             in seconds for time units, else in the unit of
+                             the dimension (x_unit)
+        :param max_duration: Maximum length of the first sampled dimension
+        :param tag: Name of a Tag or MultiTag referencing the array
+        :param path: Path of the file
+        :return: The matching rows, see Catalog.load
+        :rtype: list of sqlite3.Row
+        '''
+        conditions, params = [], []
+        for column, value, op in (("e.name", name, "LIKE"),
+                                  ("e.type", type, "LIKE"),
+                                  ("f.path", path, "LIKE"),
+                                  ("e.unit", unit, "="),
+                                  ("e.length", min_length, ">="),
+                                  ("e.duration", min_duration, ">="),
+                                  ("e.duration", max_duration, "<=")):
+            if value is not None:
+                conditions.append("%s %s ?" % (column, op))
+                params.append(value)
+        if dimension is not None:
+            conditions.append("(',' || e.dimensions || ',') LIKE ?")
+            params.append("%%,%s,%%" % dimension)
+        if ndim is not None:
+            conditions.append("json_array_length(e.shape) = ?")
+            params.append(ndim)
+        return self._query("arrays", conditions, params, tag)
+
+    def query_data_frames(self, name=None, type=None, column=None,
+                          min_rows=None, path=None):
+        '''
+        Find DataFrames, see query_arrays.
+
+        :param column: Name of a column the DataFrame must have
+        :param min_rows: Minimum number of rows
+        :rtype: list of sqlite3.Row
+        '''
+        conditions, params = [], []
+        for col, value, op in (("e.name", name, "LIKE"),
+                               ("e.type", type, "LIKE"),
+                               ("f.path", path, "LIKE"),
+                               ("e.rows", min_rows, ">=")):
+            if value is not None:
+                conditions.append("%s %s ?" % (col, op))
+                params.append(value)
+        if column is not None:
+            conditions.append("EXISTS (SELECT 1 FROM json_each(e.columns) "
+                              "WHERE value = ?)")
+            params.append(column)
+        return self._query("data_frames", conditions, params, None)
+
+    def query_tags(self, name=None, type=None, kind=None, path=None):
+        '''
+        Find Tags and MultiTags, see query_arrays.
+
+        :param kind: "tag" or "multi_tag"
+        :rtype: list of sqlite3.Row
+        '''
+        conditions, params = [], []
+        for col, value, op in (("e.name", name, "LIKE"),
+                               ("e.type", type, "LIKE"),
+                               ("f.path", path, "LIKE"),
+                               ("e.kind", kind, "=")):
+            if value is not None:
+                conditions.append("%s %s ?" % (col, op))
+                params.append(value)
+        return self._query("tags", conditions, params, None)
+
+    def load(self, row):
+        '''
+        Open the entity of a query result. Files are opened read only and
+        kept open until the catalog is closed.
+
+        :param row: Row returned by one of the query methods
+        :type row: sqlite3.Row
+        :return: The DataArray, DataFrame, Tag or MultiTag
+        '''
+        path = row["path"]
+        if path not in self._files:
+            self._files[path] = nix.File.open(path, nix.FileMode.ReadOnly)
+        block = self._files[path].blocks[row["block_id"]]
+        keys = row.keys()
+        if "rows" in keys:
+            return block.data_frames[row["entity_id"]]
+        if "kind" in keys:
+            if row["kind"] == "multi_tag":
+                return block.multi_tags[row["entity_id"]]
+            return block.tags[row["entity_id"]]
+        return block.data_arrays[row["entity_id"]]
@@ -0,0 +1,21 @@
+import importlib
+
+from .export import (EntityReader, aligned_chunks, close_files,
+                     to_dask_array, to_dask_dataframe)
+
+# xarray is optional, its adapter is imported on first access
+_lazy = {
+    "NixBackendArray": ".xarray_adapter",
+    "to_xarray": ".xarray_adapter",
+}
+
+__all__ = ["EntityReader", "aligned_chunks", "close_files", "to_dask_array",
+           "to_dask_dataframe", "NixBackendArray", "to_xarray"]
+
+
+def __getattr__(name):
+    if name in _lazy:
+        module = importlib.import_module(_lazy[name], __name__)
+        return getattr(module, name)
+    raise AttributeError("module '%s' has no attribute '%s'" %
+                         (__name__, name))
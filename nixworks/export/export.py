@@ -0,0 +1,188 @@
+import os
+import numpy as np
+import pandas as pd
+import nixio as nix
+
+from ..profiling import profiling
+from ..storage import data_view
+
+
+def _import_dask():
+    # dask is optional, only needed for the out-of-core adapters
+    import dask.array
+    import dask.dataframe
+    return dask.array, dask.dataframe
+
+
+# files reopened by readers, per process: h5py handles must not be shared
+# with forked workers
+_files = {}
+
+
+def _open(path):
+    key = (os.getpid(), path)
+    if key not in _files:
+        _files[key] = nix.File.open(path, nix.FileMode.ReadOnly)
+    return _files[key]
+
+
+def close_files():
+    '''
+    Close the files opened by readers in this process.
+    '''
+    for key in list(_files):
+        if key[0] == os.getpid():
+            _files.pop(key).close()
+
+
+class EntityReader(object):
+    '''
+    Picklable stand-in for a DataArray or DataFrame: only the file path
+    and the ids are pickled, the file is reopened read-only the first time
+    the reader is used in a process. Slicing it reads from the file (or
+    its memory map, see nixworks.storage).
+    '''
+
+    def __init__(self, entity):
+        ds = entity._h5group.group["data"]
+        self.path = os.path.abspath(ds.file.filename)
+        self.block_id = entity._parent.id
+        self.id = entity.id
+        self.frame = isinstance(entity, nix.DataFrame)
+        self.shape = tuple(ds.shape)
+        self.ndim = len(self.shape)
+        self.dtype = ds.dtype
+        self.chunks = ds.chunks
+        if not self.frame and (len(entity.polynom_coefficients) or
+                               entity.expansion_origin):
+            # nixio applies the calibration polynomial on read
+            self.dtype = np.dtype(float)
+
+    def __dask_tokenize__(self):
+        # copies of a file keep the entity ids, so the file path and its
+        # state are part of the token, not only the ids
+        st = os.stat(self.path)
+        return (self.path, st.st_mtime, st.st_size, self.block_id, self.id,
+                self.shape, str(self.dtype))
+
+    def entity(self):
+        block = _open(self.path).blocks[self.block_id]
+        if self.frame:
+            return block.data_frames[self.id]
+        return block.data_arrays[self.id]
+
+    def __getitem__(self, key):
+        return np.asarray(profiling.read(data_view(self.entity()), key,
+                                         "EntityReader.read"))
+
+    def __len__(self):
+        return self.shape[0]
+
+
+def aligned_chunks(shape, chunks, itemsize, blocksize=2**26):
+    '''
+    Chunk shape made of whole HDF5 chunks, grown along the first axes until
+    it holds about blocksize bytes, so that no HDF5 chunk is read twice.
+
+    :param shape: Shape of the data
+    :type shape: tuple
+    :param chunks: HDF5 chunk shape, None for contiguous data
+    :type chunks: tuple
+    :param itemsize: Bytes per element
+    :type itemsize: int
+    :param blocksize: Target bytes per chunk
+    :type blocksize: int
+    :rtype: tuple of int
+    '''
+    if not shape:
+        return ()
+    if chunks is None:
+        chunks = (1,) + tuple(shape[1:])
+    result = [max(c, 1) for c in chunks]
+    for axis in range(len(shape)):
+        others = int(np.prod([c for i, c in enumerate(result) if i != axis]))
+        per_block = max(blocksize // max(itemsize * others, 1), 1)
+        multiple = max(per_block // result[axis], 1)
+        result[axis] = min(result[axis] * multiple, max(shape[axis], 1))
+        if int(np.prod(result)) * itemsize >= blocksize:
+            break
+    return tuple(result)
+
+
+def to_dask_array(data_array, chunks=None, blocksize=2**26, lock=False):
+    '''
+    Lazy dask.array of a DataArray. Every task reopens the file, so all
+    schedulers including multiprocessing and distributed can be used.
+
+        x = to_dask_array(da)
+        x.mean().compute(scheduler="processes")
+
+    :param data_array: The DataArray
+    :type data_array: nix.DataArray
+    :param chunks: Dask chunks, defaults to multiples of the HDF5 chunks of
+                   about blocksize bytes, "hdf5" for the HDF5 chunks as is
+    :param blocksize: Target bytes per chunk
+    :type blocksize: int
+    :param lock: Serialize reads within a process, see dask.array.from_array
+    :return: The dask array
+    :rtype: dask.array.Array
+    '''
+    dask_array, _ = _import_dask()
+    from dask.base import tokenize
+    reader = EntityReader(data_array)
+    if chunks is None:
+        chunks = aligned_chunks(reader.shape, reader.chunks,
+                                reader.dtype.itemsize, blocksize)
+    elif chunks == "hdf5":
+        chunks = reader.chunks or reader.shape
+    # views with other chunks or of other files must not share task keys
+    chunks = dask_array.core.normalize_chunks(chunks, reader.shape,
+                                              dtype=reader.dtype)
+    name = "nix-%s" % tokenize(reader, chunks)
+    return dask_array.from_array(reader, chunks=chunks, lock=lock,
+                                 name=name, asarray=False,
+                                 meta=np.empty((0,) * reader.ndim,
+                                               dtype=reader.dtype))
+
+
+def _frame(data, names, start):
+    pd_df = pd.DataFrame(data)
+    pd_df.columns = names
+    pd_df.index = pd.RangeIndex(start, start + len(pd_df))
+    return pd_df
+
+
+def _read_partition(rows, reader, names):
+    return _frame(reader[rows[0]:rows[1]], names, rows[0])
+
+
+def to_dask_dataframe(dataframe, rows=None, blocksize=2**26):
+    '''
+    Lazy dask.dataframe of a NIX DataFrame, one partition per range of
+    rows. The index is the row number, so the divisions are known.
+
+    :param dataframe: The DataFrame
+    :type dataframe: nix.DataFrame
+    :param rows: Rows per partition, defaults to multiples of the HDF5
+                 chunks of about blocksize bytes
+    :type rows: int
+    :param blocksize: Target bytes per partition
+    :type blocksize: int
+    :return: The dask DataFrame
+    :rtype: dask.dataframe.DataFrame
+    '''
+    _, dask_dataframe = _import_dask()
+    reader = EntityReader(dataframe)
+    if rows is None:
+        rows = aligned_chunks(reader.shape, reader.chunks,
+                              reader.dtype.itemsize, blocksize)[0]
+    length = reader.shape[0]
+    starts = list(range(0, length, rows)) or [0]
+    ends = starts[1:] + [length]
+    names = [str(n) for n in dataframe.column_names]
+    meta = _frame(np.empty(0, dtype=reader.dtype), names, 0)
+    divisions = tuple(starts) + (max(length - 1, 0),)
+    return dask_dataframe.from_map(_read_partition, list(zip(starts, ends)),
+                                   args=(reader, names), meta=meta,
+                                   divisions=divisions,
+                                   enforce_metadata=False)
@@ -0,0 +1,149 @@
+import numpy as np
+import nixio as nix
+import xarray as xr
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+from .export import EntityReader, to_dask_array
+
+
+class NixBackendArray(BackendArray):
+    '''
+    Lazy xarray backend array over the data of a DataArray. Only the slices
+    selected through xarray are read, the file is reopened where the array
+    is used (see EntityReader).
+    '''
+
+    def __init__(self, data_array):
+        self.reader = EntityReader(data_array)
+        self.shape = self.reader.shape
+        self.dtype = self.reader.dtype
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._read)
+
+    def _read(self, key):
+        # integers are read as slices and dropped afterwards, nixio keeps
+        # a length one axis for them
+        key = tuple(key) + (slice(None),) * (len(self.shape) - len(key))
+        drop = tuple(0 if isinstance(k, (int, np.integer)) else slice(None)
+                     for k in key)
+        key = tuple(slice(k, k + 1 if k != -1 else None)
+                    if isinstance(k, (int, np.integer)) else k for k in key)
+        return self.reader[key][drop]
+
+
+if hasattr(xr.indexes, "RangeIndex"):
+    class SampledIndex(xr.indexes.RangeIndex):
+        '''
+        Closed form index of a SampledDimension. Unlike RangeIndex, label
+        based selection needs no method: scalars select the nearest sample,
+        slices all samples within [start, stop] like pandas indexes do.
+        '''
+
+        def sel(self, labels, method=None, tolerance=None):
+            label = labels[self.dim]
+            if method is None and isinstance(label, slice) and \
+                    label.step is None:
+                t = self.transform
+                first = 0 if label.start is None else \
+                    int(np.ceil((label.start - t.start) / t.step - 1e-9))
+                last = t.size if label.stop is None else \
+                    int(np.floor((label.stop - t.start) / t.step + 1e-9)) + 1
+                return indexing.IndexSelResult({self.dim: slice(
+                    min(max(first, 0), t.size), min(max(last, 0), t.size))})
+            if method is None:
+                method = "nearest"
+            return super().sel(labels, method=method, tolerance=tolerance)
+
+        def isel(self, indexers):
+            result = super().isel(indexers)
+            if type(result) is xr.indexes.RangeIndex:
+                result = type(self)(result.transform)
+            return result
+else:
+    SampledIndex = None
+
+
+def _attrs(entity):
+    attrs = {}
+    for key, value in (("units", getattr(entity, "unit", None)),
+                       ("long_name", getattr(entity, "label", None))):
+        if value:
+            attrs[key] = value
+    return attrs
+
+
+def _dimension_names(data_array):
+    names = []
+    for i, dim in enumerate(data_array.dimensions):
+        name = getattr(dim, "label", None)
+        if dim.dimension_type == nix.DimensionType.Range and dim.is_alias:
+            name = data_array.label
+        if not name or name in names:
+            name = "dim_%i" % i
+        names.append(name)
+    return names
+
+
+def _coordinate(data_array, dim, name, length):
+    '''
+    Coordinates object of one dimension or None. Sampled dimensions get a
+    closed form index, their positions are never materialized.
+    '''
+    if dim.dimension_type == nix.DimensionType.Sample:
+        offset = dim.offset if dim.offset else 0.0
+        stop = offset + (length - 1) * dim.sampling_interval
+        if SampledIndex is not None:
+            index = SampledIndex.linspace(
+                offset, stop, num=length, dim=name, coord_name=name)
+            return xr.Coordinates.from_xindex(index)
+        values = offset + np.arange(length) * dim.sampling_interval
+        return xr.Coordinates({name: values})
+    if dim.dimension_type == nix.DimensionType.Range:
+        ticks = np.asarray(data_array[:] if dim.is_alias else dim.ticks)
+        if len(ticks) == length:
+            return xr.Coordinates({name: ticks})
+        return None
+    labels = list(dim.labels) if dim.labels else []
+    if len(labels) == length:
+        return xr.Coordinates({name: labels})
+    return None
+
+
+def to_xarray(data_array, dask=False):
+    '''
+    xarray.DataArray view of a DataArray. The data is read lazily: selecting
+    by position, time or label only reads the selected slice. Sampled
+    dimensions become closed form coordinates, Range dimensions their
+    ticks and Set dimensions their labels; units and labels are kept in
+    the attrs.
+
+        x = to_xarray(da)
+        x.sel(time=slice(10., 20.)).mean()
+
+    :param data_array: The DataArray
+    :type data_array: nix.DataArray
+    :param dask: Back the data with a dask array (see to_dask_array)
+                 instead of the lazy indexing adapter
+    :type dask: bool
+    :return: The labelled array
+    :rtype: xarray.DataArray
+    '''
+    names = _dimension_names(data_array)
+    if dask:
+        data = to_dask_array(data_array)
+    else:
+        data = indexing.LazilyIndexedArray(NixBackendArray(data_array))
+    attrs = _attrs(data_array)
+    attrs.update({"nix_id": data_array.id, "nix_type": data_array.type})
+    result = xr.DataArray(xr.Variable(names, data, attrs=attrs),
+                          name=data_array.name)
+    for name, dim, length in zip(names, data_array.dimensions,
+                                 data_array.shape):
+        coord = _coordinate(data_array, dim, name, length)
+        if coord is not None:
+            result = result.assign_coords(coord)
+            result[name].attrs.update(_attrs(dim))
+    return result
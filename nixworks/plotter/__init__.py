@@ -1,5 +1,43 @@
-from . interactor import Interactor
-from .plotter import EventPlotter, CategoryPlotter, ImagePlotter, LinePlotter
+import importlib
 
-__all__ = ["Interactor", "EventPlotter", "CategoryPlotter", "ImagePlotter",
-           "LinePlotter"]
+# Classes are imported on first access, see nixworks/__init__.py
+_classes = {
+    "Interactor": ".interactor",
+    "LinkedInteractor": ".interactor",
+    "TagOverlay": ".interactor",
+    "WindowCache": ".cache",
+    "LiveArray": ".live",
+    "LivePlotter": ".live",
+    "EventPlotter": ".plotter",
+    "CategoryPlotter": ".plotter",
+    "ImagePlotter": ".plotter",
+    "LinePlotter": ".plotter",
+    "SpectralPlotter": ".spectral",
+}
+
+_submodules = ("cache", "interactor", "live", "plotter", "spectral")
+
+__all__ = ["Interactor", "LinkedInteractor", "TagOverlay", "WindowCache",
+           "LiveArray", "LivePlotter", "EventPlotter", "CategoryPlotter",
+           "ImagePlotter", "LinePlotter", "SpectralPlotter"]
+
+
+def __getattr__(name):
+    if name in _classes:
+        module = importlib.import_module(_classes[name], __name__)
+        return getattr(module, name)
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    # helpers like suggested_plotter, nixworks.plotter may be either
+    # this package or the plotter module depending on import order.
+    # Probes of private names must not import matplotlib.
+    if not name.startswith("_"):
+        module = importlib.import_module(".plotter", __name__)
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError("module '%s' has no attribute '%s'" %
+                         (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,219 @@
+from collections import OrderedDict
+import os
+import numpy as np
+import nixio as nix
+
+from ..profiling import profiling
+from ..storage import data_view
+
+
+def decimate(data, factor):
+    '''
+    Min/max decimation along the first axis. Each bin of ``factor`` samples
+    is replaced by its minimum and maximum, so peaks stay visible.
+
+    :param data: 1D or 2D (samples x channels) data
+    :type data: numpy.ndarray
+    :param factor: Number of samples per bin
+    :type factor: int
+    :return: Decimated data with 2 values per bin
+    :rtype: numpy.ndarray
+    '''
+    if factor <= 1 or len(data) < 2 * factor:
+        return data
+    return _minmax(data, factor)
+
+
+def _minmax(data, factor):
+    # min and max of every bin of factor samples, the last bin may be
+    # shorter
+    full = len(data) // factor
+    bins = -(-len(data) // factor)
+    binned = data[:full * factor].reshape((full, factor) + data.shape[1:])
+    out = np.empty((2 * bins,) + data.shape[1:], dtype=data.dtype)
+    out[0:2 * full:2] = binned.min(axis=1)
+    out[1:2 * full:2] = binned.max(axis=1)
+    if bins > full:
+        out[-2] = data[full * factor:].min(axis=0)
+        out[-1] = data[full * factor:].max(axis=0)
+    return out
+
+
+def _source(array):
+    # copies of a file keep the entity ids, the path tells them apart
+    return os.path.abspath(array._h5group.group.file.filename), array.id
+
+
+def index_range(dimension, start, end, length):
+    '''
+    Convert a window given in dimension units into sample indices.
+
+    :param dimension: Sampled or Range dimension of the array
+    :param start: Start of the window in dimension units
+    :type start: float
+    :param end: End of the window in dimension units
+    :type end: float
+    :param length: Number of samples along this dimension
+    :type length: int
+    :return: First and last (exclusive) index of the window
+    :rtype: tuple of int
+    '''
+    if dimension.dimension_type == nix.DimensionType.Sample:
+        offset = dimension.offset if dimension.offset else 0.0
+        interval = dimension.sampling_interval
+        first = int(np.floor((start - offset) / interval))
+        last = int(np.ceil((end - offset) / interval)) + 1
+    elif dimension.dimension_type == nix.DimensionType.Range:
+        ticks = np.asarray(dimension.ticks)
+        first = int(np.searchsorted(ticks, start, side="left")) - 1
+        last = int(np.searchsorted(ticks, end, side="right")) + 1
+    else:
+        first, last = 0, length
+    return max(first, 0), min(max(last, 0), length)
+
+
+def point_budget(axis, points_per_pixel=2, minimum=100):
+    '''
+    Number of points per series worth drawing on an axis: min/max
+    decimation to one bin per pixel column shows everything the rendered
+    line could show. The width is taken in display pixels, so it follows
+    the figure size and DPI.
+
+    :param axis: The axis the data is drawn on
+    :type axis: matplotlib.axes.Axes
+    :param points_per_pixel: Points per pixel column, 2 for one min/max bin
+    :type points_per_pixel: float
+    :param minimum: Lower bound, e.g. for axes that are not laid out yet
+    :type minimum: int
+    :rtype: int
+    '''
+    width = axis.get_window_extent().width
+    return max(int(np.ceil(width * points_per_pixel)), minimum)
+
+
+class WindowCache(object):
+    '''
+    Shared cache of (decimated) data windows of DataArrays.
+
+    Windows are keyed by file, array id, range and decimation factor.
+    Ranges are aligned to the decimation factor and the factor is rounded
+    up to a power of two, so that slightly different views of the same
+    region hit the same entry. Least recently used windows are dropped once
+    more than ``maxbytes`` are held. Decimated windows are read in blocks
+    of whole bins of at most ``blocksize`` bytes, so reading an overview of
+    a long array never holds more than one block of raw samples in memory.
+    '''
+
+    def __init__(self, maxbytes=256 * 2**20, blocksize=2**22):
+        self.maxbytes = maxbytes
+        self.blocksize = blocksize
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._windows = OrderedDict()
+        self._ticks = {}
+
+    @staticmethod
+    def decimation_factor(count, maxpoints):
+        if maxpoints is None or count <= maxpoints:
+            return 1
+        # min/max decimation yields two points per bin
+        factor = int(np.ceil(2. * count / maxpoints))
+        return int(2 ** np.ceil(np.log2(factor)))
+
+    @profiling.instrument
+    def fetch(self, array, start, end, xdim=0, maxpoints=None):
+        '''
+        Return x values and data of a window of the array. The array is only
+        read if the window is not cached yet.
+
+        :param array: The DataArray, 1D or 2D
+        :type array: nix.DataArray
+        :param start: First sample index along xdim
+        :type start: int
+        :param end: Last sample index (exclusive) along xdim
+        :type end: int
+        :param xdim: Index of the x dimension
+        :type xdim: int
+        :param maxpoints: Maximum number of points returned per series
+        :type maxpoints: int
+        :return: x values and data, the data has the samples along axis 0
+        :rtype: tuple of numpy.ndarray
+        '''
+        length = array.shape[xdim]
+        start = max(int(start), 0)
+        end = min(int(end), length)
+        factor = self.decimation_factor(end - start, maxpoints)
+        start -= start % factor
+        end = min(end + (-end) % factor, length)
+        key = _source(array) + (start, end, xdim, factor)
+        if key in self._windows:
+            self.hits += 1
+            self._windows.move_to_end(key)
+            return self._windows[key]
+        self.misses += 1
+        window = self._read(array, start, end, xdim, factor)
+        self._windows[key] = window
+        self.nbytes += window[0].nbytes + window[1].nbytes
+        while self.nbytes > self.maxbytes and len(self._windows) > 1:
+            _, (x, y) = self._windows.popitem(last=False)
+            self.nbytes -= x.nbytes + y.nbytes
+        return window
+
+    def fetch_many(self, requests):
+        '''
+        Fetch several windows at once, e.g. all arrays of a linked view.
+        Every distinct window is read only once.
+
+        :param requests: Tuples of (array, start, end, xdim, maxpoints)
+        :type requests: list
+        :return: (x, data) tuples in the order of the requests
+        :rtype: list
+        '''
+        return [self.fetch(*r) for r in requests]
+
+    @staticmethod
+    def _read_block(view, ndim, start, end, xdim):
+        if ndim == 1:
+            key = np.s_[start:end]
+        elif xdim == 0:
+            key = np.s_[start:end, :]
+        else:
+            key = np.s_[:, start:end]
+        data = np.asarray(profiling.read(view, key, "WindowCache.read"))
+        return data.T if ndim > 1 and xdim == 1 else data
+
+    def _read(self, array, start, end, xdim, factor):
+        view = data_view(array)
+        ndim = len(array.shape)
+        if factor <= 1 or end - start < 2 * factor:
+            return (self._axis(array, xdim, start, end),
+                    self._read_block(view, ndim, start, end, xdim))
+        # blocks of whole bins, only the last bin of the range may be short
+        width = int(np.prod(array.shape)) // max(array.shape[xdim], 1)
+        samples = self.blocksize // max(array.dtype.itemsize * width, 1)
+        step = max(samples // factor, 1) * factor
+        parts = [_minmax(self._read_block(view, ndim, first,
+                                          min(first + step, end), xdim),
+                         factor)
+                 for first in range(start, end, step)]
+        x = np.repeat(self._axis(array, xdim, start, end, factor), 2)
+        return x, np.concatenate(parts)
+
+    def _axis(self, array, xdim, start, end, step=1):
+        dim = array.dimensions[xdim]
+        if dim.dimension_type == nix.DimensionType.Sample:
+            offset = dim.offset if dim.offset else 0.0
+            return offset + np.arange(start, end, step) * \
+                dim.sampling_interval
+        if dim.dimension_type == nix.DimensionType.Range:
+            key = _source(array)
+            if key not in self._ticks:
+                self._ticks[key] = np.asarray(dim.ticks)
+            return self._ticks[key][start:end:step]
+        return np.arange(start, end, step, dtype=float)
+
+    def clear(self):
+        self._windows.clear()
+        self._ticks.clear()
+        self.nbytes = 0
@@ -1,13 +1,21 @@
-from IPython import display
-from ipywidgets import interact
-import ipywidgets as widgets
 import matplotlib.patches as patches
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
 import numpy as np
 
 import nixio as nix
 
 from . import plotter as nixplt
+from ..profiling import profiling
+from .cache import WindowCache, index_range, point_budget
+
+
+def _import_widgets():
+    # IPython and ipywidgets are only needed once widgets are shown,
+    # importing them lazily keeps the module usable without them
+    from IPython import display
+    import ipywidgets as widgets
+    return display, widgets
 
 
 class Interactor(object):
@@ -16,7 +24,7 @@ class Interactor(object):
         # Initialize a figure/ playground to plot interactive objects on
         fig = plt.figure(figsize=(4, 3))
         ax = fig.add_subplot(111)
-        self.fig = fig
+        self.fig = profiling.watch(fig)
         self.ax = ax
         self.plotter_list = []
         # Tag for later references to all plotted objects
@@ -27,6 +35,8 @@ class Interactor(object):
         self.arrays = []
         self.check_box = []
         self.mpl_artists = []
+        # Batched overlay of all Tags/MultiTags, see overlay_tags
+        self.tag_overlay = None
 
     @staticmethod
     def _check_da_combination(data_arrays):
@@ -73,13 +83,15 @@ class Interactor(object):
                     return False
         return True
 
+    @profiling.instrument
     def _plot_da(self, data_arrays, maxpoints):
         '''
         Function called in interact_da to plot the graph in its initial state
 
         :param data_arrays: DataArrays to be plotted
         :type data_arrays: List of DataArrays
-        :param maxpoints: Maximum points in each array to be plotted out
+        :param maxpoints: Samples per window of the LinePlotters, None to
+                          adapt to the axis size (see LinePlotter.plot)
         :type maxpoints: int
         :return: None
         '''
@@ -107,8 +119,9 @@ class Interactor(object):
         plt.show()
         self.plotter_list = plotter_list
 
+    @profiling.instrument
     def interact_da(self, data_arrays, enable_tag=True, enable_xzoom=True,
-                    enable_yzoom=False, maxpoints=None):
+                    enable_yzoom=False, maxpoints=None, tag_overlay=False):
         '''
         The main function to called in Interactor class
         For creating some interactive DataArrays on plot.
@@ -121,18 +134,20 @@ class Interactor(object):
         :type enable_xzoom: bool
         :param enable_yzoom: En/Dis-able the zooming on y-axis slider
         :type enable_yzoom: bool
-        :param maxpoints: Maximum points in each array to be plotted out
+        :param maxpoints: Samples per window of the LinePlotters. By default
+                          the points drawn per array follow the pixel width
+                          of the axis and the zoom (see LinePlotter.plot)
         :type maxpoints: int
+        :param tag_overlay: Draw all Tags and MultiTags at once instead of
+                            selecting a single Tag from a dropdown
+        :type tag_overlay: bool
         :return: None
         '''
+        display, widgets = _import_widgets()
 
         # Check if the DataArrays can be plotted together
         if not self._check_da_combination(data_arrays):
             raise ValueError('Cannot plot these DataArrays in the same graph.')
-        # Set maxpoints to the no. points of the longest array to be plotted
-        # if not being customized
-        if maxpoints is None:
-            maxpoints = len(max(data_arrays, key=len))
         self.arrays = data_arrays
         self.ax.clear()
         self._plot_da(data_arrays, maxpoints=maxpoints)
@@ -145,6 +160,7 @@ class Interactor(object):
             display.display(box)
 
         # Interactive Legends
+        @profiling.instrument(name="Interactor.legend_visibility")
         def legend_visibility(cbox):
             if not cbox['new']:
                 self.ax.legend().set_visible(False)
@@ -159,9 +175,22 @@ class Interactor(object):
             legend_box.observe(legend_visibility, names='value')
             display.display(legend_box)
         # Interactive Tagged Area
-        if enable_tag:
+        if enable_tag and tag_overlay:
+            overlay = self.overlay_tags(data_arrays)
+            options = [(t.name, t) for t in overlay.entities]
+            tag_select = widgets.SelectMultiple(options=options,
+                                                value=tuple(overlay.entities),
+                                                description='Tags')
+
+            @profiling.instrument(name="Interactor.select_tags")
+            def select_tags(change):
+                overlay.set_selection(change['new'])
+                self.fig.canvas.draw_idle()
+            tag_select.observe(select_tags, names='value')
+            display.display(tag_select)
+        elif enable_tag:
             tag_drop = self._reverse_search_tag(data_arrays)
-            interact(self._mark_tag, tag=tag_drop)
+            widgets.interact(self._mark_tag, tag=tag_drop)
         # Interactive Sliders for zooming on x-axis
         # Sliders change zooming area by percentage not absolute value
         if enable_xzoom:
@@ -173,6 +202,7 @@ class Interactor(object):
             x_end_slider = widgets.FloatSlider(100,
                                                description='X axis end')
 
+            @profiling.instrument(name="Interactor.change_x_start")
             def change_x_start(start):
                 start_point = start['new']*x_size/100 + xstart_offset
                 end_point = x_end_slider.value*x_size/100 + xstart_offset
@@ -180,6 +210,7 @@ class Interactor(object):
                 self.fig.canvas.draw_idle()
             x_start_slider.observe(change_x_start, names='value')
 
+            @profiling.instrument(name="Interactor.change_x_end")
             def change_x_end(end):
                 start_point = x_start_slider.value*x_size/1000 + xstart_offset
                 end_point = end['new']*x_size/100 + xstart_offset
@@ -198,6 +229,7 @@ class Interactor(object):
             y_end_slider = widgets.FloatSlider(100,
                                                description='Y axis top')
 
+            @profiling.instrument(name="Interactor.change_y_start")
             def change_y_start(start):
                 start_point = start['new'] * y_size / 100 + ystart_offset
                 end_point = y_end_slider.value * y_size / 100 + ystart_offset
@@ -206,6 +238,7 @@ class Interactor(object):
 
             y_start_slider.observe(change_y_start, names='value')
 
+            @profiling.instrument(name="Interactor.change_y_end")
             def change_y_end(end):
                 start_point = (y_start_slider.value * y_size / 1000 +
                                ystart_offset)
@@ -216,6 +249,7 @@ class Interactor(object):
             y_end_slider.observe(change_y_end, names='value')
             display.display(y_start_slider, y_end_slider)
 
+    @profiling.instrument
     def _da_visibility(self, box):
         '''
         Function for setting visibility of the DataArrays
@@ -243,6 +277,7 @@ class Interactor(object):
                 self.ax.legend(handle1, legend1, loc=0)
             self.fig.canvas.draw_idle()
 
+    @profiling.instrument
     def _mark_tag(self, tag):
         '''
         Managing Tagged areas during interaction
@@ -292,6 +327,50 @@ class Interactor(object):
                 tagged = plt.plot(x1, y1, 'ro')
                 self.mpl_tag = tagged
 
+    @profiling.instrument
+    def overlay_tags(self, data_arrays=None):
+        '''
+        Draw every Tag and MultiTag referencing the DataArrays in one go.
+        All tags of the same type share a single collection, visibility
+        of a tag is changed by masking its entries (see TagOverlay).
+
+        :param data_arrays: DataArrays whose tags are shown, defaults to
+                            the arrays currently plotted
+        :type data_arrays: List of DataArrays
+        :return: The overlay holding the drawn collections
+        :rtype: TagOverlay
+        '''
+        if data_arrays is None:
+            data_arrays = self.arrays
+        if self.tag_overlay is not None:
+            self.tag_overlay.remove()
+        image = any(isinstance(pl, nixplt.ImagePlotter)
+                    for pl in self.plotter_list)
+        overlay = TagOverlay(self.ax, image=image)
+        overlay.add(self._reverse_search_tag(data_arrays)[1:])
+        overlay.add(self._reverse_search_multi_tag(data_arrays))
+        overlay.draw()
+        self.tag_overlay = overlay
+        self.fig.canvas.draw_idle()
+        return overlay
+
+    @staticmethod
+    def _reverse_search_multi_tag(data_arrays):
+        '''
+        Search for multi tags which referenced the data_arrays in the
+        parameter. Only for data_arrays within the same block
+
+        :param data_arrays: List of DataArrays
+        :return: List of multi tags which has the references
+        '''
+        mtag_list = []
+        blk = data_arrays[0]._parent
+        for ref_da in data_arrays:
+            for mtag in blk.multi_tags:
+                if ref_da in mtag.references and mtag not in mtag_list:
+                    mtag_list.append(mtag)
+        return mtag_list
+
     @staticmethod
     def _reverse_search_tag(data_arrays):
         '''
@@ -365,3 +444,344 @@ class Interactor(object):
             print("Type:{} No of Arrays:{}".format(k, len(v)))
             for d in v:
                 print("        {}".format(d))
+
+
+class TagOverlay(object):
+    '''
+    Batched drawing of many Tags and MultiTags on a single axis.
+
+    All areas of one tag type (Tag or MultiTag) end up in one
+    PolyCollection and all single points in one Line2D, independent of the
+    number of tags. Hiding or showing a tag only updates a boolean mask,
+    the artists themselves are never recreated.
+    '''
+
+    def __init__(self, axis, image=False):
+        self.axis = axis
+        self.image = image
+        self.entities = []
+        self._index = {}
+        # per tag type and shape: x, width, y and height of each entry,
+        # the entity index it belongs to and its visibility mask
+        self._entries = {}
+        # entries collected since the last call of _merge_pending
+        self._pending = {}
+        self._artists = {}
+
+    def add(self, tags):
+        '''
+        Collect positions and extents of Tags or MultiTags.
+
+        :param tags: Tags or MultiTags to add to the overlay
+        :type tags: List of nix.Tag or nix.MultiTag
+        '''
+        for tag in tags:
+            if isinstance(tag, nix.MultiTag):
+                positions = np.atleast_1d(tag.positions[:])
+                extents = tag.extents
+                extents = None if extents is None \
+                    else np.atleast_1d(extents[:])
+                kind = "multi_tag"
+            else:
+                positions = np.atleast_2d(tag.position)
+                extents = np.atleast_2d(tag.extent) if tag.extent else None
+                kind = "tag"
+            if positions.ndim == 1:
+                positions = positions[:, np.newaxis]
+            if extents is not None and extents.ndim == 1:
+                extents = extents[:, np.newaxis]
+            idx = len(self.entities)
+            self.entities.append(tag)
+            self._index[tag.id] = idx
+            self._collect(kind, idx, positions, extents)
+
+    def _collect(self, kind, idx, positions, extents):
+        count = positions.shape[0]
+        if extents is None:
+            entry = ("point", positions[:, 0], np.zeros(count),
+                     np.zeros(count), np.zeros(count))
+        elif self.image and positions.shape[1] > 1:
+            # same orientation as Interactor._mark_tag
+            entry = ("area", positions[:, 1], extents[:, 0],
+                     positions[:, 0], extents[:, 1])
+        else:
+            entry = ("area", positions[:, 0], extents[:, 0],
+                     np.zeros(count), np.ones(count))
+        shape = entry[0]
+        self._pending.setdefault((kind, shape), []).append(
+            entry[1:] + (np.full(count, idx), np.ones(count, dtype=bool)))
+
+    def _merge_pending(self):
+        # concatenate once for all tags added, not once per tag
+        for key, parts in self._pending.items():
+            if key in self._entries:
+                parts = [self._entries[key]] + parts
+            self._entries[key] = [np.concatenate(col) for col in zip(*parts)]
+        self._pending = {}
+
+    def draw(self):
+        '''
+        Create one artist per tag type and shape. Subsequent visibility
+        changes reuse these artists.
+        '''
+        colors = {"tag": "#2ca02c", "multi_tag": "#ff7f0e"}
+        self._merge_pending()
+        for (kind, shape), entry in self._entries.items():
+            if (kind, shape) in self._artists:
+                continue
+            if shape == "point":
+                artist, = self.axis.plot(entry[0], entry[2], "o",
+                                         color=colors[kind], zorder=2)
+            elif self.image:
+                artist = PolyCollection(self._verts(entry), linewidth=1,
+                                        edgecolor="r", facecolor="none")
+                self.axis.add_collection(artist)
+            else:
+                # x in data, y in axes coordinates, just as axvspan
+                artist = PolyCollection(self._verts(entry),
+                                        facecolor=colors[kind], alpha=0.5,
+                                        zorder=1, transform=self.axis.
+                                        get_xaxis_transform())
+                self.axis.add_collection(artist, autolim=False)
+            self._artists[(kind, shape)] = artist
+        self._update()
+
+    @staticmethod
+    def _verts(entry):
+        x, width, y, height = entry[:4]
+        x1 = x + width
+        y1 = y + height
+        return np.stack((np.column_stack((x, y)), np.column_stack((x, y1)),
+                         np.column_stack((x1, y1)), np.column_stack((x1, y))),
+                        axis=1)
+
+    def _update(self):
+        for key, artist in self._artists.items():
+            entry = self._entries[key]
+            mask = entry[5]
+            if key[1] == "point":
+                artist.set_data(np.ma.masked_where(~mask, entry[0]),
+                                np.ma.masked_where(~mask, entry[2]))
+            else:
+                artist.set_verts(self._verts(entry)[mask])
+
+    def set_visible(self, tag, visible=True):
+        '''
+        Show or hide all entries of a single Tag or MultiTag.
+
+        :param tag: The Tag or MultiTag
+        :param visible: Whether the tag should be shown
+        :type visible: bool
+        '''
+        idx = self._index[tag.id]
+        self._merge_pending()
+        for entry in self._entries.values():
+            entry[5][entry[4] == idx] = visible
+        self._update()
+
+    @profiling.instrument
+    def set_selection(self, tags):
+        '''
+        Show exactly the given tags and hide all others.
+
+        :param tags: The Tags or MultiTags to be shown
+        :type tags: List of nix.Tag or nix.MultiTag
+        '''
+        selected = np.array([self._index[t.id] for t in tags], dtype=int)
+        self._merge_pending()
+        for entry in self._entries.values():
+            entry[5][:] = np.isin(entry[4], selected)
+        self._update()
+
+    def remove(self):
+        for artist in self._artists.values():
+            artist.remove()
+        self._artists = {}
+
+
+class LinkedInteractor(object):
+    '''
+    Small multiples of DataArrays which cannot share a single graph.
+    Arrays are grouped with Interactor._check_da_combination, each group
+    gets its own panel. Panels showing lines share their x-axis and all
+    panels read their data through one WindowCache, so changing the window
+    reads every DataArray at most once and redraws the figure once.
+    '''
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else WindowCache()
+        self.fig = None
+        self.axes = []
+        self.groups = []
+        self.plotter_list = []
+        self.maxpoints = None
+        # (DataArray, xdim, lines) for every array drawn from the cache
+        self._series = []
+        self._linked_axis = None
+        self._updating = False
+
+    @staticmethod
+    def group_arrays(data_arrays):
+        '''
+        Partition DataArrays into groups that can be plotted together.
+        Images always get a group of their own.
+
+        :param data_arrays: DataArrays to be grouped
+        :type data_arrays: List of DataArrays
+        :return: The groups in order of their first member
+        :rtype: List of lists of DataArrays
+        '''
+        groups = []
+        for da in data_arrays:
+            if isinstance(nixplt.suggested_plotter(da), nixplt.ImagePlotter):
+                groups.append([da])
+                continue
+            for group in groups:
+                if isinstance(nixplt.suggested_plotter(group[0]),
+                              nixplt.ImagePlotter):
+                    continue
+                if Interactor._check_da_combination(group + [da]):
+                    group.append(da)
+                    break
+            else:
+                groups.append([da])
+        return groups
+
+    @profiling.instrument
+    def plot(self, data_arrays, maxpoints=None):
+        '''
+        Plot the DataArrays, one panel per compatible group.
+
+        :param data_arrays: DataArrays to be plotted
+        :type data_arrays: List of DataArrays
+        :param maxpoints: Maximum points per series and window, defaults to
+                          the point budget of the panel width (see
+                          cache.point_budget), updated on resize
+        :type maxpoints: int
+        :return: The axes of all panels
+        :rtype: List of matplotlib.axes.Axes
+        '''
+        self.maxpoints = maxpoints
+        self.groups = self.group_arrays(data_arrays)
+        self.fig, axes = plt.subplots(len(self.groups), 1, squeeze=False,
+                                      figsize=(6, 2.5 * len(self.groups)))
+        profiling.watch(self.fig)
+        self.axes = list(axes[:, 0])
+        self._series = []
+        self.plotter_list = []
+        self._linked_axis = None
+        xmin, xmax = np.inf, -np.inf
+        for ax, group in zip(self.axes, self.groups):
+            for da in group:
+                plotter = nixplt.suggested_plotter(da)
+                self.plotter_list.append(plotter)
+                if isinstance(plotter, nixplt.LinePlotter):
+                    lines = self._add_series(ax, da, plotter.xdim)
+                    x = lines[0].get_xdata()
+                    xmin, xmax = min(xmin, x[0]), max(xmax, x[-1])
+                elif plotter is not None:
+                    plotter.plot(axis=ax)
+            if any(s[0] in group for s in self._series):
+                if self._linked_axis is None:
+                    self._linked_axis = ax
+                else:
+                    ax.sharex(self._linked_axis)
+                xdim = nixplt.guess_best_xdim(group[0])
+                ax.set_xlabel(nixplt.create_label(group[0].dimensions[xdim]))
+                ax.set_ylabel(nixplt.create_label(group[0]))
+                ax.legend(loc=1)
+        if self._linked_axis is not None:
+            self._linked_axis.callbacks.connect("xlim_changed",
+                                                self._on_xlim)
+            self.fig.canvas.mpl_connect("resize_event", self._on_resize)
+            self.set_window(xmin, xmax)
+        return self.axes
+
+    def _budget(self, ax):
+        if self.maxpoints is not None:
+            return self.maxpoints
+        return point_budget(ax)
+
+    def _add_series(self, ax, da, xdim):
+        length = da.shape[xdim]
+        x, y = self.cache.fetch(da, 0, length, xdim, self._budget(ax))
+        if y.ndim == 1:
+            labels = [da.name]
+            y = y[:, np.newaxis]
+        else:
+            labels = list(da.dimensions[1 - xdim].labels)
+            if len(labels) == 0:
+                labels = list(map(str, range(y.shape[1])))
+        lines = []
+        for i, l in enumerate(labels):
+            line, = ax.plot(x, y[:, i], label=l)
+            lines.append(line)
+        self._series.append((da, xdim, lines))
+        return lines
+
+    @profiling.instrument
+    def set_window(self, start, end):
+        '''
+        Show the given x range in all linked panels. Missing windows are
+        fetched from the cache in one batch, then the figure is redrawn once.
+
+        :param start: Start of the window in x-axis units
+        :type start: float
+        :param end: End of the window in x-axis units
+        :type end: float
+        '''
+        requests = []
+        for da, xdim, lines in self._series:
+            length = da.shape[xdim]
+            first, last = index_range(da.dimensions[xdim], start, end, length)
+            requests.append((da, first, last, xdim,
+                             self._budget(lines[0].axes)))
+        windows = self.cache.fetch_many(requests)
+        for (da, xdim, lines), (x, y) in zip(self._series, windows):
+            if y.ndim == 1:
+                y = y[:, np.newaxis]
+            for i, line in enumerate(lines):
+                line.set_data(x, y[:, i])
+        self._updating = True
+        try:
+            self._linked_axis.set_xlim(start, end)
+        finally:
+            self._updating = False
+        self.fig.canvas.draw_idle()
+
+    def _on_xlim(self, ax):
+        if not self._updating:
+            self.set_window(*ax.get_xlim())
+
+    def _on_resize(self, event):
+        # unchanged budgets hit the cache, nothing is read again
+        self.set_window(*self._linked_axis.get_xlim())
+
+    @profiling.instrument
+    def interact_da(self, data_arrays, maxpoints=None):
+        '''
+        Plot the DataArrays in linked panels and display a range slider
+        controlling the x window of all panels.
+
+        :param data_arrays: DataArrays to be interacted with
+        :type data_arrays: List of DataArrays
+        :param maxpoints: Maximum points per series and window, defaults to
+                          the point budget of the panel width
+        :type maxpoints: int
+        :return: None
+        '''
+        display, widgets = _import_widgets()
+        self.plot(data_arrays, maxpoints=maxpoints)
+        plt.show()
+        if self._linked_axis is None:
+            return
+        xmin, xmax = self._linked_axis.get_xlim()
+        window_slider = widgets.FloatRangeSlider(value=(xmin, xmax),
+                                                 min=xmin, max=xmax,
+                                                 step=(xmax - xmin) / 1000,
+                                                 description='X window')
+
+        def change_window(change):
+            self.set_window(*change['new'])
+        window_slider.observe(change_window, names='value')
+        display.display(window_slider)
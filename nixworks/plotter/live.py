@@ -0,0 +1,342 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import nixio as nix
+
+from .cache import WindowCache
+from .plotter import create_label, guess_best_xdim
+from ..profiling import profiling
+from ..stats.stats import Accumulator
+
+
+class LiveArray(object):
+    '''
+    Follows a DataArray that is appended to along its x dimension, e.g. in
+    a file opened with nixworks.storage.open_swmr. Every poll refreshes the
+    extent of the dataset only, read_new reads nothing but the samples
+    appended since the last read.
+    '''
+
+    def __init__(self, data_array, xdim=-1, start=None):
+        self.array = data_array
+        self.xdim = guess_best_xdim(data_array) if xdim == -1 else xdim
+        if len(data_array.shape) > 2:
+            raise ValueError("LiveArray: only 1D and 2D arrays can be "
+                             "followed")
+        self.dataset = data_array._h5group.group["data"]
+        self.length = self.dataset.shape[self.xdim]
+        # index of the next sample to be read
+        self.position = self.length if start is None else max(start, 0)
+        self._acc = None
+
+    def poll(self):
+        '''
+        Refresh the extent of the dataset.
+
+        :return: Number of samples not read yet
+        :rtype: int
+        '''
+        self.dataset.refresh()
+        self.length = self.dataset.shape[self.xdim]
+        return self.length - self.position
+
+    def read_new(self, chunksize=2**20):
+        '''
+        Read the samples appended since the last read, in chunks.
+
+        :param chunksize: Maximum number of elements per chunk
+        :type chunksize: int
+        :return: Generator of the index of the first sample of the chunk
+                 and the chunk, samples along axis 0
+        '''
+        rowsize = 1
+        if len(self.array.shape) == 2:
+            rowsize = self.array.shape[1 - self.xdim]
+        step = max(chunksize // max(rowsize, 1), 1)
+        while self.position < self.length:
+            start = self.position
+            end = min(start + step, self.length)
+            if len(self.array.shape) == 1:
+                key = np.s_[start:end]
+            elif self.xdim == 0:
+                key = np.s_[start:end, :]
+            else:
+                key = np.s_[:, start:end]
+            data = np.asarray(profiling.read(self.array, key,
+                                             "LiveArray.read"))
+            if len(self.array.shape) == 2 and self.xdim == 1:
+                data = data.T
+            self.position = end
+            if self._acc is not None:
+                self._acc.update(data)
+            yield start, data
+
+    def summary(self, bins=64, chunksize=2**20):
+        '''
+        Summary statistics of all samples read so far (see
+        nixworks.stats). The first call reads the samples before the
+        current position once, afterwards every read_new updates it.
+
+        :param bins: Number of histogram bins
+        :type bins: int
+        :return: The summary, see nixworks.stats.compute_summary
+        :rtype: dict
+        '''
+        if self._acc is None:
+            self._acc = Accumulator(bins)
+            step = max(chunksize, 1)
+            for start in range(0, self.position, step):
+                end = min(start + step, self.position)
+                key = np.s_[start:end] if self.xdim == 0 else \
+                    np.s_[:, start:end]
+                self._acc.update(self.array[key])
+        return self._acc.result()
+
+    def axis(self, index):
+        dim = self.array.dimensions[self.xdim]
+        if dim.dimension_type == nix.DimensionType.Sample:
+            offset = dim.offset if dim.offset else 0.0
+            return offset + np.asarray(index) * dim.sampling_interval
+        return np.asarray(index, dtype=float)
+
+
+class _Trace(object):
+    '''
+    Incrementally min/max decimated copy of a growing signal. Points are
+    kept as (min, max) pairs per bin of ``factor`` samples; once more than
+    maxpoints are held, neighbouring bins are merged and the factor is
+    doubled, so the data already read never has to be read again.
+    '''
+
+    def __init__(self, maxpoints, factor=1):
+        self.maxpoints = maxpoints
+        self.factor = factor
+        self.index = np.zeros(0, dtype=np.int64)
+        self.points = None
+        self._pending = None
+        self._pending_start = 0
+
+    def extend(self, start, data):
+        if self._pending is not None and len(self._pending):
+            start = self._pending_start
+            data = np.concatenate((self._pending, data))
+        full = len(data) // self.factor * self.factor
+        if self.factor == 1:
+            self._append(start + np.arange(full), data)
+        else:
+            bins = full // self.factor
+            binned = data[:full].reshape((bins, self.factor) +
+                                         data.shape[1:])
+            points = np.empty((2 * bins,) + data.shape[1:], dtype=data.dtype)
+            points[0::2] = binned.min(axis=1)
+            points[1::2] = binned.max(axis=1)
+            self._append(np.repeat(start + np.arange(0, full, self.factor),
+                                   2), points)
+        self._pending = data[full:]
+        self._pending_start = start + full
+        # two points are kept free for the bin being filled, see view
+        while len(self.index) > max(self.maxpoints - 2, 3):
+            self._coarsen()
+
+    def _append(self, index, points):
+        if self.points is None:
+            self.points = points
+        else:
+            self.points = np.concatenate((self.points, points))
+        self.index = np.concatenate((self.index, index))
+
+    def _coarsen(self):
+        if self.factor == 1:
+            factor = max(WindowCache.decimation_factor(
+                len(self.index), self.maxpoints - 2), 2)
+            data, start = self.points, self.index[0] if len(self.index) else 0
+            self.index, self.points = np.zeros(0, dtype=np.int64), None
+            self._pending = None
+            self.factor = factor
+            self.extend(start, data)
+            return
+        bins = len(self.index) // 2
+        pairs = bins // 2
+        shape = (pairs, 4) + self.points.shape[1:]
+        merged = self.points[:4 * pairs].reshape(shape)
+        points = np.empty((2 * pairs,) + self.points.shape[1:],
+                          dtype=self.points.dtype)
+        points[0::2] = merged.min(axis=1)
+        points[1::2] = merged.max(axis=1)
+        index = self.index[:4 * pairs:4].repeat(2)
+        # an odd last bin is kept as it is
+        self.points = np.concatenate((points, self.points[4 * pairs:]))
+        self.index = np.concatenate((index, self.index[4 * pairs:]))
+        self.factor *= 2
+
+    def view(self):
+        '''
+        Index and points including the min and max of the newest samples
+        that do not fill a bin yet.
+        '''
+        if self._pending is None or len(self._pending) == 0:
+            return self.index, self.points
+        index = np.array([self._pending_start] * 2)
+        pending = np.stack((self._pending.min(axis=0),
+                            self._pending.max(axis=0)))
+        if self.points is None:
+            return index, pending
+        return (np.concatenate((self.index, index)),
+                np.concatenate((self.points, pending)))
+
+    def drop_before(self, first):
+        keep = self.index >= first
+        if self.points is not None and not keep.all():
+            self.index = self.index[keep]
+            self.points = self.points[keep]
+
+
+class LivePlotter(object):
+    '''
+    Line plot of a DataArray that is being recorded. Each refresh reads
+    only the samples appended since the previous one and extends the
+    decimated lines, summary statistics stay up to date incrementally.
+
+        f = storage.open_swmr("recording.nix")
+        live = LivePlotter(f.blocks[0].data_arrays["voltage"], window=10.)
+        live.plot()
+        live.start(interval=500)
+    '''
+
+    def __init__(self, data_array, xdim=-1, window=None, maxpoints=5000,
+                 chunksize=2**20):
+        '''
+        :param data_array: The DataArray, 1D or 2D with a Set dimension
+        :type data_array: nix.DataArray
+        :param xdim: Index of the growing dimension
+        :type xdim: int
+        :param window: Only show the last window x-axis units, defaults to
+                       the whole recording
+        :type window: float
+        :param maxpoints: Maximum number of points per line
+        :type maxpoints: int
+        :param chunksize: Maximum number of elements read at once
+        :type chunksize: int
+        '''
+        self.live = LiveArray(data_array, xdim, start=0)
+        self.array = data_array
+        self.xdim = self.live.xdim
+        self.window = window
+        self.maxpoints = maxpoints
+        self.chunksize = chunksize
+        self.trace = _Trace(maxpoints, self._window_factor())
+        self.lines = []
+        self.fig = None
+        self.axis = None
+        self.timer = None
+
+    def _window_samples(self):
+        if self.window is None:
+            return None
+        dim = self.array.dimensions[self.xdim]
+        if dim.dimension_type == nix.DimensionType.Sample:
+            return int(np.ceil(self.window / dim.sampling_interval))
+        return int(np.ceil(self.window))
+
+    def _window_factor(self):
+        samples = self._window_samples()
+        if samples is None:
+            return 1
+        return WindowCache.decimation_factor(samples, self.maxpoints)
+
+    @profiling.instrument
+    def plot(self, axis=None):
+        if axis is None:
+            self.fig = plt.figure()
+            self.axis = self.fig.add_axes([0.15, .2, 0.8, 0.75])
+            self.axis.set_title(self.array.name)
+        else:
+            self.fig = axis.figure
+            self.axis = axis
+        profiling.watch(self.fig)
+        samples = self._window_samples()
+        if samples is not None:
+            # skip what falls out of the window anyway
+            self.live.position = max(self.live.length - samples, 0)
+        self._update(draw=False)
+        self.axis.set_xlabel(create_label(self.array.dimensions[self.xdim]))
+        self.axis.set_ylabel(create_label(self.array))
+        if len(self.lines) > 1:
+            self.axis.legend(loc=1)
+        return self.axis
+
+    def _labels(self, points):
+        if points.ndim == 1:
+            return [self.array.name]
+        labels = list(self.array.dimensions[1 - self.xdim].labels)
+        if len(labels) == 0:
+            labels = list(map(str, range(points.shape[1])))
+        return labels
+
+    def _update(self, draw=True):
+        count = 0
+        for start, data in self.live.read_new(self.chunksize):
+            self.trace.extend(start, data)
+            count += len(data)
+        samples = self._window_samples()
+        if samples is not None:
+            self.trace.drop_before(self.live.position - samples)
+        index, points = self.trace.view()
+        if points is None or len(points) == 0:
+            return count
+        x = self.live.axis(index)
+        columns = points if points.ndim > 1 else points[:, np.newaxis]
+        if not self.lines:
+            for i, label in enumerate(self._labels(points)):
+                line, = self.axis.plot(x, columns[:, i], label=label)
+                self.lines.append(line)
+        else:
+            for i, line in enumerate(self.lines):
+                line.set_data(x, columns[:, i])
+        last = self.live.axis(self.live.position - 1)
+        first = x[0] if self.window is None else last - self.window
+        if last > first:
+            self.axis.set_xlim(first, last)
+        low, high = np.nanmin(points), np.nanmax(points)
+        pad = (high - low) * 0.05
+        if pad > 0:
+            self.axis.set_ylim(low - pad, high + pad)
+        if draw:
+            self.fig.canvas.draw_idle()
+        return count
+
+    @profiling.instrument
+    def refresh(self):
+        '''
+        Read the newly appended samples and update the plot.
+
+        :return: Number of new samples
+        :rtype: int
+        '''
+        if self.live.poll() <= 0:
+            return 0
+        return self._update()
+
+    def summary(self, bins=64):
+        '''
+        Summary statistics of the samples read so far, kept up to date by
+        every refresh (see LiveArray.summary).
+        '''
+        return self.live.summary(bins, self.chunksize)
+
+    def start(self, interval=500):
+        '''
+        Refresh periodically with a timer of the figure's canvas.
+
+        :param interval: Time between refreshes in milliseconds
+        :type interval: int
+        '''
+        self.stop()
+        self.timer = self.fig.canvas.new_timer(interval=interval)
+        self.timer.add_callback(self.refresh)
+        self.timer.start()
+        return self.timer
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
@@ -5,6 +5,11 @@ import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
 import nixio as nix
 
+from ..profiling import profiling
+from ..stats import stats
+from ..storage import data_view
+from .cache import WindowCache, index_range, point_budget
+
 
 def guess_best_xdim(array):
     data_extent = array.shape
@@ -31,7 +36,11 @@ def guess_best_xdim(array):
             return 0
 
 
-def suggested_plotter(array):
+def suggested_plotter(array, spectral=False):
+    if spectral:
+        from .spectral import SpectralPlotter
+        if SpectralPlotter.supports(array):
+            return SpectralPlotter(array)
     if len(array.dimensions) > 3:
         print("cannot handle more than 3D")
         return None
@@ -102,6 +111,7 @@ class EventPlotter(object):
         else:
             self.xdim = xdim
 
+    @profiling.instrument
     def plot(self, axis=None):
         if axis is None:
             self.fig = plt.figure(figsize=[5.5, 2.])
@@ -110,13 +120,15 @@ class EventPlotter(object):
         else:
             self.fig = axis.figure
             self.axis = axis
+        profiling.watch(self.fig)
         if len(self.array.dimensions) == 1:
             return self.plot_1d()
         else:
             return None
 
     def plot_1d(self):
-        data = self.array[:]
+        data = profiling.read(self.array, slice(None),
+                              "EventPlotter.read")
         xlabel = create_label(self.array.dimensions[self.xdim])
         dim = self.array.dimensions[self.xdim]
         if dim.dimension_type == nix.DimensionType.Range and not dim.is_alias:
@@ -145,6 +157,7 @@ class CategoryPlotter(object):
         else:
             self.xdim = xdim
 
+    @profiling.instrument
     def plot(self, axis=None):
         if axis is None:
             self.fig = plt.figure()
@@ -153,6 +166,7 @@ class CategoryPlotter(object):
         else:
             self.fig = axis.figure
             self.axis = axis
+        profiling.watch(self.fig)
         if len(self.array.dimensions) == 1:
             return self.plot_1d()
         elif len(self.array.dimensions) == 2:
@@ -161,7 +175,8 @@ class CategoryPlotter(object):
             return None
 
     def plot_1d(self):
-        data = self.array[:]
+        data = profiling.read(self.array, slice(None),
+                              "CategoryPlotter.read")
         dim = self.array.dimensions[self.xdim]
         if dim.dimension_type == nix.DimensionType.Set:
             categories = list(dim.labels)
@@ -178,7 +193,8 @@ class CategoryPlotter(object):
         return self.axis
 
     def plot_2d(self):
-        data = self.array[:]
+        data = profiling.read(self.array, slice(None),
+                              "CategoryPlotter.read")
         if self.xdim == 1:
             data = data.T
 
@@ -212,8 +228,10 @@ class ImagePlotter(object):
 
     def __init__(self, data_array, xdim=-1):
         self.array = data_array
+        self.data = data_view(data_array)
         self.image = None
 
+    @profiling.instrument
     def plot(self, axis=None):
         dim_count = len(self.array.dimensions)
         if axis is None:
@@ -223,6 +241,7 @@ class ImagePlotter(object):
         else:
             self.fig = axis.figure
             self.axis = axis
+        profiling.watch(self.fig)
         if dim_count == 2:
             return self.plot_2d()
         elif dim_count == 3:
@@ -231,15 +250,20 @@ class ImagePlotter(object):
             return None
 
     def plot_2d(self):
-        data = self.array[:]
+        data = profiling.read(self.data, slice(None),
+                              "ImagePlotter.read")
         x = self.array.dimensions[0].axis(data.shape[0])
         y = self.array.dimensions[1].axis(data.shape[1])
         xlabel = create_label(self.array.dimensions[0])
         ylabel = create_label(self.array.dimensions[1])
-        self.image = self.axis.imshow(data, extent=[x[0], x[-1], y[0], y[-1]])
+        return self.draw_image(data, [x[0], x[-1], y[0], y[-1]],
+                               xlabel, ylabel)
+
+    @profiling.instrument(category="render")
+    def draw_image(self, data, extent, xlabel, ylabel, **kwargs):
+        self.image = self.axis.imshow(data, extent=extent, **kwargs)
         self.axis.set_xlabel(xlabel)
         self.axis.set_ylabel(ylabel)
-        self.axis.set
         return self.axis
 
     def plot_3d(self):
@@ -254,6 +278,7 @@ class LinePlotter(object):
 
     def __init__(self, data_array, xdim=-1):
         self.array = data_array
+        self.data = data_view(data_array)
         self.lines = []
         self.dim_count = len(data_array.dimensions)
         if xdim == -1:
@@ -265,16 +290,38 @@ class LinePlotter(object):
             self.xdim = xdim
         self.fig = None
         self.axis = None
-
-    def plot(self, axis=None, maxpoints=100000):
+        self.cache = None
+        self.budget = None
+
+    @profiling.instrument
+    def plot(self, axis=None, maxpoints=None, autoscale=False):
+        '''
+        Plot the array as lines.
+
+        :param axis: Axis to plot on, a new figure with a slider otherwise
+        :param maxpoints: Samples per window of the slider. By default the
+                          whole array is shown, read in blocks and min/max
+                          decimated to the point budget of the axis (see
+                          cache.point_budget); zooming reads the visible
+                          range and resizing the figure adapts the budget.
+        :type maxpoints: int
+        :param autoscale: Scale the y-axis to the whole array
+        :type autoscale: bool
+        '''
         self.maxpoints = maxpoints
+        self.autoscale = autoscale
         if axis is None:
             self.fig = plt.figure()
             self.axis = self.fig.add_axes([0.15, .2, 0.8, 0.75])
             self.axis.set_title(self.array.name)
-            self.__add_slider()
+            if maxpoints is not None:
+                self.__add_slider()
         else:
             self.axis = axis
+        profiling.watch(self.axis.figure)
+        if maxpoints is None:
+            self.cache = WindowCache()
+            self.budget = point_budget(self.axis)
 
         dim_count = len(self.array.dimensions)
         if dim_count > 2:
@@ -299,6 +346,7 @@ class LinePlotter(object):
             self.__draw(start, end)
         self.fig.canvas.draw_idle()
 
+    @profiling.instrument(name="LinePlotter.draw")
     def __draw(self, start, end):
         if self.dim_count == 1:
             self.__draw_1d(start, end)
@@ -311,7 +359,8 @@ class LinePlotter(object):
         if end > self.array.shape[self.xdim]:
             end = self.array.shape[self.xdim]
 
-        y = self.array[int(start):int(end)]
+        y = profiling.read(self.data, slice(int(start), int(end)),
+                           "LinePlotter.read")
         dim = self.array.dimensions[self.xdim]
         x = np.asarray(dim.axis(len(y), int(start)))
 
@@ -339,9 +388,13 @@ class LinePlotter(object):
 
         for i, l in enumerate(labels):
             if (self.xdim == 0):
-                y = self.array[int(start):int(end), i]
+                y = profiling.read(self.data,
+                                   np.s_[int(start):int(end), i],
+                                   "LinePlotter.read")
             else:
-                y = self.array[i, int(start):int(end)]
+                y = profiling.read(self.data,
+                                   np.s_[i, int(start):int(end)],
+                                   "LinePlotter.read")
 
             if len(self.lines) <= i:
                 ll, = self.axis.plot(x, y, label=l)
@@ -352,8 +405,64 @@ class LinePlotter(object):
 
         self.axis.set_xlim([x[0], x[-1]])
 
+    @profiling.instrument(name="LinePlotter.draw_decimated")
+    def __draw_decimated(self, start, end):
+        # raw window if it fits the budget, min/max decimated otherwise
+        x, y = self.cache.fetch(self.array, start, end, self.xdim,
+                                self.budget)
+        if len(x) == 0:
+            return
+        if y.ndim == 1:
+            labels = [self.array.name]
+            y = y[:, np.newaxis]
+        else:
+            labels = self.array.dimensions[1 - self.xdim].labels
+            if len(labels) == 0:
+                labels = list(map(str, range(y.shape[1])))
+        for i, l in enumerate(labels):
+            if len(self.lines) <= i:
+                ll, = self.axis.plot(x, y[:, i], label=l)
+                self.lines.append(ll)
+            else:
+                self.lines[i].set_data(x, y[:, i])
+
+    def __draw_all(self):
+        length = self.array.shape[self.xdim]
+        self.__draw_decimated(0, length)
+        if len(self.lines):
+            x = self.lines[0].get_xdata()
+            self.axis.set_xlim([x[0], x[-1]])
+        self.axis.callbacks.connect("xlim_changed", self.__on_xlim)
+        self.axis.figure.canvas.mpl_connect("resize_event", self.__on_resize)
+
+    def __on_xlim(self, axis):
+        start, end = axis.get_xlim()
+        length = self.array.shape[self.xdim]
+        first, last = index_range(self.array.dimensions[self.xdim],
+                                  start, end, length)
+        self.__draw_decimated(first, last)
+
+    def __on_resize(self, event):
+        budget = point_budget(self.axis)
+        if budget != self.budget:
+            self.budget = budget
+            self.__on_xlim(self.axis)
+            self.axis.figure.canvas.draw_idle()
+
+    def __set_ylim(self):
+        # y limits covering the whole array, not only the first window
+        summary = stats.summarize(self.array)
+        pad = (summary["max"] - summary["min"]) * 0.05
+        if pad > 0:
+            self.axis.set_ylim([summary["min"] - pad, summary["max"] + pad])
+
     def plot_array_1d(self):
-        self.__draw_1d(0, self.maxpoints)
+        if self.maxpoints is None:
+            self.__draw_all()
+        else:
+            self.__draw_1d(0, self.maxpoints)
+        if self.autoscale:
+            self.__set_ylim()
         xlabel = create_label(self.array.dimensions[self.xdim])
         ylabel = create_label(self.array)
         self.axis.set_xlabel(xlabel)
@@ -361,7 +470,12 @@ class LinePlotter(object):
         return self.axis
 
     def plot_array_2d(self):
-        self.__draw_2d(0, self.maxpoints)
+        if self.maxpoints is None:
+            self.__draw_all()
+        else:
+            self.__draw_2d(0, self.maxpoints)
+        if self.autoscale:
+            self.__set_ylim()
         xlabel = create_label(self.array.dimensions[self.xdim])
         ylabel = create_label(self.array)
         self.axis.set_xlabel(xlabel)
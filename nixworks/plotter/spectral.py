@@ -0,0 +1,224 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import nixio as nix
+
+from .plotter import ImagePlotter, create_label, guess_best_xdim
+from ..profiling import profiling
+from ..storage import data_view
+
+
+WINDOWS = {
+    "hann": lambda n: np.hanning(n + 1)[:-1],
+    "hamming": lambda n: np.hamming(n + 1)[:-1],
+    "blackman": lambda n: np.blackman(n + 1)[:-1],
+    "boxcar": np.ones,
+}
+
+
+class SpectralPlotter(object):
+    '''
+    Welch power spectral density and spectrogram of sampled signals.
+
+    The data is streamed from the file in chunks of whole segments, each
+    chunk is transformed with one vectorized FFT. Only the per column sums
+    of the spectrogram are kept, so memory does not grow with the length of
+    the recording. Results are cached per file, array, window and FFT
+    settings, the ``cache_size`` most recently used ones are kept.
+    '''
+
+    _cache = OrderedDict()
+    cache_size = 32
+
+    def __init__(self, data_array, xdim=-1, nfft=1024, noverlap=None,
+                 window="hann", channel=0, workers=None,
+                 chunksize=2**20):
+        if not self.supports(data_array):
+            raise ValueError("SpectralPlotter: needs a sampled dimension "
+                             "with at most one additional set dimension")
+        self.array = data_array
+        self.data = data_view(data_array)
+        self.xdim = guess_best_xdim(data_array) if xdim == -1 else xdim
+        self.nfft = nfft
+        self.noverlap = nfft // 2 if noverlap is None else noverlap
+        if self.noverlap >= nfft:
+            raise ValueError("SpectralPlotter: noverlap must be smaller "
+                             "than nfft")
+        self.window = window
+        self.channel = channel
+        self.workers = workers
+        self.chunksize = chunksize
+        dim = data_array.dimensions[self.xdim]
+        self.rate = 1. / dim.sampling_interval
+        self.offset = dim.offset if dim.offset else 0.0
+        self.fig = None
+        self.axis = None
+        self.image_plotter = None
+        self.psd_line = None
+
+    @staticmethod
+    def supports(array):
+        dim_types = [d.dimension_type for d in array.dimensions]
+        if len(dim_types) == 1:
+            return dim_types[0] == nix.DimensionType.Sample
+        if len(dim_types) == 2:
+            return set(dim_types) == {nix.DimensionType.Sample,
+                                      nix.DimensionType.Set}
+        return False
+
+    @property
+    def step(self):
+        return self.nfft - self.noverlap
+
+    def _window(self):
+        if isinstance(self.window, str):
+            return WINDOWS[self.window](self.nfft)
+        return np.asarray(self.window, dtype=float)
+
+    def _read(self, start, end):
+        if len(self.array.shape) == 1:
+            key = np.s_[start:end]
+        elif self.xdim == 0:
+            key = np.s_[start:end, self.channel]
+        else:
+            key = np.s_[self.channel, start:end]
+        return profiling.read(self.data, key, "SpectralPlotter.read")
+
+    @profiling.instrument
+    def _chunk_power(self, first_seg, nseg, per_col, start, win, scale):
+        # read the samples of segments [first_seg, first_seg + nseg)
+        begin = start + first_seg * self.step
+        data = np.asarray(self._read(begin, begin + (nseg - 1) * self.step +
+                                     self.nfft), dtype=float)
+        segments = np.lib.stride_tricks.sliding_window_view(
+            data, self.nfft)[::self.step][:nseg]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+        power = np.abs(np.fft.rfft(segments * win, axis=1)) ** 2 * scale
+        col_starts = np.arange(0, nseg, per_col)
+        return (np.add.reduceat(power, col_starts, axis=0),
+                np.diff(np.append(col_starts, nseg)))
+
+    @profiling.instrument
+    def _compute(self, start, end, max_columns):
+        # copies of a file keep the entity ids, the path tells them apart
+        path = os.path.abspath(self.array._h5group.group.file.filename)
+        key = (path, self.array.id, self.channel, start, end, self.nfft,
+               self.noverlap, str(self.window), max_columns)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        nseg = (end - start - self.nfft) // self.step + 1
+        if nseg < 1:
+            raise ValueError("SpectralPlotter: fewer samples than nfft")
+        per_col = -(-nseg // max_columns)
+        # whole columns per chunk, so that no column spans two chunks
+        seg_per_chunk = max(self.chunksize // self.step // per_col, 1) * \
+            per_col
+        win = self._window()
+        scale = np.full(self.nfft // 2 + 1, 2. / (self.rate * (win**2).sum()))
+        scale[0] /= 2
+        if self.nfft % 2 == 0:
+            scale[-1] /= 2
+        firsts = range(0, nseg, seg_per_chunk)
+
+        def work(first):
+            return self._chunk_power(first, min(seg_per_chunk, nseg - first),
+                                     per_col, start, win, scale)
+        if self.workers:
+            with ThreadPoolExecutor(self.workers) as pool:
+                parts = list(pool.map(work, firsts))
+        else:
+            parts = [work(f) for f in firsts]
+        sums = np.concatenate([p[0] for p in parts])
+        counts = np.concatenate([p[1] for p in parts])
+        freqs = np.fft.rfftfreq(self.nfft, 1. / self.rate)
+        times = self.offset + (start + np.arange(len(counts)) * per_col *
+                               self.step + self.nfft / 2.) / self.rate
+        result = (times, freqs, sums, counts)
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _range(self, start, end):
+        length = self.array.shape[self.xdim]
+        end = length if end is None else min(end, length)
+        return max(int(start), 0), int(end)
+
+    def psd(self, start=0, end=None, max_columns=1000):
+        '''
+        Welch estimate of the power spectral density.
+
+        :param start: First sample to be used
+        :type start: int
+        :param end: Last sample (exclusive), defaults to the whole array
+        :type end: int
+        :param max_columns: Spectrogram resolution shared with spectrogram,
+                            the PSD is taken from the same cached pass
+        :type max_columns: int
+        :return: Frequencies and power density
+        :rtype: tuple of numpy.ndarray
+        '''
+        times, freqs, sums, counts = self._compute(
+            *self._range(start, end), max_columns=max_columns)
+        return freqs, sums.sum(axis=0) / counts.sum()
+
+    def spectrogram(self, start=0, end=None, max_columns=1000):
+        '''
+        Spectrogram with at most max_columns time bins. Each column is the
+        mean power of all segments falling into its time bin.
+
+        :param start: First sample to be used
+        :type start: int
+        :param end: Last sample (exclusive), defaults to the whole array
+        :type end: int
+        :param max_columns: Maximum number of time bins
+        :type max_columns: int
+        :return: Times, frequencies and power (frequencies x times)
+        :rtype: tuple of numpy.ndarray
+        '''
+        times, freqs, sums, counts = self._compute(
+            *self._range(start, end), max_columns=max_columns)
+        return times, freqs, (sums / counts[:, np.newaxis]).T
+
+    def plot(self, axis=None, kind="spectrogram", start=0, end=None,
+             max_columns=1000, db=True):
+        if axis is None:
+            self.fig = plt.figure()
+            self.axis = self.fig.add_axes([0.15, .2, 0.8, 0.75])
+            self.axis.set_title(self.array.name)
+        else:
+            self.fig = axis.figure
+            self.axis = axis
+        profiling.watch(self.fig)
+        if kind == "psd":
+            return self.plot_psd(start, end, max_columns, db)
+        return self.plot_spectrogram(start, end, max_columns, db)
+
+    def plot_psd(self, start=0, end=None, max_columns=1000, db=True):
+        freqs, power = self.psd(start, end, max_columns)
+        unit = self.array.unit if self.array.unit else "1"
+        if db:
+            power = 10 * np.log10(power)
+            ylabel = "power density [dB %s^2/Hz]" % unit
+        else:
+            ylabel = "power density [%s^2/Hz]" % unit
+        self.psd_line, = self.axis.plot(freqs, power, label=self.array.name)
+        self.axis.set_xlabel("frequency [Hz]")
+        self.axis.set_ylabel(ylabel)
+        return self.axis
+
+    def plot_spectrogram(self, start=0, end=None, max_columns=1000,
+                         db=True):
+        times, freqs, power = self.spectrogram(start, end, max_columns)
+        if db:
+            power = 10 * np.log10(power)
+        self.image_plotter = ImagePlotter(self.array)
+        self.image_plotter.fig = self.fig
+        self.image_plotter.axis = self.axis
+        xlabel = create_label(self.array.dimensions[self.xdim])
+        return self.image_plotter.draw_image(
+            power, [times[0], times[-1], freqs[0], freqs[-1]], xlabel,
+            "frequency [Hz]", origin="lower", aspect="auto")
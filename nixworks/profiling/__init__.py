@@ -0,0 +1,5 @@
+from .profiling import (Stats, enable, disable, enabled, stats, profile,
+                        span, instrument, watch, read)
+
+__all__ = ["Stats", "enable", "disable", "enabled", "stats", "profile",
+           "span", "instrument", "watch", "read"]
@@ -0,0 +1,297 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Checked first thing by every hook, nothing else happens while disabled
+_enabled = False
+_stats = None
+_local = threading.local()
+
+
+class Stats(object):
+    '''
+    Timings collected while profiling is enabled.
+
+    Every instrumented call is recorded under its name with the number of
+    calls, total and self time (total minus instrumented calls inside it),
+    bytes and elements read. Categories tell HDF5 reads ("read"), NumPy
+    processing ("compute") and matplotlib drawing ("render") apart.
+    '''
+
+    def __init__(self, trace=False):
+        self.records = {}
+        self.trace = trace
+        self.events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def add(self, name, category, start, duration, own, nbytes, elements):
+        with self._lock:
+            rec = self.records.get(name)
+            if rec is None:
+                rec = self.records[name] = {"category": category,
+                                            "calls": 0, "total": 0.,
+                                            "self": 0., "bytes": 0,
+                                            "elements": 0}
+            rec["calls"] += 1
+            rec["total"] += duration
+            rec["self"] += own
+            rec["bytes"] += nbytes
+            rec["elements"] += elements
+            if self.trace:
+                self.events.append({
+                    "name": name, "cat": category, "ph": "X",
+                    "ts": (start - self._t0) * 1e6, "dur": duration * 1e6,
+                    "pid": os.getpid(), "tid": threading.get_ident(),
+                    "args": {"bytes": nbytes, "elements": elements}})
+
+    def by_category(self):
+        '''
+        Self time, bytes and elements summed per category.
+
+        :rtype: dict
+        '''
+        result = {}
+        for rec in self.records.values():
+            cat = result.setdefault(rec["category"], {"self": 0.,
+                                                      "bytes": 0,
+                                                      "elements": 0})
+            cat["self"] += rec["self"]
+            cat["bytes"] += rec["bytes"]
+            cat["elements"] += rec["elements"]
+        return result
+
+    def table(self, sort="total"):
+        '''
+        Human readable summary, one line per instrumented call.
+
+        :param sort: Column to sort by, e.g. "total", "self" or "calls"
+        :type sort: str
+        :rtype: str
+        '''
+        lines = ["%-40s %-8s %7s %10s %10s %12s %12s" %
+                 ("name", "category", "calls", "total [s]", "self [s]",
+                  "bytes", "elements")]
+        for name, rec in sorted(self.records.items(),
+                                key=lambda item: -item[1][sort]):
+            lines.append("%-40s %-8s %7i %10.4f %10.4f %12i %12i" %
+                         (name, rec["category"], rec["calls"], rec["total"],
+                          rec["self"], rec["bytes"], rec["elements"]))
+        return "\n".join(lines)
+
+    def chrome_trace(self, filename):
+        '''
+        Write the recorded calls as Chrome trace JSON (chrome://tracing,
+        Perfetto). Requires the stats to be created with trace=True.
+
+        :param filename: Path of the JSON file
+        :type filename: str
+        '''
+        if not self.trace:
+            raise ValueError("Stats were recorded without trace=True")
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": self.events,
+                       "displayTimeUnit": "ms"}, f)
+
+    def reset(self):
+        with self._lock:
+            self.records = {}
+            self.events = []
+
+    def __repr__(self):
+        return self.table()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace=False):
+    '''
+    Start recording into a new Stats object.
+
+    :param trace: Keep every call for chrome_trace
+    :type trace: bool
+    :return: The Stats object being filled
+    :rtype: Stats
+    '''
+    global _enabled, _stats
+    _stats = Stats(trace)
+    _enabled = True
+    return _stats
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    return _stats
+
+
+def stats():
+    '''
+    The Stats of the current or last profiling session.
+
+    :rtype: Stats
+    '''
+    return _stats
+
+
+@contextmanager
+def profile(trace=False, chrome_trace=None):
+    '''
+    Record everything inside the with block.
+
+        with profiling.profile() as stats:
+            LinePlotter(da).plot()
+        print(stats.table())
+
+    :param trace: Keep every call for Stats.chrome_trace
+    :type trace: bool
+    :param chrome_trace: Write a Chrome trace to this file on exit
+    :type chrome_trace: str
+    '''
+    global _enabled, _stats
+    previous = (_enabled, _stats)
+    current = enable(trace or chrome_trace is not None)
+    try:
+        yield current
+    finally:
+        _enabled, _stats = previous
+        if chrome_trace is not None:
+            current.chrome_trace(chrome_trace)
+
+
+class _Span(object):
+
+    __slots__ = ("name", "category", "start", "children", "nbytes",
+                 "elements")
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.children = 0.
+        self.nbytes = 0
+        self.elements = 0
+
+    def count(self, data):
+        self.nbytes += getattr(data, "nbytes", 0)
+        self.elements += getattr(data, "size", 0)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _begin(name, category):
+    span = _Span(name, category)
+    _stack().append(span)
+    span.start = time.perf_counter()
+    return span
+
+
+def _end(span, target):
+    duration = time.perf_counter() - span.start
+    stack = _stack()
+    stack.pop()
+    if stack:
+        stack[-1].children += duration
+        # reads are attributed to the enclosing calls as well
+        stack[-1].nbytes += span.nbytes
+        stack[-1].elements += span.elements
+    target.add(span.name, span.category, span.start, duration,
+               duration - span.children, span.nbytes, span.elements)
+
+
+class _NullSpan(object):
+
+    def count(self, data):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+@contextmanager
+def span(name, category="compute"):
+    '''
+    Record the with block as one call.
+
+    :param name: Name of the record
+    :type name: str
+    :param category: "read", "compute" or "render"
+    :type category: str
+    '''
+    if not _enabled:
+        yield _null_span
+        return
+    target = _stats
+    current = _begin(name, category)
+    try:
+        yield current
+    finally:
+        _end(current, target)
+
+
+def instrument(func=None, name=None, category="compute"):
+    '''
+    Decorator recording every call of a function or method. Usable as
+    ``@instrument`` or ``@instrument(name=..., category=...)``.
+    '''
+    if func is None:
+        return functools.partial(instrument, name=name, category=category)
+    record = name if name is not None else func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        target = _stats
+        current = _begin(record, category)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _end(current, target)
+    return wrapper
+
+
+def watch(figure):
+    '''
+    Record the rendering of a matplotlib figure as "Figure.draw". Figures
+    created by the plotters are watched already.
+
+    :param figure: The figure
+    :type figure: matplotlib.figure.Figure
+    :return: The figure
+    '''
+    if figure is not None and not getattr(figure, "_nixworks_watched", False):
+        figure.draw = instrument(figure.draw, name="Figure.draw",
+                                 category="render")
+        figure._nixworks_watched = True
+    return figure
+
+
+def read(source, key, name="read"):
+    '''
+    ``source[key]``, recorded as a read with its bytes and elements.
+
+    :param source: DataArray, DataFrame, h5py dataset or memory map
+    :param key: Index or slice
+    :param name: Name of the record
+    :type name: str
+    '''
+    if not _enabled:
+        return source[key]
+    target = _stats
+    current = _begin(name, "read")
+    try:
+        data = source[key]
+        current.count(data)
+        return data
+    finally:
+        _end(current, target)
@@ -0,0 +1,3 @@
+from .render import render_array, render_block, render_files
+
+__all__ = ["render_array", "render_block", "render_files"]
@@ -0,0 +1,324 @@
+import argparse
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import nixio as nix
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from ..plotter import plotter as nixplt
+from ..plotter.cache import WindowCache
+from ..profiling import profiling
+from ..storage import data_view
+
+
+INDEX_NAME = "index.json"
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "_"
+
+
+def output_path(outdir, relpath, block, array, fmt):
+    '''
+    Path of the image of an array: <outdir>/<file>/<block>/<array>.<fmt>,
+    where <file> is the path of the NIX file relative to the scanned
+    directory without extension.
+    '''
+    stem = os.path.splitext(relpath)[0]
+    parts = [_safe(p) for p in stem.split(os.sep)]
+    return os.path.join(outdir, *(parts + [_safe(block.name),
+                                           _safe(array.name) + "." + fmt]))
+
+
+def _draw_lines(axis, array, xdim, maxpoints):
+    # the whole array min/max decimated, instead of the first window only
+    x, y = WindowCache(maxbytes=0).fetch(array, 0, array.shape[xdim], xdim,
+                                         maxpoints)
+    if y.ndim == 1:
+        labels = [array.name]
+        y = y[:, np.newaxis]
+    else:
+        labels = list(array.dimensions[1 - xdim].labels)
+        if len(labels) == 0:
+            labels = list(map(str, range(y.shape[1])))
+    for i, label in enumerate(labels):
+        axis.plot(x, y[:, i], label=label)
+    axis.set_xlabel(nixplt.create_label(array.dimensions[xdim]))
+    axis.set_ylabel(nixplt.create_label(array))
+    if len(labels) > 1:
+        axis.legend(loc=1)
+
+
+def _draw_image(axis, array, maxpixels):
+    steps = [max(-(-n // maxpixels), 1) for n in array.shape[:2]]
+    key = (slice(None, None, steps[0]), slice(None, None, steps[1]))
+    data = profiling.read(data_view(array), key, "render.read")
+    x = array.dimensions[0].axis(array.shape[0])
+    y = array.dimensions[1].axis(array.shape[1])
+    image = nixplt.ImagePlotter(array)
+    image.fig, image.axis = axis.figure, axis
+    image.draw_image(data, [x[0], x[-1], y[0], y[-1]],
+                     nixplt.create_label(array.dimensions[0]),
+                     nixplt.create_label(array.dimensions[1]))
+
+
+@profiling.instrument
+def render_array(array, filename, maxpoints=5000, maxpixels=2000, dpi=100,
+                 figsize=(8, 4)):
+    '''
+    Render a DataArray with its suggested plotter into an image file
+    without an interactive backend. Line data is min/max decimated to
+    maxpoints per line, images are subsampled to maxpixels per side.
+
+    :param array: The DataArray
+    :type array: nix.DataArray
+    :param filename: Output file, the format is taken from the extension
+    :type filename: str
+    :param maxpoints: Maximum number of points per line
+    :type maxpoints: int
+    :param maxpixels: Maximum number of image pixels per side
+    :type maxpixels: int
+    :param dpi: Resolution of raster formats
+    :type dpi: int
+    :return: Name of the plotter used or None if there is none
+    :rtype: str
+    '''
+    plotter = nixplt.suggested_plotter(array)
+    if plotter is None:
+        return None
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    profiling.watch(fig)
+    axis = fig.add_axes([0.12, .15, 0.8, 0.75])
+    axis.set_title(array.name)
+    if isinstance(plotter, nixplt.LinePlotter):
+        _draw_lines(axis, array, plotter.xdim, maxpoints)
+    elif isinstance(plotter, nixplt.ImagePlotter) and \
+            len(array.shape) in (2, 3) and \
+            (len(array.shape) == 2 or array.shape[2] <= 3):
+        _draw_image(axis, array, maxpixels)
+    elif plotter.plot(axis=axis) is None:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    fig.savefig(filename, dpi=dpi)
+    return type(plotter).__name__
+
+
+def _entry(path, relpath, block, array, output, fmt, st):
+    return {"file": path, "relpath": relpath, "block": block.name,
+            "array": array.name, "id": array.id, "output": output,
+            "format": fmt, "source_mtime": st.st_mtime,
+            "source_size": st.st_size}
+
+
+def render_block(path, relpath, block_id, outdir, fmt="png", maxpoints=5000,
+                 maxpixels=2000, dpi=100, force=False):
+    '''
+    Render every DataArray of a block, skipping images that are newer than
+    the file. Runs in the worker processes of render_files.
+
+    :return: One index entry per array
+    :rtype: list of dict
+    '''
+    st = os.stat(path)
+    entries = []
+    nixfile = nix.File.open(path, nix.FileMode.ReadOnly)
+    try:
+        block = nixfile.blocks[block_id]
+        for array in block.data_arrays:
+            output = output_path(outdir, relpath, block, array, fmt)
+            entry = _entry(path, relpath, block, array, output, fmt, st)
+            if not force and os.path.exists(output) and \
+                    os.path.getmtime(output) >= st.st_mtime:
+                entry["status"] = "skipped"
+            else:
+                try:
+                    plotter = render_array(array, output, maxpoints,
+                                           maxpixels, dpi)
+                    entry["status"] = "rendered" if plotter else \
+                        "unsupported"
+                    entry["plotter"] = plotter
+                except Exception as e:
+                    entry["status"] = "error"
+                    entry["error"] = "%s: %s" % (type(e).__name__, e)
+            entries.append(entry)
+    finally:
+        nixfile.close()
+    return entries
+
+
+def find_files(paths, pattern=".nix"):
+    '''
+    Expand directories into the NIX files below them.
+
+    :return: Tuples of the file path and its path relative to the
+             directory it was found in
+    :rtype: list of tuple
+    '''
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for name in sorted(filenames):
+                    if name.endswith(pattern):
+                        full = os.path.join(dirpath, name)
+                        found.append((os.path.abspath(full),
+                                      os.path.relpath(full, path)))
+        else:
+            found.append((os.path.abspath(path), os.path.basename(path)))
+    return sorted(found)
+
+
+def _format(entry):
+    # indexes written before the format was recorded
+    if "format" in entry:
+        return entry["format"]
+    return os.path.splitext(entry["output"])[1][1:]
+
+
+def _load_index(outdir):
+    # entries by file and image format
+    filename = os.path.join(outdir, INDEX_NAME)
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        entries = json.load(f)
+    by_file = {}
+    for entry in entries:
+        by_file.setdefault((entry["file"], _format(entry)), []).append(entry)
+    return by_file
+
+
+def _unchanged(entries, st):
+    # all images of a file are up to date: the file need not be opened
+    return entries and all(e["source_mtime"] == st.st_mtime and
+                           e["source_size"] == st.st_size and
+                           (e["status"] == "unsupported" or
+                            e["status"] in ("rendered", "skipped") and
+                            os.path.exists(e["output"])) for e in entries)
+
+
+def write_html(outdir, entries):
+    '''
+    Write index.html showing all rendered images grouped by file and block.
+    '''
+    lines = ["<!DOCTYPE html>", "<html><head><meta charset='utf-8'>",
+             "<title>nixworks render</title></head><body>"]
+    current = None
+    for e in entries:
+        if (e["relpath"], e["block"]) != current:
+            current = (e["relpath"], e["block"])
+            lines.append("<h2>%s: %s</h2>" % (html.escape(e["relpath"]),
+                                              html.escape(e["block"])))
+        if e["status"] in ("rendered", "skipped"):
+            src = os.path.relpath(e["output"], outdir)
+            lines.append("<figure><img src='%s' alt='%s'><figcaption>%s"
+                         "</figcaption></figure>" %
+                         (html.escape(src), html.escape(e["array"]),
+                          html.escape(e["array"])))
+        else:
+            lines.append("<p>%s: %s %s</p>" %
+                         (html.escape(e["array"]), e["status"],
+                          html.escape(e.get("error", ""))))
+    lines.append("</body></html>")
+    with open(os.path.join(outdir, "index.html"), "w") as f:
+        f.write("\n".join(lines))
+
+
+def render_files(paths, outdir, fmt="png", workers=None, maxpoints=5000,
+                 maxpixels=2000, dpi=100, force=False):
+    '''
+    Render every DataArray of the given NIX files (or of all NIX files
+    below the given directories) into outdir, one task per block in a
+    process pool, and write index.json and index.html. Images newer than
+    their file are not rendered again. The index keeps the entries of
+    other files and formats from earlier runs, as long as their files
+    exist.
+
+    :param paths: NIX files and directories
+    :type paths: list of str
+    :param outdir: Output directory
+    :type outdir: str
+    :param fmt: Image format, e.g. "png" or "svg"
+    :type fmt: str
+    :param workers: Number of worker processes, defaults to the number of
+                    CPUs, 0 renders in this process
+    :type workers: int
+    :param force: Render all images again
+    :type force: bool
+    :return: The index entries of the given files
+    :rtype: list of dict
+    '''
+    os.makedirs(outdir, exist_ok=True)
+    previous = _load_index(outdir)
+    entries, tasks = [], []
+    for path, relpath in find_files(paths):
+        st = os.stat(path)
+        old = previous.pop((path, fmt), [])
+        if not force and _unchanged(old, st):
+            for e in old:
+                entries.append(e if e["status"] == "unsupported" else
+                               dict(e, status="skipped"))
+            continue
+        try:
+            nixfile = nix.File.open(path, nix.FileMode.ReadOnly)
+        except Exception as e:
+            entries.append({"file": path, "relpath": relpath, "block": "",
+                            "array": "", "output": "", "format": fmt,
+                            "status": "error",
+                            "error": "%s: %s" % (type(e).__name__, e),
+                            "source_mtime": st.st_mtime,
+                            "source_size": st.st_size})
+            continue
+        for block in nixfile.blocks:
+            tasks.append((path, relpath, block.id, outdir, fmt, maxpoints,
+                          maxpixels, dpi, force))
+        nixfile.close()
+    if workers == 0 or len(tasks) < 2:
+        results = [render_block(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(render_block, *zip(*tasks)))
+    for result in results:
+        entries.extend(result)
+    index = entries + [e for (path, _), old in previous.items()
+                       if os.path.exists(path) for e in old]
+    index.sort(key=lambda e: (e["relpath"], e["block"], e["array"],
+                              _format(e)))
+    with open(os.path.join(outdir, INDEX_NAME), "w") as f:
+        json.dump(index, f, indent=1)
+    write_html(outdir, index)
+    entries.sort(key=lambda e: (e["relpath"], e["block"], e["array"]))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render every DataArray of NIX files to images.")
+    parser.add_argument("paths", nargs="+",
+                        help="NIX files or directories to search")
+    parser.add_argument("-o", "--outdir", default="nixworks_render")
+    parser.add_argument("-f", "--format", default="png",
+                        help="image format, e.g. png or svg")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes, 0 renders serially")
+    parser.add_argument("--maxpoints", type=int, default=5000,
+                        help="maximum points per line")
+    parser.add_argument("--maxpixels", type=int, default=2000,
+                        help="maximum image pixels per side")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--force", action="store_true",
+                        help="render up to date images again")
+    args = parser.parse_args(argv)
+    entries = render_files(args.paths, args.outdir, args.format,
+                           args.workers, args.maxpoints, args.maxpixels,
+                           args.dpi, args.force)
+    counts = {}
+    for e in entries:
+        counts[e["status"]] = counts.get(e["status"], 0) + 1
+    print(", ".join("%i %s" % (n, s) for s, n in sorted(counts.items())))
+    return 1 if counts.get("error") else 0
@@ -0,0 +1,5 @@
+from .repack import (access_keys, benchmark, chunk_shape, default_hint,
+                     format_report, repack)
+
+__all__ = ["access_keys", "benchmark", "chunk_shape", "default_hint",
+           "format_report", "repack"]
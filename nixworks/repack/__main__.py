@@ -0,0 +1,5 @@
+import sys
+
+from .repack import main
+
+sys.exit(main())
@@ -0,0 +1,356 @@
+import argparse
+import os
+import time
+import numpy as np
+import h5py
+import nixio as nix
+
+from ..export.export import aligned_chunks
+from ..plotter import plotter as nixplt
+from ..storage import data_view
+
+
+# access patterns the layout is optimized for
+HINTS = ("window", "channel", "tile", "memmap")
+
+
+def default_hint(entity):
+    '''
+    Access pattern of the plotter suggested for an entity: image tiles for
+    images, windows along the x dimension for everything else.
+
+    :param entity: DataArray or DataFrame
+    :rtype: str
+    '''
+    if isinstance(entity, nix.DataArray) and len(entity.shape) > 1 and \
+            isinstance(nixplt.suggested_plotter(entity), nixplt.ImagePlotter):
+        return "tile"
+    return "window"
+
+
+def _xdim(entity):
+    if isinstance(entity, nix.DataFrame) or len(entity.shape) != 2:
+        return 0
+    return nixplt.guess_best_xdim(entity)
+
+
+def _balanced(length, size):
+    # chunks of (nearly) equal size, the last one is not mostly empty
+    count = -(-length // max(size, 1))
+    return -(-length // count)
+
+
+def chunk_shape(shape, itemsize, hint, xdim=0, chunkbytes=2**18):
+    '''
+    Chunk shape matching an access pattern:
+
+    - window: windows along xdim across all other dimensions (line plots
+      of all channels)
+    - channel: windows along xdim of a single channel
+    - tile: square tiles over the first two dimensions (images)
+    - memmap: None, i.e. contiguous storage that nixworks.storage can map
+      into memory; such data cannot be appended to anymore
+
+    :param shape: Shape of the data
+    :type shape: tuple
+    :param itemsize: Bytes per element
+    :type itemsize: int
+    :param hint: One of HINTS
+    :type hint: str
+    :param xdim: Index of the x (time) dimension
+    :type xdim: int
+    :param chunkbytes: Target bytes per chunk
+    :type chunkbytes: int
+    :rtype: tuple of int
+    '''
+    if hint not in HINTS:
+        raise ValueError("unknown access hint %r, expected one of %s" %
+                         (hint, ", ".join(HINTS)))
+    if hint == "memmap":
+        return None
+    shape = [max(n, 1) for n in shape]
+    elements = max(chunkbytes // max(itemsize, 1), 1)
+    if hint == "tile" and len(shape) > 1:
+        rest = int(np.prod(shape[2:]))
+        side = max(int(np.sqrt(elements / rest)), 1)
+        return (_balanced(shape[0], side), _balanced(shape[1], side)) + \
+            tuple(shape[2:])
+    chunks = list(shape)
+    chunks[xdim] = 1
+    if hint == "channel":
+        chunks = [1] * len(shape)
+    # very wide rows are split as well, the widest dimension first
+    while int(np.prod(chunks)) > elements:
+        widest = int(np.argmax(chunks))
+        chunks[widest] = -(-chunks[widest] // 2)
+    across = int(np.prod(chunks))
+    chunks[xdim] = _balanced(shape[xdim], max(elements // across, 1))
+    return tuple(chunks)
+
+
+def access_keys(shape, hint, xdim=0, count=20, window=2**16, tile=256,
+                seed=0):
+    '''
+    Random reads of an access pattern, the same for the same arguments.
+
+    :return: Slicing keys
+    :rtype: list of tuple
+    '''
+    if not shape or min(shape) == 0:
+        return []
+    rng = np.random.default_rng(seed)
+
+    def span(axis, size):
+        size = min(size, shape[axis])
+        start = int(rng.integers(0, shape[axis] - size + 1))
+        return slice(start, start + size)
+
+    keys = []
+    for _ in range(count):
+        key = [slice(None)] * len(shape)
+        if hint == "tile" and len(shape) > 1:
+            key[0], key[1] = span(0, tile), span(1, tile)
+        else:
+            key[xdim] = span(xdim, window)
+            if hint == "channel":
+                for axis in range(len(shape)):
+                    if axis != xdim:
+                        key[axis] = span(axis, 1)
+        keys.append(tuple(key))
+    return keys
+
+
+def _find(nixfile, block_id, entity_id, frame):
+    block = nixfile.blocks[block_id]
+    return block.data_frames[entity_id] if frame else \
+        block.data_arrays[entity_id]
+
+
+def benchmark(path, block_id, entity_id, keys, frame=False):
+    '''
+    Time reading the keys from an entity the way the plotters read it,
+    through nixworks.storage.data_view.
+
+    :return: Seconds spent reading
+    :rtype: float
+    '''
+    nixfile = nix.File.open(path, nix.FileMode.ReadOnly)
+    try:
+        view = data_view(_find(nixfile, block_id, entity_id, frame))
+        begin = time.perf_counter()
+        for key in keys:
+            np.array(view[key])
+        return time.perf_counter() - begin
+    finally:
+        nixfile.close()
+
+
+def _entities(nixfile):
+    for block in nixfile.blocks:
+        for array in block.data_arrays:
+            yield block, array
+        for frame in block.data_frames:
+            yield block, frame
+
+
+def _copy_attrs(source, target):
+    for name, value in source.attrs.items():
+        target.attrs.create(name, value, dtype=source.attrs.get_id(name).dtype)
+
+
+def _copy_data(source, group, name, chunks, compression, blocksize):
+    # the data is streamed over in blocks of whole new chunks
+    if chunks is None:
+        target = group.create_dataset(name, shape=source.shape,
+                                      dtype=source.dtype)
+    else:
+        target = group.create_dataset(name, shape=source.shape,
+                                      dtype=source.dtype, chunks=chunks,
+                                      maxshape=(None,) * source.ndim,
+                                      compression=compression)
+    _copy_attrs(source, target)
+    if source.size == 0:
+        return target
+    block = aligned_chunks(source.shape, chunks, source.dtype.itemsize,
+                           blocksize)
+    counts = [-(-n // b) for n, b in zip(source.shape, block)]
+    for index in np.ndindex(*counts):
+        key = tuple(slice(i * b, min((i + 1) * b, n))
+                    for i, b, n in zip(index, block, source.shape))
+        target[key] = source[key]
+    return target
+
+
+def _names(group):
+    # nixio looks entities up by creation order, which has to be kept
+    flags = group.id.get_create_plist().get_link_creation_order()
+    if not flags & h5py.h5p.CRT_ORDER_TRACKED:
+        return list(group)
+    names = []
+    group.id.links.iterate(names.append, idx_type=h5py.h5.INDEX_CRT_ORDER)
+    return [n.decode("utf-8") for n in names]
+
+
+def _copy_group(source, target, layouts, compression, blocksize, copied):
+    # nixio links entities and sections into several groups (references,
+    # metadata): objects met again become hard links to their first copy
+    _copy_attrs(source, target)
+    for name in _names(source):
+        link = source.get(name, getlink=True)
+        if not isinstance(link, h5py.HardLink):
+            target[name] = link
+            continue
+        obj = source[name]
+        addr = h5py.h5o.get_info(obj.id).addr
+        if addr in copied:
+            target[name] = target.file[copied[addr]]
+        elif isinstance(obj, h5py.Group):
+            gcpl = h5py.h5p.create(h5py.h5p.GROUP_CREATE)
+            gcpl.set_link_creation_order(
+                obj.id.get_create_plist().get_link_creation_order())
+            group = h5py.Group(h5py.h5g.create(
+                target.id, name.encode("utf-8"), gcpl=gcpl))
+            copied[addr] = group.name
+            _copy_group(obj, group, layouts, compression, blocksize, copied)
+        elif addr in layouts:
+            copied[addr] = _copy_data(obj, target, name, layouts[addr],
+                                      compression, blocksize).name
+        else:
+            source.copy(obj, target, name=name)
+            copied[addr] = target[name].name
+
+
+def repack(source, destination, hints=None, default=None, chunkbytes=2**18,
+           compression=None, blocksize=2**26, benchmark_reads=20):
+    '''
+    Copy a NIX file, rewriting the data of every DataArray and DataFrame
+    with chunks matching how it is read (see chunk_shape). Everything else
+    is copied as it is. The data is streamed, so files larger than memory
+    can be repacked.
+
+        report = repack("old.nix", "new.nix", hints={"voltage": "channel"})
+        print(format_report(report))
+
+    :param source: Path of the NIX file
+    :type source: str
+    :param destination: Path of the repacked file, must not be the source
+    :type destination: str
+    :param hints: Access hints (see chunk_shape) by entity name or id
+    :type hints: dict
+    :param default: Hint of the other entities, defaults to the access
+                    pattern of their plotter (see default_hint)
+    :type default: str
+    :param chunkbytes: Target bytes per chunk
+    :type chunkbytes: int
+    :param compression: HDF5 filter of the chunked data, e.g. "gzip" or
+                        "lzf"; compressed data reads slower
+    :type compression: str
+    :param blocksize: Bytes copied at once
+    :type blocksize: int
+    :param benchmark_reads: Number of reads of the hinted access pattern
+                            timed on both files, 0 for none
+    :type benchmark_reads: int
+    :return: One entry per entity with its layout before and after and the
+             read times
+    :rtype: list of dict
+    '''
+    if os.path.abspath(source) == os.path.abspath(destination):
+        raise ValueError("repack: the destination must differ from the "
+                         "source")
+    if hints is None:
+        hints = {}
+    nixfile = nix.File.open(source, nix.FileMode.ReadOnly)
+    report = []
+    try:
+        layouts = {}
+        for block, entity in _entities(nixfile):
+            hint = hints.get(entity.id, hints.get(entity.name, default))
+            hint = hint or default_hint(entity)
+            ds = entity._h5group.group["data"]
+            xdim = _xdim(entity)
+            chunks = chunk_shape(ds.shape, ds.dtype.itemsize, hint, xdim,
+                                 chunkbytes)
+            layouts[h5py.h5o.get_info(ds.id).addr] = chunks
+            report.append({
+                "block": block.name, "block_id": block.id,
+                "name": entity.name, "id": entity.id,
+                "kind": type(entity).__name__, "hint": hint, "xdim": xdim,
+                "shape": tuple(ds.shape), "chunks_before": ds.chunks,
+                "compression_before": ds.compression,
+                "chunks_after": chunks,
+                "compression_after": None if chunks is None else compression,
+            })
+        src = nixfile._h5file
+        fcpl = h5py.h5p.create(h5py.h5p.FILE_CREATE)
+        fcpl.set_link_creation_order(
+            src.id.get_create_plist().get_link_creation_order())
+        fid = h5py.h5f.create(destination.encode("utf-8"), h5py.h5f.ACC_TRUNC,
+                              fcpl=fcpl)
+        with h5py.File(fid) as dst:
+            _copy_group(src, dst, layouts, compression, blocksize, {})
+    finally:
+        nixfile.close()
+    if benchmark_reads:
+        for entry in report:
+            keys = access_keys(entry["shape"], entry["hint"], entry["xdim"],
+                               benchmark_reads)
+            frame = entry["kind"] == "DataFrame"
+            for path, field in ((source, "read_before"),
+                                (destination, "read_after")):
+                entry[field] = benchmark(path, entry["block_id"],
+                                         entry["id"], keys, frame)
+    return report
+
+
+def format_report(report):
+    '''
+    Text table of a repack report.
+
+    :rtype: str
+    '''
+    lines = ["%-30s %-8s %-18s %-18s %10s %10s" %
+             ("entity", "hint", "chunks before", "chunks after",
+              "read before", "read after")]
+    for e in report:
+        times = ["%9.4fs" % e[k] if k in e else "%10s" % "-"
+                 for k in ("read_before", "read_after")]
+        lines.append("%-30s %-8s %-18s %-18s %s %s" %
+                     ((e["block"] + "/" + e["name"])[-30:], e["hint"],
+                      e["chunks_before"] or "contiguous",
+                      e["chunks_after"] or "contiguous", times[0],
+                      times[1]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rewrite a NIX file with chunks matching how its data "
+                    "is read.")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--hint", action="append", default=[],
+                        metavar="NAME=HINT",
+                        help="access hint (%s) of the entity with the given "
+                             "name or id" % ", ".join(HINTS))
+    parser.add_argument("--default", choices=HINTS, default=None,
+                        help="access hint of all other entities, defaults "
+                             "to the pattern of their plotter")
+    parser.add_argument("--chunkbytes", type=int, default=2**18,
+                        help="target bytes per chunk")
+    parser.add_argument("--compression", default=None,
+                        help="filter of chunked data, e.g. gzip or lzf")
+    parser.add_argument("--reads", type=int, default=20,
+                        help="reads timed before and after, 0 for none")
+    args = parser.parse_args(argv)
+    hints = {}
+    for hint in args.hint:
+        name, _, value = hint.rpartition("=")
+        if not name or value not in HINTS:
+            parser.error("--hint expects NAME=HINT with HINT one of %s" %
+                         ", ".join(HINTS))
+        hints[name] = value
+    report = repack(args.source, args.destination, hints, args.default,
+                    args.chunkbytes, args.compression,
+                    benchmark_reads=args.reads)
+    print(format_report(report))
+    return 0
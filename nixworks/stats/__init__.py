@@ -0,0 +1,3 @@
+from .stats import summarize, compute_summary, load_summary, store_summary
+
+__all__ = ["summarize", "compute_summary", "load_summary", "store_summary"]
@@ -0,0 +1,315 @@
+import os
+import zlib
+import numpy as np
+import nixio as nix
+
+from ..profiling import profiling
+
+
+SECTION_NAME = "nixworks.summaries"
+SECTION_TYPE = "nixworks.summary"
+
+
+class Accumulator(object):
+    '''
+    Single pass statistics over chunks of data.
+
+    Moments are merged chunk by chunk (Welford/Chan update), the histogram
+    keeps a fixed number of bins whose width doubles whenever a new chunk
+    falls outside of the covered range, so no second pass is needed.
+    NaNs are ignored.
+    '''
+
+    def __init__(self, bins=64):
+        self.bins = bins
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self.min = np.nan
+        self.max = np.nan
+        self.origin = None
+        self.width = None
+        self.kmin = 0
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, chunk):
+        x = np.asarray(chunk, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if len(x) == 0:
+            return
+        n = len(x)
+        mean = x.mean()
+        m2 = ((x - mean) ** 2).sum()
+        delta = mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        cmin, cmax = x.min(), x.max()
+        self.min = cmin if np.isnan(self.min) else min(self.min, cmin)
+        self.max = cmax if np.isnan(self.max) else max(self.max, cmax)
+        self._histogram(x, cmin, cmax)
+
+    def _histogram(self, x, cmin, cmax):
+        if self.origin is None:
+            self.origin = cmin
+            span = cmax - cmin
+            self.width = span / self.bins * (1 + 1e-9) if span > 0 else 1.
+        lo = int(np.floor((cmin - self.origin) / self.width))
+        hi = int(np.floor((cmax - self.origin) / self.width))
+        lo, hi = min(lo, self.kmin), max(hi, self.kmin + self.bins - 1)
+        while hi - lo + 1 > self.bins:
+            # merge pairs of bins, the bin edges stay aligned to origin
+            old = np.arange(self.kmin, self.kmin + self.bins) // 2
+            merged = np.bincount(old - old[0], weights=self.counts,
+                                 minlength=self.bins)[:self.bins]
+            self.counts = merged.astype(np.int64)
+            self.kmin = int(old[0])
+            self.width *= 2
+            lo, hi = lo // 2, hi // 2
+        if lo < self.kmin:
+            shift = self.kmin - lo
+            self.counts = np.concatenate((np.zeros(shift, dtype=np.int64),
+                                          self.counts[:self.bins - shift]))
+            self.kmin = lo
+        k = np.floor((x - self.origin) / self.width).astype(np.int64)
+        self.counts += np.bincount(k - self.kmin, minlength=self.bins)
+
+    def result(self):
+        edges = self.origin + (self.kmin + np.arange(self.bins + 1)) * \
+            self.width if self.origin is not None else np.zeros(self.bins + 1)
+        var = self.m2 / self.count if self.count else np.nan
+        return {"count": self.count, "min": float(self.min),
+                "max": float(self.max),
+                "mean": float(self.mean) if self.count else np.nan,
+                "std": float(np.sqrt(var)), "histogram": self.counts.copy(),
+                "bin_edges": np.asarray(edges, dtype=float)}
+
+
+def _h5data(entity):
+    return entity._h5group.group["data"]
+
+
+def _calibration(entity):
+    # nixio applies the calibration polynomial of DataArrays on read
+    if not isinstance(entity, nix.DataArray):
+        return None
+    coefficients = list(entity.polynom_coefficients)
+    if not coefficients and not entity.expansion_origin:
+        return None
+    return coefficients, entity.expansion_origin
+
+
+def _source(entity):
+    # calibrated data has to be read through nixio, the rest is read from
+    # the HDF5 dataset directly
+    return entity if _calibration(entity) else _h5data(entity)
+
+
+def _encode(values):
+    # object fields (vlen strings) hold Python objects, whose raw bytes
+    # are pointers and change on every read
+    if values.dtype.names:
+        return b"".join(_encode(values[n]) for n in values.dtype.names)
+    if values.dtype.hasobject:
+        strings = [v.decode("utf-8") if isinstance(v, bytes) else str(v)
+                   for v in values.ravel()]
+        return "\0".join(strings).encode("utf-8")
+    return np.ascontiguousarray(values).tobytes()
+
+
+def marker(entity):
+    '''
+    Cheap modification marker of a DataArray or DataFrame: shape, dtype,
+    calibration, update time and a checksum of up to 64 evenly spaced
+    rows plus the last row. Catches appends and most rewrites without
+    reading the data.
+
+    :param entity: DataArray or DataFrame
+    :return: The marker
+    :rtype: str
+    '''
+    data = _h5data(entity)
+    rows = data.shape[0] if data.shape else 0
+    crc = 0
+    if rows:
+        idx = np.unique(np.append(np.linspace(0, rows - 1, 64).astype(int),
+                                  rows - 1))
+        crc = zlib.crc32(_encode(data[list(idx)]))
+    return "%s|%s|%s|%s|%08x" % (data.shape, data.dtype.str,
+                                 _calibration(entity), entity.updated_at,
+                                 crc)
+
+
+def _chunks(data, chunksize):
+    rows = data.shape[0]
+    rowsize = int(np.prod(data.shape[1:])) if len(data.shape) > 1 else 1
+    step = max(chunksize // max(rowsize, 1), 1)
+    for start in range(0, rows, step):
+        yield profiling.read(data, np.s_[start:start + step], "summary.read")
+
+
+def _numeric_columns(dtype):
+    return [n for n in dtype.names if dtype[n].kind in "biuf"]
+
+
+@profiling.instrument
+def compute_summary(entity, bins=64, chunksize=2**20):
+    '''
+    Compute count, min, max, mean, std and a histogram in one chunked pass.
+
+    :param entity: DataArray or DataFrame
+    :param bins: Number of histogram bins
+    :type bins: int
+    :param chunksize: Number of elements read at once
+    :type chunksize: int
+    :return: Summary of the DataArray or, for a DataFrame, a dict with a
+             summary for every numeric column
+    :rtype: dict
+    '''
+    data = _h5data(entity)
+    if isinstance(entity, nix.DataFrame):
+        columns = _numeric_columns(data.dtype)
+        accs = dict((c, Accumulator(bins)) for c in columns)
+        rowsize = max(len(data.dtype.names), 1)
+        for chunk in _chunks(data, chunksize // rowsize):
+            for c in columns:
+                accs[c].update(chunk[c])
+        return dict((c, accs[c].result()) for c in columns)
+    if data.dtype.kind not in "biuf":
+        raise TypeError("Cannot summarize non-numeric data")
+    acc = Accumulator(bins)
+    for chunk in _chunks(_source(entity), chunksize):
+        acc.update(chunk)
+    return acc.result()
+
+
+def _summary_section(nixfile, create=False):
+    if SECTION_NAME in nixfile.sections:
+        return nixfile.sections[SECTION_NAME]
+    if create:
+        return nixfile.create_section(SECTION_NAME, SECTION_TYPE)
+    return None
+
+
+def _section_name(entity):
+    # a bare id would be looked up as section id instead of name
+    return "%s.%s" % (SECTION_TYPE, entity.id)
+
+
+def _write(section, summary):
+    for key, value in summary.items():
+        values = list(np.atleast_1d(value))
+        if key in section.props:
+            section.props[key].values = values
+        else:
+            section.create_property(key, values)
+
+
+def _read(section):
+    summary = {}
+    for prop in section.props:
+        values = prop.values
+        if prop.name in ("histogram", "bin_edges"):
+            summary[prop.name] = np.asarray(values)
+        else:
+            summary[prop.name] = values[0]
+    return summary
+
+
+def store_summary(entity, summary, mark=None):
+    '''
+    Store a summary in the file's "nixworks.summaries" section, in a
+    subsection named after the entity id.
+
+    :param entity: DataArray or DataFrame
+    :param summary: Result of compute_summary
+    :type summary: dict
+    :param mark: Modification marker, computed if not given
+    :type mark: str
+    '''
+    root = _summary_section(entity.file, create=True)
+    name = _section_name(entity)
+    if name in root.sections:
+        del root.sections[name]
+    sec = root.create_section(name, SECTION_TYPE)
+    sec.create_property("marker", [mark if mark else marker(entity)])
+    if isinstance(entity, nix.DataFrame):
+        for column, col_summary in summary.items():
+            _write(sec.create_section(column, SECTION_TYPE + ".column"),
+                   col_summary)
+    else:
+        _write(sec, summary)
+
+
+def load_summary(entity, mark=None):
+    '''
+    Load a stored summary, if it is still valid.
+
+    :param entity: DataArray or DataFrame
+    :param mark: Modification marker, computed if not given
+    :type mark: str
+    :return: The summary or None if there is none or it is outdated
+    :rtype: dict
+    '''
+    root = _summary_section(entity.file)
+    name = _section_name(entity)
+    if root is None or name not in root.sections:
+        return None
+    sec = root.sections[name]
+    if "marker" not in sec.props:
+        return None
+    if sec.props["marker"].values[0] != (mark if mark else marker(entity)):
+        return None
+    if isinstance(entity, nix.DataFrame):
+        return dict((s.name, _read(s)) for s in sec.sections)
+    summary = _read(sec)
+    del summary["marker"]
+    return summary
+
+
+_memory = {}
+
+
+def _bins(summary):
+    if "histogram" in summary:
+        return len(summary["histogram"])
+    for col_summary in summary.values():
+        return len(col_summary["histogram"])
+    return None
+
+
+def summarize(entity, bins=64, chunksize=2**20, store=True, refresh=False):
+    '''
+    Summary statistics of a DataArray or of every numeric DataFrame
+    column. Results are kept in memory and, if the file is writable,
+    in its metadata, so only the first call has to read the data.
+
+    :param entity: DataArray or DataFrame
+    :param bins: Number of histogram bins
+    :type bins: int
+    :param chunksize: Number of elements read at once
+    :type chunksize: int
+    :param store: Store the result in the file
+    :type store: bool
+    :param refresh: Ignore cached results, e.g. after in-place writes the
+                    modification marker cannot detect
+    :type refresh: bool
+    :return: The summary, see compute_summary
+    :rtype: dict
+    '''
+    if not isinstance(entity, (nix.DataArray, nix.DataFrame)):
+        raise TypeError("Can only summarize DataArrays and DataFrames")
+    mark = marker(entity)
+    # copies of a file keep the entity ids, the path tells them apart
+    path = os.path.abspath(_h5data(entity).file.filename)
+    key = (path, entity.id, mark, bins)
+    if key in _memory and not refresh:
+        return _memory[key]
+    summary = None if refresh else load_summary(entity, mark)
+    if summary is None or _bins(summary) not in (None, bins):
+        summary = compute_summary(entity, bins, chunksize)
+        if store and entity.file.mode != nix.FileMode.ReadOnly:
+            store_summary(entity, summary, mark)
+    _memory[key] = summary
+    return summary
@@ -0,0 +1,3 @@
+from .storage import data_view, is_contiguous, memmap, open_swmr, release
+
+__all__ = ["data_view", "is_contiguous", "memmap", "open_swmr", "release"]
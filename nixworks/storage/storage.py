@@ -0,0 +1,119 @@
+import numpy as np
+import h5py
+import nixio as nix
+from nixio.hdf5.h5group import H5Group
+
+
+_maps = {}
+
+
+def _dataset(entity):
+    return entity._h5group.group["data"]
+
+
+def is_contiguous(entity):
+    '''
+    Check whether the data of a DataArray or DataFrame is stored as one
+    contiguous, unfiltered block of fixed size elements, i.e. whether it can
+    be mapped into memory directly.
+
+    :param entity: DataArray or DataFrame
+    :return: True if the data can be memory mapped
+    :rtype: bool
+    '''
+    ds = _dataset(entity)
+    plist = ds.id.get_create_plist()
+    if plist.get_layout() != h5py.h5d.CONTIGUOUS or plist.get_nfilters():
+        return False
+    if ds.id.get_offset() is None:
+        # storage not allocated yet
+        return False
+    if h5py.check_dtype(vlen=ds.dtype) is not None or ds.dtype.hasobject:
+        return False
+    if ds.dtype.names and any(h5py.check_dtype(vlen=ds.dtype[n]) is not None
+                              for n in ds.dtype.names):
+        return False
+    if isinstance(entity, nix.DataArray):
+        # nixio applies the calibration polynomial on read
+        if len(entity.polynom_coefficients) or entity.expansion_origin:
+            return False
+    return True
+
+
+def memmap(entity):
+    '''
+    Read-only np.memmap of the data of a DataArray or DataFrame. Slicing it
+    reads directly from the page cache without going through h5py.
+    Only available for files opened read-only and contiguous data.
+
+    :param entity: DataArray or DataFrame
+    :return: The memory map or None if the data cannot be mapped
+    :rtype: numpy.memmap
+    '''
+    if entity.file.mode != nix.FileMode.ReadOnly or \
+       not is_contiguous(entity):
+        return None
+    ds = _dataset(entity)
+    key = (ds.file.filename, ds.name, ds.id.get_offset(), ds.shape)
+    if key not in _maps:
+        if ds.size == 0:
+            return None
+        _maps[key] = np.memmap(ds.file.filename, dtype=ds.dtype, mode="r",
+                               offset=ds.id.get_offset(), shape=ds.shape)
+    return _maps[key]
+
+
+def data_view(entity):
+    '''
+    Object to read slices of the entity's data from: the memory map if
+    there is one, else the entity itself.
+
+    :param entity: DataArray or DataFrame
+    :return: Sliceable data
+    '''
+    mapped = memmap(entity)
+    return entity if mapped is None else mapped
+
+
+def release(filename=None):
+    '''
+    Drop cached memory maps, e.g. before a file is written to again.
+
+    :param filename: Only drop maps of this file, defaults to all files
+    :type filename: str
+    '''
+    for key in list(_maps):
+        if filename is None or key[0] == filename:
+            del _maps[key]
+
+
+def open_swmr(path):
+    '''
+    Open a NIX file read-only in HDF5 single-writer/multiple-reader mode,
+    so that it can be read while an acquisition keeps appending to it.
+    Appended data becomes visible after refreshing the datasets, see
+    nixworks.plotter.live. The writer has to create the file with the
+    latest HDF5 format and switch on SWMR writing.
+
+    :param path: Path of the NIX file
+    :type path: str
+    :return: The opened file
+    :rtype: nix.File
+    '''
+    fid = h5py.h5f.open(path.encode("utf-8"),
+                        h5py.h5f.ACC_RDONLY | h5py.h5f.ACC_SWMR_READ)
+    # nix.File cannot pass SWMR flags, so its read-only set up is repeated
+    # around the h5py file
+    nixfile = nix.File.__new__(nix.File)
+    nixfile._h5file = h5py.File(fid)
+    nixfile._root = H5Group(nixfile._h5file, "/")
+    nixfile._h5group = nixfile._root
+    nixfile._auto_update_timestamps = False
+    nixfile._check_header(nix.FileMode.ReadOnly)
+    nixfile.mode = nix.FileMode.ReadOnly
+    nixfile._data = nixfile._root.open_group("data")
+    nixfile._metadata = nixfile._root.open_group("metadata")
+    nixfile._compr = nix.Compression.No
+    nixfile._blocks = None
+    nixfile._sections = None
+    return nixfile
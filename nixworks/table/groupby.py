@@ -0,0 +1,203 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import nixio as nix
+
+from ..export.export import EntityReader, aligned_chunks, close_files
+from ..profiling import profiling
+
+
+AGGREGATES = ("count", "sum", "min", "max", "mean", "var", "std")
+
+
+def _check(aggregates):
+    unknown = [a for a in aggregates if a not in AGGREGATES]
+    if unknown:
+        raise ValueError("unknown aggregates %s, expected some of %s" %
+                         (", ".join(unknown), ", ".join(AGGREGATES)))
+
+
+class Partial(object):
+    '''
+    Mergeable partial aggregates of the numeric columns of a table per
+    group: count, sum, min, max and the sum of squared deviations from the
+    group mean. Partials of chunks are merged with the Chan et al. update,
+    as in nixworks.stats.Accumulator, so the result does not depend on the
+    chunking and variances stay accurate.
+    '''
+
+    def __init__(self, frame):
+        '''
+        :param frame: The statistics, indexed by group key(s), columns
+                      (statistic, column)
+        :type frame: pandas.DataFrame
+        '''
+        self.frame = frame
+
+    @classmethod
+    @profiling.instrument(name="Partial.from_frame", category="compute")
+    def from_frame(cls, pd_df, by, columns):
+        '''
+        Partial aggregates of a chunk of rows.
+
+        :param pd_df: The rows
+        :type pd_df: pandas.DataFrame
+        :param by: Key column(s)
+        :type by: list of str
+        :param columns: Aggregated columns
+        :type columns: list of str
+        :rtype: Partial
+        '''
+        grouped = pd_df.groupby(by, sort=False)[columns]
+        count = grouped.count()
+        stats = {"count": count, "sum": grouped.sum(),
+                 "min": grouped.min(), "max": grouped.max(),
+                 "m2": (grouped.var(ddof=0) * count).fillna(0.)}
+        return cls(pd.concat(stats, axis=1))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def merge(self, other):
+        '''
+        Merge with the partial aggregates of other rows.
+
+        :param other: The other partial
+        :type other: Partial
+        :return: The combined partial
+        :rtype: Partial
+        '''
+        if not len(self.frame):
+            return other
+        if not len(other.frame):
+            return self
+        both = pd.concat((self.frame, other.frame))
+        level = list(range(both.index.nlevels))
+
+        def grouped(stat):
+            return both[stat].groupby(level=level, sort=False)
+
+        count = both["count"].to_numpy(dtype=float)
+        total = both["sum"].to_numpy(dtype=float)
+        group_count = grouped("count").transform("sum").to_numpy(dtype=float)
+        group_total = grouped("sum").transform("sum").to_numpy(dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            deviation = count * (total / count -
+                                 group_total / group_count) ** 2
+        m2 = both["m2"] + np.nan_to_num(deviation)
+        stats = {"count": grouped("count").sum(), "sum": grouped("sum").sum(),
+                 "min": grouped("min").min(), "max": grouped("max").max(),
+                 "m2": m2.groupby(level=level, sort=False).sum()}
+        return Partial(pd.concat(stats, axis=1))
+
+    def result(self, aggregates=("count", "mean"), ddof=1):
+        '''
+        Final aggregates, like pandas.DataFrame.groupby(by).agg(aggregates).
+
+        :param aggregates: Names from AGGREGATES
+        :type aggregates: list of str
+        :param ddof: Delta degrees of freedom of var and std
+        :type ddof: int
+        :return: The aggregates indexed by group, columns (column,
+                 aggregate)
+        :rtype: pandas.DataFrame
+        '''
+        _check(aggregates)
+        frame = self.frame.sort_index()
+        out = {}
+        for column in frame["count"].columns:
+            count = frame["count"][column]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var = frame["m2"][column] / (count - ddof).where(
+                    count > ddof)
+                values = {"count": count, "sum": frame["sum"][column],
+                          "min": frame["min"][column],
+                          "max": frame["max"][column],
+                          "mean": frame["sum"][column] / count.where(
+                              count > 0),
+                          "var": var, "std": np.sqrt(var)}
+            for aggregate in aggregates:
+                out[(column, aggregate)] = values[aggregate]
+        return pd.DataFrame(out, index=frame.index)
+
+
+def _numeric_columns(dtype, by):
+    return [n for n in dtype.names if dtype[n].kind in "biuf" and
+            n not in by]
+
+
+def _chunk_partial(rows, reader, names, by, columns):
+    pd_df = pd.DataFrame(np.asarray(reader[rows[0]:rows[1]]))
+    pd_df.columns = names
+    return Partial.from_frame(pd_df, by, columns)
+
+
+@profiling.instrument
+def aggregate(dataframe, by, columns=None, aggregates=("count", "mean"),
+              workers=None, processes=True, rows=None, blocksize=2**26,
+              ddof=1):
+    '''
+    Group the rows of a DataFrame by key column(s) and aggregate columns,
+    without loading the table: chunks of rows are aggregated in a pool of
+    workers and their partial aggregates merged as they arrive, so memory
+    use grows with the number of groups, not of rows.
+
+        aggregate(df, "condition", ["amplitude"], ["count", "mean", "std"])
+
+    :param dataframe: The DataFrame, its file has to be closed for writing
+                      if processes are used
+    :type dataframe: nix.DataFrame
+    :param by: Key column(s)
+    :type by: str or list of str
+    :param columns: Aggregated columns, defaults to all other numeric ones
+    :type columns: list of str
+    :param aggregates: Names from AGGREGATES
+    :type aggregates: list of str
+    :param workers: Number of workers, defaults to the number of CPUs, 0
+                    aggregates in this thread
+    :type workers: int
+    :param processes: Use processes, else threads (reads are serialized
+                      by h5py, the aggregation runs in parallel)
+    :type processes: bool
+    :param rows: Rows per chunk, defaults to multiples of the HDF5 chunks
+                 of about blocksize bytes
+    :type rows: int
+    :param blocksize: Target bytes per chunk
+    :type blocksize: int
+    :param ddof: Delta degrees of freedom of var and std
+    :type ddof: int
+    :return: The aggregates indexed by group, columns (column, aggregate)
+    :rtype: pandas.DataFrame
+    '''
+    if not isinstance(dataframe, nix.DataFrame):
+        raise TypeError("The given object is not a DataFrame")
+    _check(aggregates)
+    by = [by] if isinstance(by, str) else list(by)
+    reader = EntityReader(dataframe)
+    if columns is None:
+        columns = _numeric_columns(reader.dtype, by)
+    names = [str(n) for n in dataframe.column_names]
+    missing = [c for c in by + list(columns) if c not in names]
+    if missing:
+        raise ValueError("DataFrame %s has no column %s" %
+                         (dataframe.name, ", ".join(missing)))
+    if rows is None:
+        rows = aligned_chunks(reader.shape, reader.chunks,
+                              reader.dtype.itemsize, blocksize)[0]
+    length = reader.shape[0]
+    starts = list(range(0, length, rows)) or [0]
+    ranges = list(zip(starts, starts[1:] + [length]))
+    args = ([reader] * len(ranges), [names] * len(ranges),
+            [by] * len(ranges), [list(columns)] * len(ranges))
+    result = Partial(pd.DataFrame())
+    if workers == 0 or len(ranges) < 2:
+        for partial in map(_chunk_partial, ranges, *args):
+            result = result.merge(partial)
+    else:
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(workers or os.cpu_count()) as executor:
+            for partial in executor.map(_chunk_partial, ranges, *args):
+                result = result.merge(partial)
+    close_files()
+    return result.result(aggregates, ddof)
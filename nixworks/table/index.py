@@ -0,0 +1,364 @@
+import os
+import tempfile
+import h5py
+import numpy as np
+import pandas as pd
+import nixio as nix
+
+from ..profiling import profiling
+from ..storage import memmap
+
+
+# name of the group holding the indexes inside the group of a DataFrame
+INDEX_GROUP = "nixworks_index"
+
+
+def _dataset(dataframe):
+    return dataframe._h5group.group["data"]
+
+
+def _decode(keys):
+    # vlen strings are read as bytes objects, comparisons need str
+    if keys.dtype == object:
+        return np.char.decode(keys.astype("S"), "utf-8")
+    return keys
+
+
+def _encode(keys):
+    return keys.astype(object) if keys.dtype.kind == "U" else keys
+
+
+def _column(dataframe, column, start, end):
+    mapped = memmap(dataframe)
+    if mapped is not None:
+        return np.array(mapped[column][start:end])
+    data = profiling.read(_dataset(dataframe).fields(column),
+                          slice(start, end), "ColumnIndex.read")
+    return _decode(np.asarray(data))
+
+
+def _create(group, name, dtype, chunks):
+    return group.create_dataset(name, shape=(0,), dtype=dtype,
+                                maxshape=(None,), chunks=(chunks,))
+
+
+def _append(dataset, values):
+    start = len(dataset)
+    dataset.resize((start + len(values),))
+    dataset[start:] = values
+
+
+def _sorted_run(keys, first):
+    order = np.argsort(keys, kind="stable")
+    return keys[order], order.astype(np.int64) + first
+
+
+def _write_runs(f, dataframe, column, start, end, chunkrows):
+    # sorted runs of chunkrows rows each in a scratch file
+    dtype = _dataset(dataframe).dtype[column]
+    runs = []
+    for first in range(start, end, chunkrows):
+        last = min(first + chunkrows, end)
+        keys, rows = _sorted_run(_column(dataframe, column, first, last),
+                                 first)
+        name = "%i" % len(runs)
+        runs.append((f.create_dataset("keys" + name, data=_encode(keys),
+                                      dtype=dtype),
+                     f.create_dataset("rows" + name, data=rows)))
+    return runs
+
+
+def _merge(runs, keys_out, rows_out, buffer):
+    '''
+    Merge sorted runs of (keys, rows) datasets into the output datasets,
+    holding at most ``buffer`` entries per run in memory. Every round
+    takes all buffered keys up to the smallest last key of the buffers,
+    nothing later in any run can sort before those.
+    '''
+    positions = [0] * len(runs)
+    buffers = [(np.zeros(0), np.zeros(0, dtype=np.int64))] * len(runs)
+
+    def fill(i):
+        keys, rows = runs[i]
+        end = min(positions[i] + buffer, len(keys))
+        new = (_decode(keys[positions[i]:end]), rows[positions[i]:end])
+        positions[i] = end
+        if len(buffers[i][0]):
+            new = (np.concatenate((buffers[i][0], new[0])),
+                   np.concatenate((buffers[i][1], new[1])))
+        buffers[i] = new
+
+    for i in range(len(runs)):
+        fill(i)
+    while any(len(b[0]) for b in buffers):
+        open_runs = [b[0][-1] for i, b in enumerate(buffers)
+                     if len(b[0]) and positions[i] < len(runs[i][0])]
+        cutoff = min(open_runs) if open_runs else None
+        taken_keys, taken_rows = [], []
+        for i, (keys, rows) in enumerate(buffers):
+            n = len(keys) if cutoff is None else \
+                int(np.searchsorted(keys, cutoff, side="right"))
+            taken_keys.append(keys[:n])
+            taken_rows.append(rows[:n])
+            buffers[i] = (keys[n:], rows[n:])
+        keys = np.concatenate(taken_keys)
+        order = np.argsort(keys, kind="stable")
+        _append(keys_out, _encode(keys[order]))
+        _append(rows_out, np.concatenate(taken_rows)[order])
+        for i in range(len(runs)):
+            if not len(buffers[i][0]) and positions[i] < len(runs[i][0]):
+                fill(i)
+
+
+class ColumnIndex(object):
+    '''
+    Persisted sorted index of a DataFrame column: the column values in
+    sorted order and the row of every value, stored in the HDF5 group of
+    the DataFrame next to its data. Range and equality lookups binary
+    search the keys on disk and read only the matching rows.
+
+        index = create_index(df, "time")
+        events = index.select(10., 20.)  # rows with 10 <= time <= 20
+
+    Rows appended after the index was built or updated are scanned on
+    every lookup until update is called (append_rows does both at once).
+    Changing existing rows invalidates the index, rebuild it with
+    create_index.
+    '''
+
+    def __init__(self, dataframe, column):
+        '''
+        Open the existing index of a column.
+
+        :param dataframe: The DataFrame
+        :type dataframe: nix.DataFrame
+        :param column: Name of the indexed column
+        :type column: str
+        '''
+        group = dataframe._h5group.group
+        if INDEX_GROUP not in group or column not in group[INDEX_GROUP]:
+            raise KeyError("DataFrame %s has no index of column %s" %
+                           (dataframe.name, column))
+        self.dataframe = dataframe
+        self.column = column
+        self.group = group[INDEX_GROUP][column]
+        self.keys = self.group["keys"]
+        self.permutation = self.group["rows"]
+
+    def __len__(self):
+        return int(self.group.attrs["indexed_rows"])
+
+    @property
+    def stale(self):
+        '''
+        Number of rows appended since the index was last updated.
+        '''
+        return len(_dataset(self.dataframe)) - len(self)
+
+    @profiling.instrument
+    def update(self, chunkrows=2**20):
+        '''
+        Add the rows appended since the index was built. Values that sort
+        after all indexed ones (e.g. timestamps) are simply appended,
+        otherwise the new rows are merged into the index.
+
+        :param chunkrows: Rows sorted in memory at once
+        :type chunkrows: int
+        :return: Number of rows added
+        :rtype: int
+        '''
+        first, total = len(self), len(_dataset(self.dataframe))
+        if total <= first:
+            return 0
+        if total - first <= chunkrows:
+            keys, rows = _sorted_run(_column(self.dataframe, self.column,
+                                             first, total), first)
+            if not len(self.keys) or \
+                    keys[0] >= _decode(self.keys[-1:])[0]:
+                _append(self.keys, _encode(keys))
+                _append(self.permutation, rows)
+                self.group.attrs["indexed_rows"] = total
+                return total - first
+        with tempfile.TemporaryDirectory() as tmp:
+            with h5py.File(os.path.join(tmp, "runs.h5"), "w") as f:
+                runs = _write_runs(f, self.dataframe, self.column, first,
+                                   total, chunkrows)
+                chunks = self.keys.chunks[0]
+                merged = (_create(f, "merged_keys", self.keys.dtype, chunks),
+                          _create(f, "merged_rows", np.int64, chunks))
+                _merge([(self.keys, self.permutation)] + runs, *merged,
+                       buffer=max(chunkrows // (len(runs) + 1), 1024))
+                # written back in place, the file does not grow by the
+                # space of replaced datasets
+                self.keys.resize((len(merged[0]),))
+                self.permutation.resize((len(merged[1]),))
+                for start in range(0, len(merged[0]), chunkrows):
+                    end = start + chunkrows
+                    self.keys[start:end] = merged[0][start:end]
+                    self.permutation[start:end] = merged[1][start:end]
+        self.group.attrs["indexed_rows"] = total
+        return total - first
+
+    def _search(self, value, side):
+        # binary search on disk, the last few thousand keys in memory
+        low, high = 0, len(self.keys)
+        while high - low > 4096:
+            middle = (low + high) // 2
+            key = _decode(self.keys[middle:middle + 1])[0]
+            if key < value or (side == "right" and key == value):
+                low = middle + 1
+            else:
+                high = middle
+        keys = _decode(self.keys[low:high])
+        return low + int(np.searchsorted(keys, value, side=side))
+
+    @profiling.instrument
+    def rows(self, low=None, high=None):
+        '''
+        Rows whose value lies in [low, high]; rows(v, v) finds the rows
+        equal to v.
+
+        :param low: Smallest value, None for no lower bound
+        :param high: Largest value, None for no upper bound
+        :return: Sorted row numbers
+        :rtype: numpy.ndarray
+        '''
+        first = 0 if low is None else self._search(low, "left")
+        last = len(self.keys) if high is None else \
+            self._search(high, "right")
+        rows = np.asarray(profiling.read(self.permutation,
+                                         slice(first, max(first, last)),
+                                         "ColumnIndex.read"))
+        if self.stale > 0:
+            # appended rows which are not indexed yet are scanned
+            start = len(self)
+            tail = _column(self.dataframe, self.column, start,
+                           len(_dataset(self.dataframe)))
+            match = np.ones(len(tail), dtype=bool)
+            if low is not None:
+                match &= tail >= low
+            if high is not None:
+                match &= tail <= high
+            rows = np.concatenate((rows, np.nonzero(match)[0] + start))
+        return np.sort(rows)
+
+    @profiling.instrument
+    def select(self, low=None, high=None, gap=None):
+        '''
+        The rows whose value lies in [low, high] as a pandas DataFrame
+        indexed by row number. Rows close to each other are read together
+        as one slice.
+
+        :param low: Smallest value, None for no lower bound
+        :param high: Largest value, None for no upper bound
+        :param gap: Largest number of rows read in between matching rows,
+                    defaults to the HDF5 chunk length: rows sharing a
+                    chunk are read at once
+        :type gap: int
+        :rtype: pandas.DataFrame
+        '''
+        rows = self.rows(low, high)
+        ds = _dataset(self.dataframe)
+        mapped = memmap(self.dataframe)
+        source = ds if mapped is None else mapped
+        if gap is None:
+            gap = ds.chunks[0] if ds.chunks else 256
+        data = np.zeros(0, dtype=ds.dtype)
+        if len(rows):
+            parts = []
+            gaps = np.nonzero(np.diff(rows) > gap)[0] + 1
+            for cluster in np.split(rows, gaps):
+                first, last = int(cluster[0]), int(cluster[-1]) + 1
+                part = profiling.read(source, slice(first, last),
+                                      "ColumnIndex.read")
+                parts.append(np.asarray(part)[cluster - first])
+            data = np.concatenate(parts)
+        pd_df = pd.DataFrame(data)
+        for name in ds.dtype.names:
+            if ds.dtype[name] == object and len(pd_df):
+                pd_df[name] = _decode(pd_df[name].to_numpy()).astype(object)
+        pd_df.columns = [str(n) for n in self.dataframe.column_names]
+        pd_df.index = rows
+        return pd_df
+
+
+@profiling.instrument
+def create_index(dataframe, column, chunkrows=2**20):
+    '''
+    Build a persisted sorted index of a DataFrame column (see ColumnIndex),
+    replacing an existing one. The column is sorted in runs of chunkrows
+    rows which are merged on disk, so columns larger than memory can be
+    indexed. The file must be opened for writing.
+
+    :param dataframe: The DataFrame
+    :type dataframe: nix.DataFrame
+    :param column: Name of the column
+    :type column: str
+    :param chunkrows: Rows sorted in memory at once
+    :type chunkrows: int
+    :return: The index
+    :rtype: ColumnIndex
+    '''
+    if not isinstance(dataframe, nix.DataFrame):
+        raise TypeError("The given object is not a DataFrame")
+    ds = _dataset(dataframe)
+    if column not in (ds.dtype.names or ()):
+        raise ValueError("DataFrame %s has no column %s" %
+                         (dataframe.name, column))
+    drop_index(dataframe, column)
+    group = dataframe._h5group.group.require_group(INDEX_GROUP)
+    group = group.create_group(column)
+    length = len(ds)
+    chunks = max(min(chunkrows, 2**16), 1)
+    keys_out = _create(group, "keys", ds.dtype[column], chunks)
+    rows_out = _create(group, "rows", np.int64, chunks)
+    if length <= chunkrows:
+        keys, rows = _sorted_run(_column(dataframe, column, 0, length), 0)
+        _append(keys_out, _encode(keys))
+        _append(rows_out, rows)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            with h5py.File(os.path.join(tmp, "runs.h5"), "w") as f:
+                runs = _write_runs(f, dataframe, column, 0, length,
+                                   chunkrows)
+                # buffers of all runs together hold about chunkrows keys
+                _merge(runs, keys_out, rows_out,
+                       max(chunkrows // len(runs), 1024))
+    group.attrs["indexed_rows"] = length
+    return ColumnIndex(dataframe, column)
+
+
+def indexed_columns(dataframe):
+    '''
+    Names of the columns of a DataFrame that have an index.
+
+    :rtype: list of str
+    '''
+    group = dataframe._h5group.group
+    if INDEX_GROUP not in group:
+        return []
+    return list(group[INDEX_GROUP])
+
+
+def drop_index(dataframe, column):
+    '''
+    Remove the index of a column if there is one.
+    '''
+    group = dataframe._h5group.group
+    if INDEX_GROUP in group and column in group[INDEX_GROUP]:
+        del group[INDEX_GROUP][column]
+
+
+def append_rows(dataframe, rows, chunkrows=2**20):
+    '''
+    Append rows to a DataFrame and update all of its indexes.
+
+    :param dataframe: The DataFrame
+    :type dataframe: nix.DataFrame
+    :param rows: The rows, see nix.DataFrame.append_rows
+    :param chunkrows: Rows sorted in memory at once
+    :type chunkrows: int
+    '''
+    dataframe.append_rows(rows)
+    for column in indexed_columns(dataframe):
+        ColumnIndex(dataframe, column).update(chunkrows)
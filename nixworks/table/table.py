@@ -2,17 +2,29 @@ import pandas as pd
 import nixio as nix
 import numpy as np
 
+from ..profiling import profiling
+from ..storage import memmap
 
+
+@profiling.instrument
 def write_to_pandas(dataframe):
     if not isinstance(dataframe, nix.DataFrame):
         raise TypeError("The given object is not a DataFrame")
+    mapped = memmap(dataframe)
+    if mapped is not None:
+        data = profiling.read(mapped, slice(None), "write_to_pandas.read")
+        pd_df = pd.DataFrame(np.asarray(data))
+        pd_df.columns = [str(n) for n in dataframe.column_names]
+        return pd_df
     tmp_list = []
-    tmp_list.extend(dataframe._h5group.group['data'][:])
+    tmp_list.extend(profiling.read(dataframe._h5group.group['data'],
+                                   slice(None), "write_to_pandas.read"))
     li = [list(ite) for ite in tmp_list]  # make all element list
     pd_df = pd.DataFrame(li, columns=[str(n) for n in dataframe.column_names])
     return pd_df
 
 
+@profiling.instrument
 def create_from_pandas(blk, pd_df, name, definition=None):
     """
     This function create Nixpy DataFrame from Pandas DataFrame.
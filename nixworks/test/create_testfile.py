@@ -1,24 +1,53 @@
+"""
+Generator for NIX test files of arbitrary size.
+
+All data is written in chunks of at most ``chunksize`` samples, so memory
+use does not depend on the size of the file, and all random data comes
+from a seeded generator, so the same arguments give the same file.
+
+    python create_testfile.py --length 100000000 --channels 64 \\
+        --arrays 1000 --tags 5000 --frames 100 --rows 1000000 -o big.nix
+"""
+import argparse
 import nixio as nix
 import numpy as np
-from scipy.stats import multivariate_normal
-from PIL import Image as img
+
+CHUNKSIZE = 2**20
+
+
+def _rng(rng):
+    return np.random.RandomState(42) if rng is None else rng
+
+
+def _write_chunked(da, length, func, chunksize):
+    # func(start, stop) returns the samples [start, stop) along axis 0
+    rows = max(chunksize // max(int(np.prod(da.shape[1:])), 1), 1)
+    for start in range(0, length, rows):
+        stop = min(start + rows, length)
+        da[start:stop] = func(start, stop)
 
 
-def create_1d_sampled(block):
-    dt = 0.001
-    time = np.arange(500000) * dt
-    data = np.random.randn(len(time)) * 0.1 + np.sin(2*np.pi*time) * \
-        (np.sin(2 * np.pi * time * 0.0125) * 0.2)
-    da2 = block.create_data_array("long 1d data", "test",
-                                  dtype=nix.DataType.Double, data=data)
+def create_1d_sampled(block, length=500000, dt=0.001, rng=None,
+                      chunksize=CHUNKSIZE, name="long 1d data"):
+    rng = _rng(rng)
+
+    def signal(start, stop):
+        time = np.arange(start, stop) * dt
+        return rng.randn(stop - start) * 0.1 + np.sin(2*np.pi*time) * \
+            (np.sin(2 * np.pi * time * 0.0125) * 0.2)
+
+    da2 = block.create_data_array(name, "test", dtype=nix.DataType.Double,
+                                  shape=(length,))
+    _write_chunked(da2, length, signal, chunksize)
     da2.label = "intensity"
     da2.unit = "V"
     sd = da2.append_sampled_dimension(dt)
     sd.label = "time"
     sd.unit = "s"
+    return da2
 
 
-def create_1d_range(block):
+def create_1d_range(block, rng=None):
     times = np.linspace(0.0, 10., 25)
     values = np.sin(np.pi * 2 * times/2)
     range_da = block.create_data_array("1-d range data", "test",
@@ -28,20 +57,26 @@ def create_1d_range(block):
     rd = range_da.append_range_dimension(times)
     rd.label = "time"
     rd.unit = "s"
+    return range_da
 
 
-def create_1d_event(block):
+def create_1d_event(block, rng=None):
+    rng = _rng(rng)
     times = np.linspace(0.0, 10., 25)
-    times = times + np.random.randn(len(times)) * 0.05
+    times = times + rng.randn(len(times)) * 0.05
     alias_range_da = block.create_data_array("1d event data", "test",
                                              dtype=nix.DataType.Double,
                                              data=times)
-    alias_range_da.append_alias_range_dimension()
+    if hasattr(alias_range_da, "append_range_dimension_using_self"):
+        alias_range_da.append_range_dimension_using_self()
+    else:
+        alias_range_da.append_alias_range_dimension()
     alias_range_da.label = "time"
     alias_range_da.unit = "ms"
+    return alias_range_da
 
 
-def create_1d_category(block):
+def create_1d_category(block, rng=None):
     months = np.arange(0., 12., 1.)
     temperatures = np.sin(np.pi * 2 * months/12 + 7) * 25.
     labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep",
@@ -53,9 +88,10 @@ def create_1d_category(block):
     set_data.unit = "K"
     sd = set_data.append_set_dimension()
     sd.labels = labels
+    return set_data
 
 
-def create_2d_category(block):
+def create_2d_category(block, rng=None):
     months = np.arange(0., 12., 1.)
     places = ["A", "B", "C"]
     temperatures = np.sin(np.pi * 2 * months/12 + 7) * 25.
@@ -66,30 +102,38 @@ def create_2d_category(block):
                                       dtype=nix.DataType.Double,
                                       data=values)
     sd = sets_da.append_set_dimension()
-    sd.labels = months
+    sd.labels = [str(m) for m in months]
     sd = sets_da.append_set_dimension()
     sd.labels = places
+    return sets_da
 
 
-def create_2d_sampled_set(block):
-    dt = 0.001
-    data = np.zeros((10000, 5))
-    time = np.arange(10000) * dt
-    for i in range(5):
-        data[:, i] = np.sin(2*np.pi*time+np.random.randn(1)*np.pi)
-    da = block.create_data_array("2d sampled-set", "test", data=data,
-                                 dtype=nix.DataType.Double)
+def create_2d_sampled_set(block, length=10000, channels=5, dt=0.001,
+                          rng=None, chunksize=CHUNKSIZE,
+                          name="2d sampled-set"):
+    rng = _rng(rng)
+    phases = rng.randn(channels) * np.pi
+
+    def signal(start, stop):
+        time = np.arange(start, stop) * dt
+        return np.sin(2*np.pi*time[:, np.newaxis] + phases)
+
+    da = block.create_data_array(name, "test", dtype=nix.DataType.Double,
+                                 shape=(length, channels))
+    _write_chunked(da, length, signal, chunksize)
     da.label = "voltage"
     da.unit = "mV"
     da.append_sampled_dimension(dt)
     da.append_set_dimension()
     da.dimensions[0].unit = "s"
     da.dimensions[0].label = "time"
+    return da
 
 
-def create_2d_range_set(block):
+def create_2d_range_set(block, rng=None):
+    rng = _rng(rng)
     times = np.linspace(0.0, 10., 25)
-    values = np.random.randn(len(times), 5)
+    values = rng.randn(len(times), 5)
     for i in range(5):
         values[:, i] += np.linspace(0.0, 3.0 * i, len(times))
     range_recordings = block.create_data_array("2d range data", "test",
@@ -101,55 +145,212 @@ def create_2d_range_set(block):
     labels = ["V-1", "V-2", "V-3", "V-4", "V-5"]
     sd = range_recordings.append_set_dimension()
     sd.labels = labels
+    return range_recordings
+
+
+def _gaussian(x, y, mean, cov):
+    # bivariate normal density, evaluated on a grid
+    inv = np.linalg.inv(cov)
+    dx, dy = x - mean[0], y - mean[1]
+    expo = inv[0, 0] * dx**2 + (inv[0, 1] + inv[1, 0]) * dx * dy + \
+        inv[1, 1] * dy**2
+    return np.exp(-0.5 * expo) / (2 * np.pi * np.sqrt(np.linalg.det(cov)))
 
 
-def create_2d_sampled_sampled(block):
-    delta = 0.025
-    x = y = np.arange(-3.0, 3.0, delta)
-    X, Y = np.meshgrid(x, y)
-    pos = np.dstack((X, Y))
-    rv1 = multivariate_normal([0.5, -0.2], [[2.0, 0.3], [0.3, 0.5]])
-    rv2 = multivariate_normal([0.5, -0.2], [[1.0, 1.7], [0.5, 0.5]])
-    z1 = rv1.pdf(pos)
-    z2 = rv2.pdf(pos)
-    z = z1 - z2
+def create_2d_sampled_sampled(block, size=240, rng=None,
+                              chunksize=CHUNKSIZE):
+    delta = 6.0 / size
+    axis = np.arange(size) * delta - 3.0
+    cov1 = np.array([[2.0, 0.3], [0.3, 0.5]])
+    cov2 = np.array([[1.0, 0.6], [0.6, 0.5]])
+
+    def difference(start, stop):
+        x, y = np.meshgrid(axis, axis[start:stop])
+        return _gaussian(x, y, [0.5, -0.2], cov1) - \
+            _gaussian(x, y, [0.5, -0.2], cov2)
 
     da = block.create_data_array("difference of Gaussians", "nix.2d.heatmap",
-                                 data=z)
+                                 dtype=nix.DataType.Double,
+                                 shape=(size, size))
+    _write_chunked(da, size, difference, chunksize)
     d1 = da.append_sampled_dimension(delta)
     d1.label = "x"
     d1.offset = -3.
     d2 = da.append_sampled_dimension(delta)
     d2.label = "y"
     d2.offset = -3.
+    return da
+
 
+def create_3d_image(block, height=512, width=512, rng=None,
+                    chunksize=CHUNKSIZE):
+    # synthetic RGB test image: colour gradients, rings and a little noise
+    rng = _rng(rng)
 
-def create_3d_image(block):
-    image = img.open('lena.bmp')
-    img_data = np.array(image)
-    channels = list(image.mode)
-    image_da = block.create_data_array("lena", "nix.image.rgb", data=img_data)
+    def image(start, stop):
+        y, x = np.mgrid[start:stop, 0:width]
+        y = y / float(height)
+        x = x / float(width)
+        r = np.hypot(x - 0.5, y - 0.5)
+        rings = 0.5 + 0.5 * np.cos(40 * np.pi * r)
+        rgb = np.stack((x, y, rings), axis=-1) * 225 + \
+            rng.randint(0, 30, (stop - start, width, 3))
+        return rgb.astype(np.uint8)
+
+    image_da = block.create_data_array("test image", "nix.image.rgb",
+                                       dtype=nix.DataType.UInt8,
+                                       shape=(height, width, 3))
+    _write_chunked(image_da, height, image, chunksize)
     height_dim = image_da.append_sampled_dimension(1)
     height_dim.label = "height"
     width_dim = image_da.append_sampled_dimension(1)
     width_dim.label = "width"
     color_dim = image_da.append_set_dimension()
-    color_dim.labels = channels
+    color_dim.labels = ["R", "G", "B"]
+    return image_da
+
+
+def create_many_arrays(block, count, length=1000, dt=0.001, rng=None,
+                       chunksize=CHUNKSIZE):
+    return [create_1d_sampled(block, length, dt, rng, chunksize,
+                              name="sampled %i" % i) for i in range(count)]
+
+
+def create_tags(block, count, references, duration, rng=None):
+    '''
+    Tags with random position and extent within [0, duration), plus one
+    MultiTag holding the same epochs.
+    '''
+    rng = _rng(rng)
+    positions = np.sort(rng.uniform(0, duration, count))
+    extents = rng.uniform(0, duration / max(count, 1), count)
+    tags = []
+    for i in range(count):
+        tag = block.create_tag("tag %i" % i, "test.epoch",
+                               position=[positions[i]])
+        tag.extent = [extents[i]]
+        tag.units = ["s"]
+        for ref in references:
+            tag.references.append(ref)
+        tags.append(tag)
+    pos_da = block.create_data_array("epoch positions", "test.positions",
+                                     data=positions)
+    ext_da = block.create_data_array("epoch extents", "test.extents",
+                                     data=extents)
+    mtag = block.create_multi_tag("epochs", "test.epochs", positions=pos_da)
+    mtag.extents = ext_da
+    mtag.units = ["s"]
+    for ref in references:
+        mtag.references.append(ref)
+    return tags, mtag
 
 
-def create_test_data():
-    f = nix.File.open("test.nix", nix.FileMode.Overwrite)
+def create_data_frame(block, rows, rng=None, chunksize=CHUNKSIZE,
+                      name="events"):
+    rng = _rng(rng)
+    # one stream per random column, independent of the chunk size
+    channel_rng, amplitude_rng = [np.random.RandomState(s) for s in
+                                  rng.randint(0, 2**31 - 1, 2)]
+    dtype = np.dtype([("time", np.float64), ("trial", np.int64),
+                      ("channel", np.int32), ("amplitude", np.float64)])
+    df = block.create_data_frame(name, "test.events",
+                                 col_dict=dict((n, dtype[n])
+                                               for n in dtype.names))
+    step = max(chunksize // len(dtype.names), 1)
+    for start in range(0, rows, step):
+        stop = min(start + step, rows)
+        chunk = np.empty(stop - start, dtype=dtype)
+        chunk["time"] = np.arange(start, stop) * 0.001
+        chunk["trial"] = np.arange(start, stop) // 1000
+        chunk["channel"] = channel_rng.randint(0, 64, stop - start)
+        chunk["amplitude"] = amplitude_rng.randn(stop - start)
+        df.append(chunk)
+    return df
+
+
+def create_data_frames(block, count, rows=1000, rng=None,
+                       chunksize=CHUNKSIZE):
+    return [create_data_frame(block, rows, rng, chunksize,
+                              name="events %i" % i) for i in range(count)]
+
+
+def create_test_data(filename="test.nix", length=500000, channels=5,
+                     multichannel_length=10000, arrays=0, array_length=1000,
+                     tags=0, frames=0, rows=1000, image_size=512, seed=42,
+                     chunksize=CHUNKSIZE):
+    '''
+    Create a NIX file with one of each kind of test data, optionally scaled
+    up. The defaults give the classic small test file.
+
+    :param filename: Path of the file, overwritten if it exists
+    :type filename: str
+    :param length: Samples of the long 1D sampled array
+    :type length: int
+    :param channels: Channels of the 2D sampled-set array
+    :type channels: int
+    :param multichannel_length: Samples per channel of the 2D array
+    :type multichannel_length: int
+    :param arrays: Number of additional 1D sampled arrays
+    :type arrays: int
+    :param array_length: Samples of each additional array
+    :type array_length: int
+    :param tags: Number of tags on the long 1D array, also stored as one
+                 MultiTag
+    :type tags: int
+    :param frames: Number of DataFrames
+    :type frames: int
+    :param rows: Rows of each DataFrame
+    :type rows: int
+    :param image_size: Height and width of the RGB image
+    :type image_size: int
+    :param seed: Seed of the random generator
+    :type seed: int
+    :param chunksize: Maximum number of samples written at once
+    :type chunksize: int
+    '''
+    rng = np.random.RandomState(seed)
+    f = nix.File.open(filename, nix.FileMode.Overwrite)
     b = f.create_block("test", "test")
-    create_1d_sampled(b)
-    create_1d_range(b)
-    create_1d_event(b)
-    create_1d_category(b)
-    create_2d_range_set(b)
-    create_2d_sampled_sampled(b)
-    create_2d_sampled_set(b)
-    create_3d_image(b)
+    long_da = create_1d_sampled(b, length, rng=rng, chunksize=chunksize)
+    create_1d_range(b, rng)
+    create_1d_event(b, rng)
+    create_1d_category(b, rng)
+    create_2d_range_set(b, rng)
+    create_2d_sampled_sampled(b, rng=rng, chunksize=chunksize)
+    create_2d_sampled_set(b, multichannel_length, channels, rng=rng,
+                          chunksize=chunksize)
+    create_3d_image(b, image_size, image_size, rng, chunksize)
+    create_many_arrays(b, arrays, array_length, rng=rng, chunksize=chunksize)
+    if tags:
+        create_tags(b, tags, [long_da], length * 0.001, rng)
+    create_data_frames(b, frames, rows, rng, chunksize)
     f.close()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a NIX test file.")
+    parser.add_argument("-o", "--output", default="test.nix")
+    parser.add_argument("--length", type=float, default=500000,
+                        help="samples of the long 1D array")
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--multichannel-length", type=float, default=10000)
+    parser.add_argument("--arrays", type=int, default=0,
+                        help="number of additional sampled arrays")
+    parser.add_argument("--array-length", type=float, default=1000)
+    parser.add_argument("--tags", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=0,
+                        help="number of DataFrames")
+    parser.add_argument("--rows", type=float, default=1000)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=float, default=CHUNKSIZE)
+    args = parser.parse_args(argv)
+    create_test_data(args.output, int(args.length), args.channels,
+                     int(args.multichannel_length), args.arrays,
+                     int(args.array_length), args.tags, args.frames,
+                     int(args.rows), args.image_size, args.seed,
+                     int(args.chunksize))
+
+
 if __name__ == "__main__":
-    create_test_data()
+    main()
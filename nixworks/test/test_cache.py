@@ -0,0 +1,110 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import ResizeEvent
+from nixworks.plotter import cache, LinePlotter
+from nixworks.profiling import profiling
+
+
+class TestWindowCache(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "c.nix"
+        self.copyname = "c_copy.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        self.data = np.random.randn(10000)
+        self.da = self.block.create_data_array("test_da", "da",
+                                               data=self.data)
+        self.da.append_sampled_dimension(0.01)
+
+    def tearDown(self):
+        self.file.close()
+        if os.path.exists(self.copyname):
+            os.remove(self.copyname)
+
+    def test_decimate(self):
+        dec = cache.decimate(self.data, 100)
+        assert len(dec) == 200
+        assert dec[0] == self.data[:100].min()
+        assert dec[1] == self.data[:100].max()
+        assert dec.max() == self.data.max()
+
+    def test_fetch(self):
+        wc = cache.WindowCache()
+        x, y = wc.fetch(self.da, 0, 1000)
+        assert np.array_equal(y, self.data[:1000])
+        assert np.allclose(x, np.arange(1000) * 0.01)
+        wc.fetch(self.da, 0, 1000)
+        assert wc.misses == 1 and wc.hits == 1
+        x, y = wc.fetch(self.da, 0, 10000, maxpoints=500)
+        assert len(y) <= 500 and len(x) == len(y)
+
+    def test_copied_file(self):
+        wc = cache.WindowCache()
+        wc.fetch(self.da, 0, 1000)
+        # a copy of the file keeps the ids but not the data
+        copy = nix.File.open(self.copyname, nix.FileMode.Overwrite)
+        group = self.block._h5group.group
+        group.file.copy(group, copy._h5group.group["data"])
+        da = copy.blocks[0].data_arrays["test_da"]
+        da.write_direct(np.zeros(len(self.data)))
+        assert da.id == self.da.id
+        x, y = wc.fetch(da, 0, 1000)
+        assert wc.misses == 2 and not y.any()
+        copy.close()
+
+    def test_bounded_read(self):
+        wc = cache.WindowCache(blocksize=8 * 1000)
+        with profiling.profile(trace=True) as stats:
+            x, y = wc.fetch(self.da, 0, 10000, maxpoints=300)
+        reads = [e["args"]["elements"] for e in stats.events
+                 if e["name"] == "WindowCache.read"]
+        factor = wc.decimation_factor(10000, 300)
+        # whole bins of at most blocksize bytes per read
+        assert max(reads) <= 1000 and sum(reads) == 10000
+        assert all(n % factor == 0 for n in reads[:-1])
+        assert np.array_equal(y, cache.decimate(self.data, factor))
+        assert np.allclose(x[::2], np.arange(0, 10000, factor) * 0.01)
+        assert len(x) == len(y) <= 300
+        # 2D, samples along the second axis
+        data = np.random.randn(3, 10000)
+        da = self.block.create_data_array("multi", "da", data=data)
+        da.append_set_dimension()
+        da.append_sampled_dimension(0.01)
+        x, y = wc.fetch(da, 0, 10000, xdim=1, maxpoints=300)
+        assert np.array_equal(y, cache.decimate(data.T, factor))
+
+    def test_index_range(self):
+        dim = self.da.dimensions[0]
+        assert cache.index_range(dim, 1., 2., 10000) == (100, 201)
+        assert cache.index_range(dim, -5., 500., 10000) == (0, 10000)
+
+    def test_point_budget(self):
+        fig = plt.figure(figsize=(6, 3), dpi=100)
+        axis = fig.add_axes([0., 0., 0.5, 1.])
+        assert cache.point_budget(axis) == 600
+        fig.set_dpi(200)
+        assert cache.point_budget(axis) == 1200
+        plt.close(fig)
+
+    def test_adaptive_line_plot(self):
+        fig = plt.figure(figsize=(3, 2), dpi=100)
+        axis = fig.add_axes([0., 0., 1., 1.])
+        plotter = LinePlotter(self.da)
+        plotter.plot(axis=axis)
+        assert plotter.budget == 600
+        y = plotter.lines[0].get_ydata()
+        assert len(y) <= 600 and y.max() == self.data.max()
+        # zoomed in far enough, the samples are drawn as they are
+        axis.set_xlim(10., 12.)
+        y = plotter.lines[0].get_ydata()
+        assert np.array_equal(y, self.data[1000:1201])
+        axis.set_xlim(0., 100.)
+        fig.set_size_inches(12, 2)
+        ResizeEvent("resize_event", fig.canvas)._process()
+        assert plotter.budget == 2400
+        assert 600 < len(plotter.lines[0].get_ydata()) <= 2400
+        plt.close(fig)
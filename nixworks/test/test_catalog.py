@@ -0,0 +1,83 @@
+import os
+import shutil
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.catalog import Catalog
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = "catalog_test"
+        os.makedirs(os.path.join(self.directory, "sub"), exist_ok=True)
+        for i, (unit, length) in enumerate([("mV", 5000), ("mV", 500),
+                                            ("s", 5000)]):
+            name = os.path.join(self.directory, "sub" if i else "",
+                                "f%i.nix" % i)
+            f = nix.File.open(name, nix.FileMode.Overwrite)
+            b = f.create_block("block", "test")
+            da = b.create_data_array("voltage", "test.sampled",
+                                     data=np.zeros(length))
+            da.unit = unit
+            da.append_sampled_dimension(0.01).unit = "s"
+            tag = b.create_tag("stimulus", "test.tag", [1.0])
+            tag.references.append(da)
+            b.create_data_frame("events", "test.events",
+                                col_dict={"time": float, "trial": int},
+                                data=[(0.5, 1)])
+            f.close()
+        self.dbname = os.path.join(self.directory, "catalog.sqlite")
+        self.catalog = Catalog(self.dbname)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.directory)
+
+    def test_scan(self):
+        assert self.catalog.scan(self.directory, workers=2) == (3, 0, 0)
+        assert self.catalog.scan(self.directory) == (0, 3, 0)
+        name = os.path.join(self.directory, "sub", "f2.nix")
+        f = nix.File.open(name, nix.FileMode.ReadWrite)
+        f.blocks[0].create_data_array("extra", "test", data=np.ones(10))
+        f.close()
+        os.remove(os.path.join(self.directory, "sub", "f1.nix"))
+        assert self.catalog.scan(self.directory, workers=0) == (1, 1, 1)
+        assert len(self.catalog.query_arrays(name="extra")) == 1
+        assert len(self.catalog.files(errors=True)) == 0
+
+    def test_duration_units(self):
+        name = os.path.join(self.directory, "sub", "f3.nix")
+        f = nix.File.open(name, nix.FileMode.Overwrite)
+        da = f.create_block("block", "test").create_data_array(
+            "voltage", "test.sampled", data=np.zeros(3000))
+        da.unit = "mV"
+        da.append_sampled_dimension(1.).unit = "ms"
+        f.close()
+        self.catalog.scan(self.directory, workers=0)
+        rows = self.catalog.query_arrays(path="%f3.nix")
+        assert rows[0]["duration"] == 3. and rows[0]["x_unit"] == "ms"
+        rows = self.catalog.query_arrays(min_duration=10)
+        assert not any(r["path"].endswith("f3.nix") for r in rows)
+        rows = self.catalog.query_arrays(max_duration=4)
+        assert len(rows) == 1 and rows[0]["path"].endswith("f3.nix")
+        # catalogs of older versions are scanned again
+        self.catalog.db.execute("PRAGMA user_version = 0")
+        self.catalog.close()
+        self.catalog = Catalog(self.dbname)
+        assert self.catalog.scan(self.directory)[0] == 4
+
+    def test_query(self):
+        self.catalog.scan(self.directory, workers=0)
+        rows = self.catalog.query_arrays(unit="mV", dimension="sample",
+                                         min_duration=10, tag="stimulus")
+        assert len(rows) == 1 and rows[0]["path"].endswith("f0.nix")
+        assert rows[0]["duration"] == 50.
+        da = self.catalog.load(rows[0])
+        assert isinstance(da, nix.DataArray) and len(da) == 5000
+        assert len(self.catalog.query_arrays(tag="other")) == 0
+        frames = self.catalog.query_data_frames(column="trial")
+        assert len(frames) == 3
+        assert isinstance(self.catalog.load(frames[0]), nix.DataFrame)
+        tags = self.catalog.query_tags(kind="tag")
+        assert isinstance(self.catalog.load(tags[0]), nix.Tag)
@@ -0,0 +1,41 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.test import create_testfile
+
+
+class TestCreateTestfile(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilenames = ["testfile1.nix", "testfile2.nix"]
+        for name, chunksize in zip(self.testfilenames, [1000, 777]):
+            create_testfile.create_test_data(
+                name, length=5000, channels=3, multichannel_length=2000,
+                arrays=4, array_length=100, tags=10, frames=2, rows=2500,
+                image_size=32, chunksize=chunksize)
+        self.files = [nix.File.open(n, nix.FileMode.ReadOnly)
+                      for n in self.testfilenames]
+
+    def tearDown(self):
+        for f in self.files:
+            f.close()
+        for name in self.testfilenames:
+            os.remove(name)
+
+    def test_content(self):
+        block = self.files[0].blocks[0]
+        assert block.data_arrays["long 1d data"].shape == (5000,)
+        assert block.data_arrays["2d sampled-set"].shape == (2000, 3)
+        assert block.data_arrays["test image"].shape == (32, 32, 3)
+        assert len(block.tags) == 10
+        assert len(block.multi_tags[0].positions) == 10
+        assert len(block.data_frames) == 2
+        assert block.data_frames[0].shape == (2500,)
+
+    def test_reproducible(self):
+        first, second = [f.blocks[0] for f in self.files]
+        for da1, da2 in zip(first.data_arrays, second.data_arrays):
+            assert np.array_equal(da1[:], da2[:])
+        assert np.array_equal(first.data_frames[1][:],
+                              second.data_frames[1][:])
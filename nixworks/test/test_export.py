@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.export import export
+
+try:
+    import dask
+except ImportError:
+    dask = None
+try:
+    import xarray
+except ImportError:
+    xarray = None
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "e.nix"
+        self.copyname = "e_copy.nix"
+        f = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        b = f.create_block("test_block", "abc")
+        self.data = np.random.randn(20000, 3)
+        da = b.create_data_array("test_da", "da", data=self.data)
+        da.unit = "mV"
+        dim = da.append_sampled_dimension(0.01, label="time", unit="s")
+        dim.offset = 1.0
+        da.append_set_dimension(labels=["a", "b", "c"])
+        b.create_data_frame("test_df", "df",
+                            col_dict={"time": float, "name": str, "n": int},
+                            data=[(i * 0.1, "x%i" % (i % 3), i)
+                                  for i in range(1000)])
+        f.close()
+        # readers in other processes need the file to be closed for writing
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadOnly)
+        self.da = self.file.blocks[0].data_arrays[0]
+        self.df = self.file.blocks[0].data_frames[0]
+
+    def tearDown(self):
+        export.close_files()
+        self.file.close()
+        if os.path.exists(self.copyname):
+            os.remove(self.copyname)
+
+    def test_aligned_chunks(self):
+        assert export.aligned_chunks((1000, 3), (64, 1), 8, 64 * 8 * 2) == \
+            (128, 1)
+        assert export.aligned_chunks((1000, 3), (64, 1), 8, 2**20) == \
+            (1000, 3)
+        assert export.aligned_chunks((10,), None, 8) == (10,)
+
+    @unittest.skipIf(dask is None, "dask is not installed")
+    def test_dask_array(self):
+        x = export.to_dask_array(self.da, blocksize=2**14)
+        h5chunks = self.da._h5group.group["data"].chunks
+        assert all(c % h5chunks[0] == 0 for c in x.chunks[0][:-1])
+        mean = x.mean(axis=0).compute(scheduler="processes")
+        assert np.allclose(mean, self.data.mean(axis=0))
+        assert np.array_equal(x[100:200, 1].compute(), self.data[100:200, 1])
+
+    @unittest.skipIf(dask is None, "dask is not installed")
+    def test_dask_views(self):
+        a = export.to_dask_array(self.da, chunks=(100, 3))
+        b = export.to_dask_array(self.da, chunks=(250, 1))
+        assert a.name != b.name
+        assert a.name == export.to_dask_array(self.da, chunks=(100, 3)).name
+        assert (a - b).sum().compute() == 0.
+        # a copy of the file keeps the ids but not the data
+        copy = nix.File.open(self.copyname, nix.FileMode.Overwrite)
+        group = self.file.blocks[0]._h5group.group
+        group.file.copy(group, copy._h5group.group["data"])
+        da = copy.blocks[0].data_arrays[self.da.id]
+        da.write_direct(np.zeros(self.data.shape))
+        copy.close()
+        copy = nix.File.open(self.copyname, nix.FileMode.ReadOnly)
+        c = export.to_dask_array(copy.blocks[0].data_arrays[self.da.id])
+        diff = (export.to_dask_array(self.da) - c).sum().compute()
+        assert np.isclose(diff, self.data.sum())
+        copy.close()
+        export.close_files()
+
+    @unittest.skipIf(dask is None, "dask is not installed")
+    def test_dask_dataframe(self):
+        ddf = export.to_dask_dataframe(self.df, rows=300)
+        assert ddf.npartitions == 4
+        assert ddf.divisions == (0, 300, 600, 900, 999)
+        sums = ddf.groupby("name").n.sum().compute(scheduler="processes")
+        assert sums["x0"] == sum(range(0, 1000, 3))
+        assert list(ddf.loc[299:300].compute().n) == [299, 300]
+
+    @unittest.skipIf(xarray is None, "xarray is not installed")
+    def test_xarray(self):
+        from nixworks.export import to_xarray
+        from nixworks.profiling import profiling
+        x = to_xarray(self.da)
+        assert x.dims == ("time", "dim_1")
+        assert x.attrs["units"] == "mV"
+        assert x.time.attrs["units"] == "s"
+        assert list(x.dim_1.values) == ["a", "b", "c"]
+        with profiling.profile() as stats:
+            sel = x.sel(time=slice(2.0, 2.1), dim_1="b")
+            values = sel.values
+        assert stats.records["EntityReader.read"]["elements"] == 11
+        assert np.allclose(values, self.data[100:111, 1])
+        assert np.allclose(sel.time.values, 2.0 + np.arange(11) * 0.01)
+        assert float(x.sel(time=3.004, dim_1="c")) == self.data[200, 2]
+        assert x[5].shape == (3,)
+        assert np.array_equal(x[5].values, self.data[5])
+        mean = to_xarray(self.da, dask=True).mean("time").values
+        assert np.allclose(mean, self.data.mean(axis=0))
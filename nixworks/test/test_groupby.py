@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+import nixio as nix
+import unittest
+from nixworks.table import groupby
+
+
+class TestGroupBy(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "groupby.nix"
+        rng = np.random.default_rng(0)
+        n = 20000
+        self.pd_df = pd.DataFrame({
+            "condition": np.array(["a", "b", "c"])[rng.integers(0, 3, n)],
+            "trial": rng.integers(0, 4, n),
+            "amplitude": rng.normal(5., 2., n)})
+        self.pd_df.loc[::100, "amplitude"] = np.nan
+        f = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        b = f.create_block("test_block", "abc")
+        b.create_data_frame("trials", "df",
+                            col_dict={"condition": str, "trial": int,
+                                      "amplitude": float},
+                            data=list(self.pd_df.itertuples(index=False)))
+        f.close()
+        # workers in other processes need the file to be closed for writing
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadOnly)
+        self.df = self.file.blocks[0].data_frames[0]
+
+    def tearDown(self):
+        self.file.close()
+        os.remove(self.testfilename)
+
+    def test_aggregate(self):
+        aggregates = list(groupby.AGGREGATES)
+        expected = self.pd_df.groupby("condition")[["trial", "amplitude"]] \
+            .agg(aggregates)
+        for kwargs in ({"workers": 0}, {"workers": 2},
+                       {"workers": 2, "processes": False}):
+            result = groupby.aggregate(self.df, "condition",
+                                       aggregates=aggregates, rows=3000,
+                                       **kwargs)
+            assert list(result.columns) == list(expected.columns)
+            assert list(result.index) == ["a", "b", "c"]
+            assert np.allclose(result.to_numpy(dtype=float),
+                               expected.to_numpy(dtype=float))
+
+    def test_two_keys(self):
+        result = groupby.aggregate(self.df, ["condition", "trial"],
+                                   ["amplitude"], ["mean", "var"],
+                                   rows=7000, workers=0)
+        expected = self.pd_df.groupby(["condition", "trial"]) \
+            .amplitude.agg(["mean", "var"])
+        assert len(result) == 12
+        assert np.allclose(result["amplitude"].to_numpy(),
+                           expected.to_numpy())
+        with self.assertRaises(ValueError):
+            groupby.aggregate(self.df, "condition", ["missing"])
+        with self.assertRaises(ValueError):
+            groupby.aggregate(self.df, "condition", aggregates=["median"])
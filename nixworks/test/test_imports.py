@@ -0,0 +1,35 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY = ["matplotlib", "IPython", "ipywidgets"]
+
+
+def loaded_modules(statement):
+    code = "import sys\n%s\nprint(' '.join(sys.modules))" % statement
+    out = subprocess.check_output([sys.executable, "-c", code])
+    return set(out.decode().split())
+
+
+class TestImports(unittest.TestCase):
+
+    def test_table_is_headless(self):
+        modules = loaded_modules("import nixworks\n"
+                                 "from nixworks.table import table\n"
+                                 "from nixworks.stats import stats")
+        for name in HEAVY:
+            assert name not in modules
+
+    def test_lazy_attributes(self):
+        modules = loaded_modules("import nixworks\nnixworks.interactor")
+        assert "matplotlib" in modules
+        assert "ipywidgets" not in modules
+        modules = loaded_modules("import nixworks.plotter as p\n"
+                                 "p.interactor.Interactor\n"
+                                 "p.plotter.LinePlotter")
+        assert "nixworks.plotter.interactor" in modules
+
+    def test_private_probe_is_headless(self):
+        modules = loaded_modules("import nixworks.plotter\n"
+                                 "hasattr(nixworks.plotter, '__wrapped__')")
+        assert "matplotlib" not in modules
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.table import index
+
+
+class TestColumnIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "index.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        rng = np.random.default_rng(0)
+        self.time = np.sort(rng.random(5000) * 100)
+        self.value = rng.integers(0, 20, 5000)
+        self.names = np.array(["c%i" % i for i in rng.integers(0, 5, 5000)])
+        self.df = self.block.create_data_frame(
+            "events", "df", col_dict={"time": float, "name": str, "v": int},
+            data=list(zip(self.time, self.names, self.value)))
+
+    def tearDown(self):
+        self.file.close()
+        os.remove(self.testfilename)
+
+    def test_lookup(self):
+        # several runs are merged on disk
+        by_time = index.create_index(self.df, "time", chunkrows=700)
+        by_value = index.create_index(self.df, "v", chunkrows=700)
+        by_name = index.create_index(self.df, "name", chunkrows=700)
+        assert index.indexed_columns(self.df) == ["name", "time", "v"]
+        assert np.all(np.diff(by_value.keys[:]) >= 0)
+        expected = np.nonzero((self.time >= 10) & (self.time <= 20))[0]
+        assert np.array_equal(by_time.rows(10, 20), expected)
+        assert np.array_equal(by_value.rows(3, 3),
+                              np.nonzero(self.value == 3)[0])
+        assert np.array_equal(by_value.rows(None, 2),
+                              np.nonzero(self.value <= 2)[0])
+        assert np.array_equal(by_name.rows("c1", "c1"),
+                              np.nonzero(self.names == "c1")[0])
+        selected = by_name.select("c4", "c4")
+        assert list(selected.index) == list(np.nonzero(self.names == "c4")[0])
+        assert set(selected.name) == {"c4"}
+        assert len(by_time.select(200, None)) == 0
+        with self.assertRaises(ValueError):
+            index.create_index(self.df, "missing")
+
+    def test_append(self):
+        by_time = index.create_index(self.df, "time")
+        by_value = index.create_index(self.df, "v")
+        self.df.append_rows([(150., "c0", 3), (160., "c1", 3)])
+        # rows not indexed yet are scanned
+        assert by_time.stale == 2
+        assert list(by_time.rows(140, None)) == [5000, 5001]
+        index.append_rows(self.df, [(170., "c2", 3), (5., "c3", 3)])
+        by_time = index.ColumnIndex(self.df, "time")
+        by_value = index.ColumnIndex(self.df, "v")
+        assert by_time.stale == 0 and len(by_value) == 5004
+        assert np.all(np.diff(by_time.keys[:]) >= 0)
+        expected = list(np.nonzero(self.value == 3)[0]) + \
+            [5000, 5001, 5002, 5003]
+        assert list(by_value.rows(3, 3)) == expected
+        assert 5003 in by_time.rows(4.9, 5.1)
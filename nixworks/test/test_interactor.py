@@ -0,0 +1,154 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from nixworks.plotter.interactor import Interactor, LinkedInteractor
+from nixworks.plotter.interactor import TagOverlay
+
+
+class TestTagOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "overlay.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        self.da = self.block.create_data_array("test_da", "da",
+                                               data=np.random.randn(1000))
+        self.da.append_sampled_dimension(0.01)
+        self.area = self.block.create_tag("area", "tag", [1.])
+        self.area.extent = [0.5]
+        self.area.references.append(self.da)
+        self.point = self.block.create_tag("point", "tag", [4.])
+        self.point.references.append(self.da)
+        positions = self.block.create_data_array("positions", "pos",
+                                                 data=[2., 5., 8.])
+        extents = self.block.create_data_array("extents", "ext",
+                                               data=[0.1, 0.2, 0.3])
+        self.mtag = self.block.create_multi_tag("events", "mtag", positions)
+        self.mtag.extents = extents
+        self.mtag.references.append(self.da)
+        self.fig = plt.figure()
+        self.axis = self.fig.add_subplot(111)
+
+    def tearDown(self):
+        plt.close("all")
+        self.file.close()
+        os.remove(self.testfilename)
+
+    @staticmethod
+    def _starts(collection):
+        return sorted(p.vertices[0, 0] for p in collection.get_paths())
+
+    def test_artists(self):
+        overlay = TagOverlay(self.axis)
+        overlay.add([self.area, self.point, self.mtag])
+        overlay.draw()
+        assert sorted(overlay._artists) == [("multi_tag", "area"),
+                                            ("tag", "area"), ("tag", "point")]
+        assert len(self.axis.collections) == 2
+        assert len(self.axis.lines) == 1
+        mtags = overlay._artists[("multi_tag", "area")]
+        assert isinstance(mtags, PolyCollection)
+        assert np.allclose(self._starts(mtags), [2., 5., 8.])
+        widths = sorted(np.ptp(p.vertices[:, 0]) for p in mtags.get_paths())
+        assert np.allclose(widths, [0.1, 0.2, 0.3])
+        tags = overlay._artists[("tag", "area")].get_paths()
+        assert len(tags) == 1
+        assert np.allclose(tags[0].vertices[[0, 2], 0], [1., 1.5])
+        assert list(overlay._artists[("tag", "point")].get_xdata()) == [4.]
+
+    def test_visibility(self):
+        overlay = TagOverlay(self.axis)
+        overlay.add([self.area, self.point, self.mtag])
+        # the masks exist before the artists are drawn
+        overlay.set_visible(self.mtag, False)
+        overlay.draw()
+        artists = dict(overlay._artists)
+        assert not len(artists[("multi_tag", "area")].get_paths())
+        overlay.set_visible(self.mtag)
+        assert len(artists[("multi_tag", "area")].get_paths()) == 3
+        overlay.set_selection([self.mtag])
+        assert not len(artists[("tag", "area")].get_paths())
+        assert np.ma.count(artists[("tag", "point")].get_xdata()) == 0
+        overlay.set_selection([self.area, self.point])
+        assert len(artists[("tag", "area")].get_paths()) == 1
+        assert not len(artists[("multi_tag", "area")].get_paths())
+        assert np.ma.count(artists[("tag", "point")].get_xdata()) == 1
+        assert overlay._artists == artists
+        assert len(self.axis.collections) == 2
+        assert len(self.axis.lines) == 1
+
+    def test_overlay_tags(self):
+        interactor = Interactor()
+        interactor.arrays = [self.da]
+        overlay = interactor.overlay_tags()
+        assert [t.name for t in overlay.entities] == ["area", "point",
+                                                      "events"]
+        assert len(overlay._artists) == 3
+        # drawing again replaces the previous overlay
+        interactor.overlay_tags()
+        assert len(interactor.ax.collections) == 2
+
+
+class TestLinkedInteractor(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "linked.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        self.arrays = []
+        for name, unit in (("a", "mV"), ("b", "V"), ("c", "Hz")):
+            da = self.block.create_data_array(name, "da", unit=unit,
+                                              data=np.random.randn(5000))
+            da.append_sampled_dimension(0.01, unit="s")
+            self.arrays.append(da)
+        self.image = self.block.create_data_array("img", "image",
+                                                  data=np.zeros((20, 30)))
+        self.image.append_sampled_dimension(1.)
+        self.image.append_sampled_dimension(1.)
+
+    def tearDown(self):
+        plt.close("all")
+        self.file.close()
+        os.remove(self.testfilename)
+
+    def test_group_arrays(self):
+        a, b, c = self.arrays
+        groups = LinkedInteractor.group_arrays([a, self.image, c, b])
+        assert [[da.name for da in g] for g in groups] == \
+            [["a", "b"], ["img"], ["c"]]
+        groups = LinkedInteractor.group_arrays([self.image, self.image])
+        assert len(groups) == 2
+
+    def test_set_window(self):
+        linked = LinkedInteractor()
+        axes = linked.plot(self.arrays + [self.image])
+        assert len(axes) == 3
+        misses = linked.cache.misses
+        linked.set_window(10., 20.)
+        # one read per series, however many panels show them
+        assert linked.cache.misses - misses == 3
+        for ax in axes[:2]:
+            assert ax.get_xlim() == (10., 20.)
+        for _, _, lines in linked._series:
+            x = lines[0].get_xdata()
+            assert x[0] <= 10. and x[-1] >= 20. and len(x) < 5000
+        # moving one panel moves the others and refetches
+        axes[1].set_xlim(30., 40.)
+        assert axes[0].get_xlim() == (30., 40.)
+        assert linked.cache.misses - misses == 6
+        linked.set_window(10., 20.)
+        assert linked.cache.misses - misses == 6
+
+    def test_plot_twice(self):
+        linked = LinkedInteractor()
+        linked.plot(self.arrays[:2])
+        first = linked.fig
+        axes = linked.plot(self.arrays)
+        assert linked.fig is not first
+        assert linked._linked_axis.figure is linked.fig
+        linked.set_window(10., 20.)
+        assert all(ax.get_xlim() == (10., 20.) for ax in axes)
+        assert first.axes[0].get_xlim() != (10., 20.)
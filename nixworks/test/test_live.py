@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+import unittest
+from nixworks.plotter import LiveArray, LivePlotter
+from nixworks.storage import open_swmr
+
+# Acquisition side: nixio cannot create SWMR capable files itself, the
+# latest HDF5 format has to be requested through the file access plist.
+WRITER = '''
+import sys
+import h5py
+import numpy as np
+import nixio as nix
+import nixio.file
+
+
+def make_fapl():
+    fapl = h5py.h5p.create(h5py.h5p.FILE_ACCESS)
+    fapl.set_libver_bounds(h5py.h5f.LIBVER_LATEST, h5py.h5f.LIBVER_LATEST)
+    return fapl
+
+
+nixio.file.make_fapl = make_fapl
+f = nix.File.open(sys.argv[1], nix.FileMode.Overwrite)
+da = f.create_block("block", "test").create_data_array(
+    "signal", "test", data=np.arange(1000, dtype=float))
+da.append_sampled_dimension(0.01)
+ds = da._h5group.group["data"]
+f._h5file.swmr_mode = True
+print("ready", flush=True)
+for line in sys.stdin:
+    n = ds.shape[0]
+    ds.resize((n + 1000,))
+    ds[n:] = np.arange(n, n + 1000)
+    ds.flush()
+    print("written", flush=True)
+f.close()
+'''
+
+
+class TestLive(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "l.nix"
+        self.writer = subprocess.Popen(
+            [sys.executable, "-c", WRITER, self.testfilename],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            universal_newlines=True)
+        assert self.writer.stdout.readline().strip() == "ready"
+        self.file = open_swmr(self.testfilename)
+        self.da = self.file.blocks[0].data_arrays[0]
+
+    def tearDown(self):
+        plt.close("all")
+        self.writer.stdin.close()
+        self.writer.wait()
+        self.file.close()
+        os.remove(self.testfilename)
+
+    def append(self):
+        self.writer.stdin.write("\n")
+        self.writer.stdin.flush()
+        assert self.writer.stdout.readline().strip() == "written"
+
+    def test_live_array(self):
+        live = LiveArray(self.da)
+        assert live.poll() == 0
+        assert live.summary()["count"] == 1000
+        self.append()
+        assert live.poll() == 1000
+        chunks = list(live.read_new(chunksize=300))
+        assert [start for start, _ in chunks] == [1000, 1300, 1600, 1900]
+        data = np.concatenate([c for _, c in chunks])
+        assert np.array_equal(data, np.arange(1000, 2000))
+        summary = live.summary()
+        assert summary["count"] == 2000 and summary["max"] == 1999
+
+    def test_live_plotter(self):
+        plotter = LivePlotter(self.da, maxpoints=500)
+        plotter.plot()
+        for _ in range(3):
+            self.append()
+            assert plotter.refresh() == 1000
+        assert plotter.refresh() == 0
+        x, y = plotter.lines[0].get_data()
+        assert len(y) <= 500 and len(x) == len(y)
+        assert y.min() == 0 and y.max() == 3999
+        assert x[-1] > 39.99 - 0.01 * plotter.trace.factor
+        windowed = LivePlotter(self.da, window=5., maxpoints=500)
+        windowed.plot()
+        x, y = windowed.lines[0].get_data()
+        assert x[0] >= 35. - 0.01 and y.max() == 3999
@@ -0,0 +1,61 @@
+import json
+import os
+import numpy as np
+import nixio as nix
+import matplotlib.pyplot as plt
+import unittest
+from nixworks.plotter import LinePlotter
+from nixworks.profiling import profiling
+from nixworks.table import table
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "p.nix"
+        self.tracefilename = "p.json"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        self.da = self.block.create_data_array("test_da", "da",
+                                               data=np.random.randn(5000))
+        self.da.append_sampled_dimension(0.01)
+
+    def tearDown(self):
+        plt.close("all")
+        self.file.close()
+        if os.path.exists(self.tracefilename):
+            os.remove(self.tracefilename)
+
+    def test_disabled(self):
+        LinePlotter(self.da).plot(maxpoints=1000)
+        assert not profiling.enabled()
+        with profiling.span("nothing") as s:
+            s.count(np.zeros(10))
+
+    def test_profile(self):
+        with profiling.profile(chrome_trace=self.tracefilename) as stats:
+            plotter = LinePlotter(self.da)
+            plotter.plot(maxpoints=1000)
+            plotter.fig.canvas.draw()
+        assert not profiling.enabled()
+        read = stats.records["LinePlotter.read"]
+        assert read["calls"] == 1 and read["elements"] == 1000
+        assert read["bytes"] == 8000 and read["category"] == "read"
+        plot = stats.records["LinePlotter.plot"]
+        # reads are attributed to the calling draw as well
+        assert plot["elements"] == 1000
+        assert plot["self"] <= plot["total"] - read["total"] + 1e-9
+        assert stats.records["Figure.draw"]["category"] == "render"
+        assert set(stats.by_category()) == {"compute", "read", "render"}
+        with open(self.tracefilename) as f:
+            events = json.load(f)["traceEvents"]
+        assert {e["name"] for e in events} == set(stats.records)
+
+    def test_table(self):
+        df = self.block.create_data_frame("df", "df", col_dict={"a": int},
+                                          data=[(i,) for i in range(10)])
+        with profiling.profile() as stats:
+            table.write_to_pandas(df)
+        assert stats.records["write_to_pandas"]["calls"] == 1
+        assert stats.records["write_to_pandas.read"]["elements"] == 10
+        assert "write_to_pandas" in stats.table()
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import unittest
+from unittest import mock
+import nixio as nix
+from nixworks.render import render
+from nixworks.test import create_testfile
+
+
+class TestRender(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = "render_test"
+        self.outdir = os.path.join(self.directory, "out")
+        os.makedirs(os.path.join(self.directory, "sub"), exist_ok=True)
+        self.testfilenames = [os.path.join(self.directory, "r1.nix"),
+                              os.path.join(self.directory, "sub", "r2.nix")]
+        for name in self.testfilenames:
+            create_testfile.create_test_data(
+                name, length=50000, channels=2, multichannel_length=1000,
+                arrays=1, array_length=100, image_size=32)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_render_files(self):
+        entries = render.render_files([self.directory], self.outdir,
+                                      workers=2, maxpoints=500)
+        rendered = [e for e in entries if e["status"] == "rendered"]
+        assert len(rendered) > 10
+        assert not [e for e in entries if e["status"] == "error"]
+        assert all(os.path.exists(e["output"]) for e in rendered)
+        assert os.path.exists(os.path.join(self.outdir, "sub", "r2", "test",
+                                           "long_1d_data.png"))
+        with open(os.path.join(self.outdir, "index.json")) as f:
+            assert len(json.load(f)) == len(entries)
+        assert os.path.exists(os.path.join(self.outdir, "index.html"))
+        # up to date images are skipped, changed files rendered again
+        entries = render.render_files([self.directory], self.outdir,
+                                      workers=0)
+        assert not [e for e in entries if e["status"] == "rendered"]
+        os.utime(self.testfilenames[0])
+        entries = render.render_files([self.directory], self.outdir,
+                                      workers=0)
+        rendered = set(e["file"] for e in entries
+                       if e["status"] == "rendered")
+        assert rendered == {os.path.abspath(self.testfilenames[0])}
+        assert render.main([self.testfilenames[1], "-o", self.outdir,
+                            "-f", "svg", "-j", "0"]) == 0
+        assert os.path.exists(os.path.join(self.outdir, "r2", "test",
+                                           "long_1d_data.svg"))
+        with open(os.path.join(self.outdir, "index.json")) as f:
+            index = json.load(f)
+        formats = set((e["relpath"], e["format"]) for e in index)
+        assert formats == {("r1.nix", "png"), (os.path.join("sub", "r2.nix"),
+                                               "png"), ("r2.nix", "svg")}
+        # the index of the single file run still covers the directory,
+        # no file needs to be opened
+        with mock.patch.object(nix.File, "open", side_effect=AssertionError):
+            entries = render.render_files([self.directory], self.outdir,
+                                          workers=0)
+        assert entries and all(e["status"] in ("skipped", "unsupported")
+                               for e in entries)
+        with open(os.path.join(self.outdir, "index.json")) as f:
+            assert len(json.load(f)) == len(index)
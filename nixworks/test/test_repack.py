@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.repack import chunk_shape, repack
+from nixworks.storage import is_contiguous
+
+
+class TestRepack(unittest.TestCase):
+
+    def setUp(self):
+        self.source = "rp_source.nix"
+        self.destination = "rp_destination.nix"
+        f = nix.File.open(self.source, nix.FileMode.Overwrite)
+        b = f.create_block("test_block", "abc")
+        self.data = np.random.randn(4, 30000)
+        da = b.create_data_array("channels", "da", data=self.data)
+        da.append_set_dimension()
+        da.append_sampled_dimension(0.01)
+        image = b.create_data_array("image", "img",
+                                    data=np.random.rand(300, 200))
+        image.append_sampled_dimension(1.)
+        image.append_sampled_dimension(1.)
+        b.create_data_frame("events", "df",
+                            col_dict={"time": float, "name": str},
+                            data=[(i * 0.1, "e%i" % i) for i in range(500)])
+        section = f.create_section("recording", "meta")
+        da.metadata = section
+        tag = b.create_tag("tag", "t", [1.])
+        tag.references.append(da)
+        f.close()
+
+    def tearDown(self):
+        for name in (self.source, self.destination):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def test_chunk_shape(self):
+        assert chunk_shape((4, 30000), 8, "window", 1, 2**15) == \
+            (4, 1000)
+        assert chunk_shape((4, 30000), 8, "channel", 1, 2**15) == \
+            (1, 3750)
+        assert chunk_shape((300, 200, 3), 1, "tile", 0, 2**15) == \
+            (100, 100, 3)
+        assert chunk_shape((10,), 8, "memmap") is None
+        with self.assertRaises(ValueError):
+            chunk_shape((10,), 8, "random")
+
+    def test_repack(self):
+        report = repack(self.source, self.destination,
+                        hints={"channels": "channel"},
+                        chunkbytes=2**15, benchmark_reads=3)
+        by_name = {e["name"]: e for e in report}
+        assert by_name["channels"]["chunks_after"] == (1, 3750)
+        assert by_name["image"]["hint"] == "tile"
+        assert by_name["events"]["hint"] == "window"
+        assert all(e["read_before"] > 0 and e["read_after"] > 0
+                   for e in report)
+        f = nix.File.open(self.destination, nix.FileMode.ReadOnly)
+        b = f.blocks[0]
+        da = b.data_arrays["channels"]
+        assert np.array_equal(da[:], self.data)
+        assert da._h5group.group["data"].chunks == (1, 3750)
+        assert da.dimensions[1].sampling_interval == 0.01
+        assert da.metadata.name == "recording"
+        assert b.tags[0].references[0].id == da.id
+        assert list(b.data_frames[0].read_rows([499]))[0][1] == "e499"
+        f.close()
+
+    def test_memmap(self):
+        repack(self.source, self.destination, default="memmap",
+               benchmark_reads=0)
+        f = nix.File.open(self.destination, nix.FileMode.ReadOnly)
+        assert is_contiguous(f.blocks[0].data_arrays["channels"])
+        assert is_contiguous(f.blocks[0].data_arrays["image"])
+        f.close()
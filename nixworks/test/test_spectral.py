@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import nixio as nix
+import unittest
+from nixworks.plotter import suggested_plotter
+from nixworks.plotter.spectral import SpectralPlotter
+
+try:
+    from scipy import signal
+except ImportError:
+    signal = None
+
+
+def welch(data, rate, nfft, noverlap):
+    # straightforward reference: mean periodogram of the detrended,
+    # hann windowed segments, one sided density
+    step = nfft - noverlap
+    win = np.hanning(nfft + 1)[:-1]
+    power = []
+    for first in range(0, len(data) - nfft + 1, step):
+        segment = data[first:first + nfft]
+        segment = (segment - segment.mean()) * win
+        power.append(np.abs(np.fft.rfft(segment)) ** 2)
+    power = np.mean(power, axis=0) / (rate * (win ** 2).sum())
+    power[1:-1] *= 2
+    return np.fft.rfftfreq(nfft, 1. / rate), power
+
+
+class TestSpectralPlotter(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "spectral.nix"
+        self.copyname = "spectral_copy.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        t = np.arange(20000) / 1000.
+        self.signal = np.sin(2 * np.pi * 50 * t) + np.random.randn(len(t))
+        self.da = self.block.create_data_array("signal", "da",
+                                               data=self.signal)
+        self.da.append_sampled_dimension(0.001)
+        self.channels = np.random.randn(3, len(t))
+        self.multi = self.block.create_data_array("channels", "da",
+                                                  data=self.channels)
+        self.multi.append_set_dimension()
+        self.multi.append_sampled_dimension(0.001)
+        SpectralPlotter._cache.clear()
+
+    def tearDown(self):
+        SpectralPlotter._cache.clear()
+        self.file.close()
+        for name in (self.testfilename, self.copyname):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def test_supports(self):
+        assert SpectralPlotter.supports(self.da)
+        assert SpectralPlotter.supports(self.multi)
+        assert isinstance(suggested_plotter(self.multi, spectral=True),
+                          SpectralPlotter)
+        image = self.block.create_data_array("image", "da",
+                                             data=np.zeros((10, 10)))
+        image.append_sampled_dimension(1.)
+        image.append_sampled_dimension(1.)
+        assert not SpectralPlotter.supports(image)
+
+    def test_psd(self):
+        freqs, reference = welch(self.signal, 1000., 256, 128)
+        for chunksize in (300, 4096, 2**20):
+            for workers in (None, 3):
+                sp = SpectralPlotter(self.da, nfft=256, chunksize=chunksize,
+                                     workers=workers)
+                f, power = sp.psd()
+                assert np.allclose(f, freqs)
+                assert np.allclose(power, reference)
+                SpectralPlotter._cache.clear()
+        assert abs(freqs[np.argmax(reference)] - 50.) < 1000. / 256
+
+    def test_psd_channels(self):
+        for channel in range(3):
+            freqs, reference = welch(self.channels[channel], 1000., 128, 32)
+            for chunksize in (500, 2**20):
+                for workers in (None, 2):
+                    sp = SpectralPlotter(self.multi, nfft=128, noverlap=32,
+                                         channel=channel, workers=workers,
+                                         chunksize=chunksize)
+                    assert sp.xdim == 1
+                    assert np.allclose(sp.psd()[1], reference)
+
+    @unittest.skipIf(signal is None, "scipy is not installed")
+    def test_scipy_welch(self):
+        freqs, reference = signal.welch(self.signal, 1000., nperseg=512)
+        f, power = SpectralPlotter(self.da, nfft=512).psd()
+        assert np.allclose(f, freqs) and np.allclose(power, reference)
+
+    def test_cache(self):
+        sp = SpectralPlotter(self.da, nfft=256)
+        sp.psd()
+        sp.psd()
+        assert len(SpectralPlotter._cache) == 1
+        for end in range(1000, 1000 + 50 * 10, 10):
+            sp.psd(end=end)
+        assert len(SpectralPlotter._cache) == SpectralPlotter.cache_size
+        # the same ids in a copy of the file are not mistaken for the
+        # original
+        copy = nix.File.open(self.copyname, nix.FileMode.Overwrite)
+        self.file.blocks[0]._h5group.group.file.copy(
+            self.file.blocks[0]._h5group.group, copy._h5group.group["data"])
+        da = copy.blocks[0].data_arrays["signal"]
+        da.write_direct(np.zeros(len(self.signal)))
+        assert da.id == self.da.id
+        assert np.allclose(SpectralPlotter(da, nfft=256).psd()[1], 0.)
+        copy.close()
@@ -0,0 +1,70 @@
+import numpy as np
+import nixio as nix
+import unittest
+from unittest import mock
+from nixworks.stats import stats
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "s.nix"
+        self.file = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        self.block = self.file.create_block("test_block", "abc")
+        self.data = np.concatenate((np.random.randn(5000),
+                                    np.random.randn(5000) * 20 + 100))
+        self.da = self.block.create_data_array("test_da", "da",
+                                               data=self.data)
+        di = {'time': np.float64, 'id': str, 'count': np.int64}
+        arr = [(i * 0.5, "id%i" % i, i % 7) for i in range(100)]
+        self.df = self.block.create_data_frame("test df", "signal1",
+                                               data=arr, col_dict=di)
+
+    def tearDown(self):
+        self.file.close()
+
+    def test_data_array(self):
+        summary = stats.compute_summary(self.da, bins=32, chunksize=999)
+        assert summary["count"] == len(self.data)
+        assert summary["min"] == self.data.min()
+        assert summary["max"] == self.data.max()
+        assert np.isclose(summary["mean"], self.data.mean())
+        assert np.isclose(summary["std"], self.data.std())
+        hist, _ = np.histogram(self.data, bins=summary["bin_edges"])
+        assert np.array_equal(hist, summary["histogram"])
+
+    def test_data_frame(self):
+        summary = stats.compute_summary(self.df)
+        assert sorted(summary.keys()) == ["count", "time"]
+        assert summary["time"]["max"] == 49.5
+        assert summary["count"]["count"] == 100
+
+    def test_stored(self):
+        summary = stats.summarize(self.da)
+        stored = stats.load_summary(self.da)
+        assert stored["mean"] == summary["mean"]
+        assert np.array_equal(stored["histogram"], summary["histogram"])
+        self.da.append(np.array([1e6]))
+        assert stats.load_summary(self.da) is None
+        assert stats.summarize(self.da)["max"] == 1e6
+
+    def test_stored_data_frame(self):
+        assert stats.marker(self.df) == stats.marker(self.df)
+        summary = stats.summarize(self.df)
+        with mock.patch.object(stats, "compute_summary") as compute:
+            again = stats.summarize(self.df)
+            stats._memory.clear()
+            stored = stats.summarize(self.df)
+        assert not compute.called
+        assert again is summary
+        assert stored["time"]["max"] == summary["time"]["max"]
+
+    def test_calibrated(self):
+        da = self.block.create_data_array("calibrated", "da",
+                                          data=np.arange(10.))
+        plain = stats.marker(da)
+        da.polynom_coefficients = [100., 2.]
+        assert stats.marker(da) != plain
+        summary = stats.summarize(da)
+        assert summary["min"] == 100. and summary["max"] == 118.
+        assert summary["mean"] == 109.
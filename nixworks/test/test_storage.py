@@ -0,0 +1,51 @@
+import numpy as np
+import nixio as nix
+import h5py
+import unittest
+from nixworks.storage import storage
+from nixworks.table import table
+
+
+class TestMemmap(unittest.TestCase):
+
+    def setUp(self):
+        self.testfilename = "m.nix"
+        nixfile = nix.File.open(self.testfilename, nix.FileMode.Overwrite)
+        block = nixfile.create_block("test_block", "abc")
+        self.data = np.arange(1000.)
+        block.create_data_array("contiguous", "da", data=self.data)
+        block.create_data_array("chunked", "da", data=self.data)
+        block.create_data_frame("test df", "df", data=[(1.5, 2), (3.5, 4)],
+                                col_dict={'a': np.float64, 'b': np.int64})
+        nixfile.close()
+        # nixio always writes chunked datasets, rewrite two of them
+        h5file = h5py.File(self.testfilename, "r+")
+        for path in ["data/test_block/data_arrays/contiguous/data",
+                     "data/test_block/data_frames/test df/data"]:
+            values = h5file[path][:]
+            del h5file[path]
+            h5file.create_dataset(path, data=values)
+        h5file.close()
+        self.file = nix.File.open(self.testfilename, nix.FileMode.ReadOnly)
+        self.block = self.file.blocks[0]
+
+    def tearDown(self):
+        self.file.close()
+        storage.release()
+
+    def test_data_array(self):
+        da = self.block.data_arrays["contiguous"]
+        assert storage.is_contiguous(da)
+        mapped = storage.memmap(da)
+        assert isinstance(mapped, np.memmap)
+        assert np.array_equal(mapped[100:200], da[100:200])
+        chunked = self.block.data_arrays["chunked"]
+        assert not storage.is_contiguous(chunked)
+        assert storage.data_view(chunked) is chunked
+
+    def test_data_frame(self):
+        df = self.block.data_frames[0]
+        assert storage.memmap(df) is not None
+        pd_df = table.write_to_pandas(df)
+        assert list(pd_df.columns) == ["a", "b"]
+        assert pd_df["a"].tolist() == [1.5, 3.5]
@@ -11,8 +11,6 @@ with open('LICENSE') as f:
 classifiers = [
     'Development Status :: 4 - Beta',
     'Programming Language :: Python',
-    'Programming Language :: Python :: 2.7',
-    'Programming Language :: Python :: 3.6',
     'Programming Language :: Python :: 3.7',
     'Topic :: Scientific/Engineering'
 ]
@@ -38,12 +36,17 @@ setup(
     long_description_content_type='text/markdown',
     classifiers=classifiers,
     license='BSD',
-    packages=['nixworks.plotter', 'nixworks.table'],
+    packages=['nixworks.catalog', 'nixworks.export', 'nixworks.plotter',
+              'nixworks.profiling', 'nixworks.render', 'nixworks.repack',
+              'nixworks.stats', 'nixworks.storage', 'nixworks.table'],
     scripts=[],
     tests_require=['pytest'],
     test_suite='pytest',
     setup_requires=['pytest-runner'],
+    python_requires='>=3.7',
     install_requires=['nixio'],
+    extras_require={'dask': ['dask[array,dataframe]'],
+                    'xarray': ['xarray']},
     package_data={'nixworks': [license_text, description_text]},
     include_package_data=True,
     zip_safe=False,